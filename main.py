@@ -10,14 +10,26 @@ from discord.ext import tasks, commands
 import json
 import datetime
 import asyncio
+import bisect
+import copy
 import os
 import io
+import array
+import gzip
+import hashlib
+import heapq
+import html as html_lib
 import random
 import math
 import re
+import shutil
+import sqlite3
+import sys
+import tempfile
 import time
+import unicodedata
 from typing import Optional, List, Dict, Union, Any, Literal
-from collections import defaultdict
+from collections import defaultdict, deque, OrderedDict
 
 # ==================================================================================================
 #  SECTION 1: EDITABLE BRANDING & GLOBAL CONSTANTS
@@ -26,6 +38,37 @@ from collections import defaultdict
 BOT_TOKEN_HOLDER = os.getenv("DISCORD_TOKEN", "YOUR_TOKEN_HERE")
 DATABASE_FILENAME = "data.json"
 
+# Storage backend: "json" (single data.json document), "sqlite" (tables in SQLITE_FILENAME)
+# or "journal" (data.json snapshot plus an append-only JOURNAL_FILENAME, compacted periodically)
+DATABASE_BACKEND = os.getenv("DATABASE_BACKEND", "json")
+SQLITE_FILENAME = os.getenv("SQLITE_FILENAME", "data.sqlite3")
+JOURNAL_FILENAME = os.getenv("JOURNAL_FILENAME", "data.journal")
+JOURNAL_COMPACT_INTERVAL = float(os.getenv("JOURNAL_COMPACT_INTERVAL", "300"))
+
+# Slash commands are only re-synced when the command tree changed since the last sync.
+# DEV_GUILD_ID additionally syncs a copy of the tree to that guild, where updates apply instantly.
+COMMAND_SYNC_STATE_FILE = os.getenv("COMMAND_SYNC_STATE_FILE", "command_sync.json")
+DEV_GUILD_ID = int(os.getenv("DEV_GUILD_ID", "0")) or None
+
+# Per-guild partitions: stored under GUILD_DATA_DIRECTORY, loaded on a guild's first event
+# and unloaded after GUILD_IDLE_EVICT_SECONDS without activity
+GUILD_DATA_DIRECTORY = os.getenv("GUILD_DATA_DIRECTORY", "guild_data")
+GUILD_IDLE_EVICT_SECONDS = float(os.getenv("GUILD_IDLE_EVICT_SECONDS", "1800"))
+# The single guild that data in the pre-partition global document belongs to. Only its partition
+# is seeded from that data (as are explicit `migrate-guilds` targets); every other guild starts empty.
+LEGACY_GUILD_ID = int(os.getenv("LEGACY_GUILD_ID", "0")) or None
+GUILD_SCOPED_SECTIONS = (
+    "ticket_customization", "modal_customization", "logs_channel", "audit_log_channel",
+    "transcript_channel", "blacklist", "staff_stats", "xp_system", "ticket_reopen", "cooldowns",
+    "moderation", "xp", "staff_recruitment", "permissions_tiers", "xp_engine", "recruitment_system",
+    "ticket_system", "tournaments", "security_settings", "channels", "auto_mod", "permission_roles"
+)
+
+# Persistence: "write_behind" coalesces saves and flushes them every DATABASE_FLUSH_INTERVAL
+# seconds (and on shutdown); "write_through" writes data.json on every save.
+DATABASE_WRITE_MODE = os.getenv("DATABASE_WRITE_MODE", "write_behind")
+DATABASE_FLUSH_INTERVAL = float(os.getenv("DATABASE_FLUSH_INTERVAL", "5"))
+
 # Visual Branding
 COLOR_PLATINUM_MAIN = 0x00AEEF
 COLOR_PLATINUM_SUCCESS = 0x2ECC71
@@ -42,186 +85,1076 @@ DEFAULT_STATUS_TYPE = discord.ActivityType.competing
 FOOTER_TEXT_CREDIT = "Platinum Enterprise v6.5 | Ultimate E-Sports Suite"
 NO_PERM_MESSAGE = "❌ ERROR: You do not have the required Permission Tier to execute this command."
 
-# Anti-Raid/Spam tracking
-spam_tracker = defaultdict(list)
-raid_tracker = defaultdict(list)
+# XP awards are kept in memory and copied into storage every XP_FLUSH_INTERVAL seconds
+XP_FLUSH_INTERVAL = float(os.getenv("XP_FLUSH_INTERVAL", "10"))
+LEADERBOARD_PAGE_SIZE = 10
+
+# Level curve: going from level L to L+1 takes A*L^2 + B*L + C XP
+LEVEL_CURVE_A = 100
+LEVEL_CURVE_B = 200
+LEVEL_CURVE_C = 500
+VOICE_XP_SWEEP_SECONDS = float(os.getenv("VOICE_XP_SWEEP_SECONDS", "60"))
+REACTION_XP_WINDOW = float(os.getenv("REACTION_XP_WINDOW", "5"))
+
+# Ticket transcripts are streamed to temp files that spill to disk past TRANSCRIPT_SPOOL_BYTES
+TRANSCRIPT_SPOOL_BYTES = int(os.getenv("TRANSCRIPT_SPOOL_BYTES", str(1024 * 1024)))
+TRANSCRIPT_GZIP = os.getenv("TRANSCRIPT_GZIP", "0") == "1"
+TRANSCRIPT_HTML = os.getenv("TRANSCRIPT_HTML", "0") == "1"
+# Closed transcripts are also kept in a local, searchable archive
+TRANSCRIPT_ARCHIVE_DIRECTORY = os.getenv("TRANSCRIPT_ARCHIVE_DIRECTORY", "transcript_archive")
+# Ticket channels are created through a per-guild queue to stay under channel-creation limits
+TICKET_CREATE_CONCURRENCY = int(os.getenv("TICKET_CREATE_CONCURRENCY", "3"))
+TICKET_CREATE_RATE = float(os.getenv("TICKET_CREATE_RATE", "2"))
+PANEL_RELOAD_CONCURRENCY = int(os.getenv("PANEL_RELOAD_CONCURRENCY", "5"))
+
+# Anti-Raid/Spam tracking: joins remembered per guild for raid counts
+RAID_TRACKER_CAPACITY = 500
+# Log entries are batched per channel and sent every few seconds
+AUDIT_LOG_FLUSH_SECONDS = float(os.getenv("AUDIT_LOG_FLUSH_SECONDS", "3"))
+# Failed sends back off up to AUDIT_LOG_MAX_BACKOFF seconds; past AUDIT_LOG_MAX_BACKLOG entries
+# per channel the oldest are dropped
+AUDIT_LOG_MAX_BACKOFF = float(os.getenv("AUDIT_LOG_MAX_BACKOFF", "300"))
+AUDIT_LOG_MAX_BACKLOG = int(os.getenv("AUDIT_LOG_MAX_BACKLOG", "1000"))
+# Same or near-same text from this many accounts and channels within the window is spam; a
+# member who joined (or whose account was created) in the last DUPLICATE_NEW_MEMBER_HOURS is
+# actioned on either threshold. Anything less is only logged.
+DUPLICATE_WINDOW_SECONDS = float(os.getenv("DUPLICATE_WINDOW_SECONDS", "30"))
+DUPLICATE_ACCOUNT_THRESHOLD = int(os.getenv("DUPLICATE_ACCOUNT_THRESHOLD", "4"))
+DUPLICATE_CHANNEL_THRESHOLD = int(os.getenv("DUPLICATE_CHANNEL_THRESHOLD", "4"))
+DUPLICATE_NEW_MEMBER_HOURS = float(os.getenv("DUPLICATE_NEW_MEMBER_HOURS", "24"))
+DUPLICATE_INDEX_CAPACITY = int(os.getenv("DUPLICATE_INDEX_CAPACITY", "10000"))
+# Raid mode: pacing for mass kicks/bans (Discord's global limit is 50 requests/s)
+MASS_ACTION_CONCURRENCY = int(os.getenv("MASS_ACTION_CONCURRENCY", "8"))
+MASS_ACTION_ROUTE_RATE = float(os.getenv("MASS_ACTION_ROUTE_RATE", "10"))
+MASS_ACTION_GLOBAL_RATE = float(os.getenv("MASS_ACTION_GLOBAL_RATE", "40"))
+RAID_TIMEOUT_MINUTES = int(os.getenv("RAID_TIMEOUT_MINUTES", "60"))
+# Join-pattern scoring looks at each guild's joins from the last few minutes
+JOIN_WINDOW_SECONDS = float(os.getenv("JOIN_WINDOW_SECONDS", "300"))
+JOIN_WINDOW_CAPACITY = int(os.getenv("JOIN_WINDOW_CAPACITY", "2000"))
 
 # ==================================================================================================
 #  SECTION 2: DATABASE ENGINE
 # ==================================================================================================
 
+class JSONStorageBackend:
+    """Stores the whole database as a single JSON document."""
+    
+    def __init__(self, filename: str):
+        self.filename = filename
+    
+    def load(self) -> Optional[dict]:
+        if not os.path.exists(self.filename):
+            return None
+        with open(self.filename, "r", encoding="utf-8") as f:
+            return json.load(f)
+    
+    def close(self):
+        pass
+    
+    def prepare(self, data_dict: dict, paths: set) -> str:
+        """Runs on the event loop. A JSON document is always rewritten whole, and it is encoded
+        here, where nothing can mutate it mid-dump; the encoding time is still spent on the loop.
+        Only the finished string goes to the worker thread."""
+        return json.dumps(data_dict)
+    
+    def apply(self, batch: str):
+        """Runs in a worker thread: the file write, fsync and rename."""
+        self._write_atomic(batch)
+    
+    def _write_atomic(self, payload: str):
+        """Writes to a temp file, fsyncs it and renames it over the database file."""
+        temp_filename = f"{self.filename}.tmp"
+        with open(temp_filename, "w", encoding="utf-8") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_filename, self.filename)
+        
+        # Persist the rename itself
+        if os.name == "posix":
+            dir_fd = os.open(os.path.dirname(os.path.abspath(self.filename)), os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+
+class JournalStorageBackend(JSONStorageBackend):
+    """Keeps data.json as a snapshot and records every commit as one line in an append-only
+    journal. Startup replays the snapshot plus the journal tail; compaction folds the
+    journal back into the snapshot.
+    
+    Each compaction starts a new generation. The snapshot stores its generation and every journal
+    line carries the one it was written in, so lines older than the snapshot are skipped. A crash
+    between writing the snapshot and truncating the journal therefore cannot replay stale lines
+    over it."""
+    
+    GENERATION_KEY = "_journal_generation"
+    
+    def __init__(self, filename: str, journal_filename: str):
+        super().__init__(filename)
+        self.journal_filename = journal_filename
+        self.journal_entries = 0
+        self.generation = 0
+    
+    @staticmethod
+    def _lookup(data_dict: dict, path: tuple):
+        node = data_dict
+        for key in path:
+            if not isinstance(node, dict) or key not in node:
+                return False, None
+            node = node[key]
+        return True, node
+    
+    @staticmethod
+    def _replay(data_dict: dict, entry: dict):
+        *parents, leaf = entry["path"]
+        node = data_dict
+        for key in parents:
+            node = node.setdefault(key, {})
+        if entry.get("deleted"):
+            node.pop(leaf, None)
+        else:
+            node[leaf] = entry["value"]
+    
+    def load(self) -> Optional[dict]:
+        data_dict = super().load()
+        if data_dict is None:
+            return None
+        self.generation = data_dict.pop(self.GENERATION_KEY, 0)
+        if not os.path.exists(self.journal_filename):
+            return data_dict
+        
+        valid_bytes = 0
+        torn = False
+        stale = 0
+        with open(self.journal_filename, "rb") as f:
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("unterminated entry")
+                    entry = json.loads(line)
+                except ValueError:
+                    # A crash mid-append leaves at most one torn line at the tail
+                    torn = True
+                    break
+                valid_bytes += len(line)
+                # Left over from a compaction that crashed before truncating; the snapshot has it
+                if entry.get("gen", 0) < self.generation:
+                    stale += 1
+                    continue
+                self._replay(data_dict, entry)
+                self.journal_entries += 1
+        
+        if torn:
+            print(f"[WARNING] Dropping torn journal entry after {self.journal_entries} entries")
+            with open(self.journal_filename, "r+b") as f:
+                f.truncate(valid_bytes)
+        
+        if stale:
+            print(f"[WARNING] Skipped {stale} journal entries already covered by the snapshot")
+        if self.journal_entries:
+            print(f"[SYSTEM] Replayed {self.journal_entries} journal entries")
+        return data_dict
+    
+    def prepare(self, data_dict: dict, paths: set):
+        """Runs on the event loop. Whole-document saves become a snapshot; commits become journal lines."""
+        if () in paths:
+            return ("snapshot", self.snapshot(data_dict))
+        
+        now = time.time()
+        lines = []
+        for path in paths:
+            found, value = self._lookup(data_dict, path)
+            entry = {"ts": now, "gen": self.generation, "path": list(path)}
+            if found:
+                entry["value"] = value
+            else:
+                entry["deleted"] = True
+            lines.append(json.dumps(entry) + "\n")
+        return ("append", lines)
+    
+    def apply(self, batch: tuple):
+        kind, payload = batch
+        if kind == "snapshot":
+            self.compact(payload)
+            return
+        
+        with open(self.journal_filename, "a", encoding="utf-8") as f:
+            f.writelines(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        self.journal_entries += len(payload)
+    
+    def snapshot(self, data_dict: dict) -> tuple:
+        """Runs on the event loop. Encodes data_dict as the snapshot of the next generation."""
+        generation = self.generation + 1
+        return generation, json.dumps(dict(data_dict, **{self.GENERATION_KEY: generation}))
+    
+    def compact(self, snapshot: tuple):
+        """Runs in a worker thread. Writes a snapshot from snapshot(), then truncates the journal."""
+        generation, payload = snapshot
+        self._write_atomic(payload)
+        self.generation = generation
+        self._truncate_journal()
+    
+    def _truncate_journal(self):
+        with open(self.journal_filename, "w", encoding="utf-8") as f:
+            f.flush()
+            os.fsync(f.fileno())
+        self.journal_entries = 0
+
+class SQLiteStorageBackend:
+    """Stores the database in SQLite (WAL mode). Large collections live in real tables so a
+    point update touches one row; every other section is stored as a JSON blob."""
+    
+    # Collections kept out of the section blobs, keyed by their path in the document
+    COLLECTIONS = {
+        ("xp_engine", "user_data"): "xp_users",
+        ("tournaments", "active_tournaments"): "tournaments",
+        ("permissions_tiers",): "permission_tiers",
+        ("system_stats",): "stats",
+        ("recruitment_system", "stats"): "stats"
+    }
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS sections (name TEXT PRIMARY KEY, data TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS xp_users (
+            user_id TEXT PRIMARY KEY, xp INTEGER NOT NULL, level INTEGER NOT NULL,
+            total_xp INTEGER NOT NULL, last_xp_time REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS tournaments (tournament_id TEXT PRIMARY KEY, data TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS registered_teams (
+            tournament_id TEXT NOT NULL, position INTEGER NOT NULL, data TEXT NOT NULL,
+            PRIMARY KEY (tournament_id, position)
+        );
+        CREATE TABLE IF NOT EXISTS permission_tiers (tier TEXT PRIMARY KEY);
+        CREATE TABLE IF NOT EXISTS tier_members (
+            tier TEXT NOT NULL, user_id INTEGER NOT NULL, PRIMARY KEY (tier, user_id)
+        );
+        CREATE TABLE IF NOT EXISTS stats (
+            section TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, PRIMARY KEY (section, key)
+        );
+    """
+    
+    def __init__(self, filename: str):
+        self.filename = filename
+        # Writes run in worker threads, serialized by PlatinumCoreDB's flush lock
+        self.conn = sqlite3.connect(filename, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+    
+    def close(self):
+        self.conn.close()
+    
+    @staticmethod
+    def _resolve(data_dict: dict, path: tuple, create: bool = False) -> dict:
+        node = data_dict
+        for key in path:
+            if key not in node:
+                if not create:
+                    return {}
+                node[key] = {}
+            node = node[key]
+        return node
+    
+    def load(self) -> Optional[dict]:
+        rows = self.conn.execute("SELECT name, data FROM sections").fetchall()
+        if not rows:
+            return None
+        
+        data_dict = {name: json.loads(data) for name, data in rows}
+        for prefix in self.COLLECTIONS:
+            self._resolve(data_dict, prefix, create=True)
+        
+        user_data = self._resolve(data_dict, ("xp_engine", "user_data"))
+        for user_id, xp, level, total_xp, last_xp_time in self.conn.execute(
+                "SELECT user_id, xp, level, total_xp, last_xp_time FROM xp_users"):
+            user_data[user_id] = {"xp": xp, "level": level, "total_xp": total_xp, "last_xp_time": last_xp_time}
+        
+        tournaments = self._resolve(data_dict, ("tournaments", "active_tournaments"))
+        for tournament_id, data in self.conn.execute("SELECT tournament_id, data FROM tournaments"):
+            tournaments[tournament_id] = json.loads(data)
+            tournaments[tournament_id]["registered_teams"] = []
+        for tournament_id, data in self.conn.execute(
+                "SELECT tournament_id, data FROM registered_teams ORDER BY tournament_id, position"):
+            if tournament_id in tournaments:
+                tournaments[tournament_id]["registered_teams"].append(json.loads(data))
+        
+        tiers = self._resolve(data_dict, ("permissions_tiers",))
+        for (tier,) in self.conn.execute("SELECT tier FROM permission_tiers"):
+            tiers[tier] = []
+        for tier, user_id in self.conn.execute("SELECT tier, user_id FROM tier_members ORDER BY rowid"):
+            tiers.setdefault(tier, []).append(user_id)
+        
+        for section, key, value in self.conn.execute("SELECT section, key, value FROM stats"):
+            self._resolve(data_dict, tuple(section.split(".")), create=True)[key] = json.loads(value)
+        
+        return data_dict
+    
+    def prepare(self, data_dict: dict, paths: set) -> list:
+        """Runs on the event loop. Turns dirty paths into (sql, rows) statements."""
+        batch = []
+        for path in ({()} if () in paths else paths):
+            self._prepare_path(data_dict, path, batch)
+        return batch
+    
+    def apply(self, batch: list):
+        """Runs in a worker thread. Applies a prepared batch in one transaction."""
+        with self.conn:
+            for sql, rows in batch:
+                self.conn.executemany(sql, rows)
+    
+    def _prepare_path(self, data_dict: dict, path: tuple, batch: list):
+        # A path inside a collection only rewrites the affected item
+        for prefix in self.COLLECTIONS:
+            if len(path) > len(prefix) and path[:len(prefix)] == prefix:
+                collection = self._resolve(data_dict, prefix)
+                self._prepare_item(prefix, path[len(prefix)], collection.get(path[len(prefix)]), batch)
+                return
+        
+        # Otherwise rewrite the section blob and every collection the path covers
+        if path:
+            names = [path[0]]
+        else:
+            names = list(data_dict.keys())
+            batch.append(("DELETE FROM sections", [()]))
+        
+        for name in names:
+            if (name,) in self.COLLECTIONS:
+                continue
+            if name in data_dict:
+                value = self._strip_collections(name, data_dict[name])
+                batch.append(("INSERT OR REPLACE INTO sections (name, data) VALUES (?, ?)", [(name, json.dumps(value))]))
+            else:
+                batch.append(("DELETE FROM sections WHERE name = ?", [(name,)]))
+        
+        for prefix in self.COLLECTIONS:
+            if prefix[:len(path)] == path:
+                self._prepare_collection(prefix, self._resolve(data_dict, prefix), batch)
+    
+    def _strip_collections(self, name: str, value):
+        """Returns a section without the collections that are stored in their own tables."""
+        for prefix in self.COLLECTIONS:
+            if prefix[0] == name and len(prefix) == 2 and isinstance(value, dict) and prefix[1] in value:
+                value = dict(value)
+                value[prefix[1]] = {}
+        return value
+    
+    def _prepare_collection(self, prefix: tuple, collection: dict, batch: list):
+        table = self.COLLECTIONS[prefix]
+        if table == "xp_users":
+            batch.append(("DELETE FROM xp_users", [()]))
+        elif table == "tournaments":
+            batch.append(("DELETE FROM tournaments", [()]))
+            batch.append(("DELETE FROM registered_teams", [()]))
+        elif table == "permission_tiers":
+            batch.append(("DELETE FROM permission_tiers", [()]))
+            batch.append(("DELETE FROM tier_members", [()]))
+        elif table == "stats":
+            batch.append(("DELETE FROM stats WHERE section = ?", [(".".join(prefix),)]))
+        
+        if table == "xp_users":
+            # One statement for the whole table instead of one per user
+            batch.append((
+                "INSERT INTO xp_users (user_id, xp, level, total_xp, last_xp_time) VALUES (?, ?, ?, ?, ?)",
+                [(uid, e["xp"], e["level"], e["total_xp"], e["last_xp_time"]) for uid, e in collection.items()]
+            ))
+            return
+        
+        for key, value in collection.items():
+            self._prepare_item(prefix, key, value, batch)
+    
+    def _prepare_item(self, prefix: tuple, key: str, value, batch: list):
+        table = self.COLLECTIONS[prefix]
+        
+        if table == "xp_users":
+            if value is None:
+                batch.append(("DELETE FROM xp_users WHERE user_id = ?", [(key,)]))
+            else:
+                batch.append((
+                    "INSERT OR REPLACE INTO xp_users (user_id, xp, level, total_xp, last_xp_time) VALUES (?, ?, ?, ?, ?)",
+                    [(key, value["xp"], value["level"], value["total_xp"], value["last_xp_time"])]
+                ))
+        
+        elif table == "tournaments":
+            batch.append(("DELETE FROM registered_teams WHERE tournament_id = ?", [(key,)]))
+            if value is None:
+                batch.append(("DELETE FROM tournaments WHERE tournament_id = ?", [(key,)]))
+                return
+            record = {k: v for k, v in value.items() if k != "registered_teams"}
+            batch.append(("INSERT OR REPLACE INTO tournaments (tournament_id, data) VALUES (?, ?)", [(key, json.dumps(record))]))
+            batch.append((
+                "INSERT INTO registered_teams (tournament_id, position, data) VALUES (?, ?, ?)",
+                [(key, i, json.dumps(team)) for i, team in enumerate(value.get("registered_teams", []))]
+            ))
+        
+        elif table == "permission_tiers":
+            batch.append(("DELETE FROM tier_members WHERE tier = ?", [(key,)]))
+            if value is None:
+                batch.append(("DELETE FROM permission_tiers WHERE tier = ?", [(key,)]))
+                return
+            batch.append(("INSERT OR IGNORE INTO permission_tiers (tier) VALUES (?)", [(key,)]))
+            batch.append(("INSERT OR IGNORE INTO tier_members (tier, user_id) VALUES (?, ?)", [(key, uid) for uid in value]))
+        
+        elif table == "stats":
+            section = ".".join(prefix)
+            if value is None:
+                batch.append(("DELETE FROM stats WHERE section = ? AND key = ?", [(section, key)]))
+            else:
+                batch.append(("INSERT OR REPLACE INTO stats (section, key, value) VALUES (?, ?, ?)", [(section, key, json.dumps(value))]))
+
+class PlatinumDataStore:
+    """One persisted document (the global database or a guild partition): its in-memory copy,
+    storage backend and write-behind state."""
+    
+    def __init__(self, backend, default_factory):
+        self.backend = backend
+        self.default_factory = default_factory
+        self.data: Optional[dict] = None
+        self.dirty_paths = set()
+        self.pending_writes = 0
+        self.flush_lock = asyncio.Lock()
+        self.last_access = time.monotonic()
+        # How long the read from storage took, for the startup timings
+        self.load_seconds = 0.0
+    
+    def load(self) -> dict:
+        """Returns the in-memory document, reading it from storage on first use."""
+        self.last_access = time.monotonic()
+        if self.data is None:
+            started = time.perf_counter()
+            try:
+                data_dict = self.backend.load()
+            except Exception as e:
+                print(f"[ERROR] Failed to read database: {e}")
+                return {}
+            
+            if data_dict is None:
+                print(f"[SYSTEM] Creating new database: {self.backend.filename}")
+                data_dict = self.default_factory()
+                self.backend.apply(self.backend.prepare(data_dict, {()}))
+                print("[SYSTEM] Database initialized successfully.")
+            
+            self.data = data_dict
+            self.load_seconds = time.perf_counter() - started
+        return self.data
+    
+    def mark_dirty(self, path: tuple):
+        self.dirty_paths.add(path)
+        self.pending_writes += 1
+        
+        if DATABASE_WRITE_MODE != "write_behind":
+            self.flush_now()
+    
+    def _take_dirty(self):
+        paths, coalesced = self.dirty_paths, self.pending_writes
+        self.dirty_paths = set()
+        self.pending_writes = 0
+        return paths, coalesced
+    
+    def _restore_dirty(self, paths: set, coalesced: int):
+        self.dirty_paths |= paths
+        self.pending_writes += coalesced
+    
+    def flush_now(self):
+        """Writes pending changes synchronously (write-through mode)."""
+        paths, _ = self._take_dirty()
+        try:
+            self.backend.apply(self.backend.prepare(self.data, paths))
+        except Exception as e:
+            print(f"[ERROR] Failed to save database: {e}")
+    
+    async def flush(self):
+        """Writes pending changes, coalescing every save since the last flush. The backend encodes
+        them on the loop; the file or database write runs in a worker thread."""
+        async with self.flush_lock:
+            if not self.dirty_paths or self.data is None:
+                return
+            
+            paths, coalesced = self._take_dirty()
+            started = time.perf_counter()
+            try:
+                batch = self.backend.prepare(self.data, paths)
+                await asyncio.to_thread(self.backend.apply, batch)
+            except Exception as e:
+                print(f"[ERROR] Failed to flush database: {e}")
+                self._restore_dirty(paths, coalesced)
+                PlatinumCoreDB.flush_stats["failed_flushes"] += 1
+                return
+            
+            PlatinumCoreDB.record_flush((time.perf_counter() - started) * 1000, coalesced)
+    
+    async def compact(self):
+        """Folds the journal into a fresh snapshot, for backends that keep one."""
+        if not isinstance(self.backend, JournalStorageBackend) or self.data is None:
+            return
+        
+        async with self.flush_lock:
+            if not self.backend.journal_entries:
+                return
+            
+            # The snapshot covers every dirty path as well, so they need no journal lines
+            entries = self.backend.journal_entries
+            paths, coalesced = self._take_dirty()
+            try:
+                await asyncio.to_thread(self.backend.compact, self.backend.snapshot(self.data))
+            except Exception as e:
+                print(f"[ERROR] Failed to compact journal: {e}")
+                self._restore_dirty(paths, coalesced)
+                return
+            print(f"[SYSTEM] Compacted {entries} journal entries into {self.backend.filename}")
+    
+    def reload(self) -> dict:
+        """Drops the in-memory copy (and any unflushed saves) and re-reads it from storage."""
+        self.data = None
+        self._take_dirty()
+        return self.load()
+
 class PlatinumCoreDB:
     """Handles all persistent data interactions."""
     
+    # Process-resident documents: the global database plus lazily loaded guild partitions
+    _store: Optional[PlatinumDataStore] = None
+    _guild_stores: Dict[int, PlatinumDataStore] = {}
+    # Guilds whose new partition is seeded from the legacy global sections (see migrate_legacy_guild_data)
+    _migration_targets: set = set()
+    
+    # Flush metrics across every store
+    flush_stats = {
+        "flushes": 0,
+        "failed_flushes": 0,
+        "last_latency_ms": 0.0,
+        "max_latency_ms": 0.0,
+        "total_latency_ms": 0.0,
+        "last_coalesced": 0,
+        "max_coalesced": 0,
+        "total_coalesced": 0
+    }
+    
     @staticmethod
-    def initialize_filesystem():
-        """Creates database if it doesn't exist."""
-        if not os.path.exists(DATABASE_FILENAME):
-            print(f"[SYSTEM] Creating new database: {DATABASE_FILENAME}")
-            
-            initial_schema = {
-                "branding": {
-                    "bot_name": "Platinum Enterprise",
-                    "embed_color": "#00AEEF",
-                    "footer_text": "Platinum Enterprise v6.5",
-                    "status_text": "E-Sports Tournament Ops",
-                    "status_type": "competing"
-                },
-                "app_config": {},
-                "ticket_panels": {},
-                "ticket_customization": {
-                    "claim_button_emoji": "🙋‍♂️",
-                    "claim_button_text": "Claim Ticket",
-                    "close_button_emoji": "🔒",
-                    "close_button_text": "Close Ticket",
-                    "welcome_message": "Welcome {user}! A staff member will assist you shortly.",
-                    "claim_message": "✅ {staff} is now handling this ticket.",
-                    "close_confirmation": "⚠️ This will permanently delete the channel. Are you sure?"
-                },
-                "modal_customization": {
-                    "staff_app_questions": [
-                        {"label": "Why do you want to join?", "required": True},
-                        {"label": "Previous experience?", "required": True},
-                        {"label": "Age?", "required": True}
-                    ]
-                },
-                "logs_channel": None,
-                "audit_log_channel": None,
-                "transcript_channel": None,
-                "blacklist": [],
-                "staff_stats": {},
-                "system_stats": {
-                    "total_apps": 0,
-                    "total_tickets": 0,
-                    "transcripts_sent": 0,
-                    "version": "6.5",
-                    "maintenance_mode": False,
-                    "last_reboot": str(datetime.date.today())
-                },
-                "xp_system": {
-                    "user_xp": {},
-                    "xp_per_message": 5,
-                    "xp_per_reaction": 2,
-                    "xp_per_min_vc": 10,
-                    "level_roles": {"10": None, "25": None, "50": None, "100": None}
-                },
-                "ticket_reopen": {
-                    "enabled": True,
-                    "grace_period_minutes": 10,
-                    "reopenable_channels": {}
-                },
-                "cooldowns": {},
-                "guild_blacklist": {},
-                "moderation": {},
-                "xp": {},
-                "staff_recruitment": {},
-                "permissions_tiers": {
-                    "system_admins": [],
-                    "senior_mods": [],
-                    "regular_mods": [],
-                    "trial_mods": [],
-                    "app_reviewers": [],
-                    "tournament_managers": []
-                },
-                "xp_engine": {
-                    "global_enabled": True,
-                    "level_up_messages": True,
-                    "min_gain": 15,
-                    "max_gain": 30,
-                    "cooldown_seconds": 60,
-                    "user_data": {}
-                },
-                "recruitment_system": {
-                    "pending_channel": None,
-                    "accepted_channel": None,
-                    "denied_channel": None,
-                    "referral_channel": None,
-                    "stats": {"total_apps": 0, "total_accepted": 0, "total_denied": 0}
-                },
-                "ticket_system": {
-                    "panels": {},
-                    "active_tickets": {},
-                    "transcript_history": []
-                },
-                "tournaments": {
-                    "active_tournaments": {},
-                    "registration_open": False,
-                    "allowed_roles": [],
-                    "banned_roles": [],
-                    "registered_teams": [],
-                    "max_team_size": 5,
-                    "min_team_size": 1
-                },
-                "security_settings": {
-                    "anti_spam_enabled": True,
-                    "anti_raid_enabled": True,
-                    "max_mentions": 5,
-                    "max_messages_per_10s": 5,
-                    "join_threshold_per_minute": 10,
-                    "spam_mute_duration": 300,
-                    "auto_ban_raiders": False
-                },
-                "channels": {
-                    "transcripts": None,
-                    "mod_logs": None,
-                    "join_logs": None
-                },
-                "auto_mod": {
-                    "delete_invite_links": False,
-                    "delete_bad_words": False,
-                    "bad_words_list": [],
-                    "whitelist_channels": []
-                }
+    def default_schema() -> dict:
+        """Schema for a brand new database."""
+        return {
+            "branding": {
+                "bot_name": "Platinum Enterprise",
+                "embed_color": "#00AEEF",
+                "footer_text": "Platinum Enterprise v6.5",
+                "status_text": "E-Sports Tournament Ops",
+                "status_type": "competing"
+            },
+            "app_config": {},
+            "ticket_panels": {},
+            "ticket_customization": {
+                "claim_button_emoji": "🙋‍♂️",
+                "claim_button_text": "Claim Ticket",
+                "close_button_emoji": "🔒",
+                "close_button_text": "Close Ticket",
+                "welcome_message": "Welcome {user}! A staff member will assist you shortly.",
+                "claim_message": "✅ {staff} is now handling this ticket.",
+                "close_confirmation": "⚠️ This will close the ticket. The owner can reopen it from the panel during the reopen grace period, after which the channel is deleted. Are you sure?"
+            },
+            "modal_customization": {
+                "staff_app_questions": [
+                    {"label": "Why do you want to join?", "required": True},
+                    {"label": "Previous experience?", "required": True},
+                    {"label": "Age?", "required": True}
+                ]
+            },
+            "logs_channel": None,
+            "audit_log_channel": None,
+            "transcript_channel": None,
+            "blacklist": [],
+            "staff_stats": {},
+            "system_stats": {
+                "total_apps": 0,
+                "total_tickets": 0,
+                "transcripts_sent": 0,
+                "version": "6.5",
+                "maintenance_mode": False,
+                "last_reboot": str(datetime.date.today())
+            },
+            "xp_system": {
+                "user_xp": {},
+                "xp_per_message": 5,
+                "xp_per_reaction": 2,
+                "xp_per_min_vc": 10,
+                "level_roles": {"10": None, "25": None, "50": None, "100": None}
+            },
+            "ticket_reopen": {
+                "enabled": True,
+                "grace_period_minutes": 10,
+                "reopenable_channels": {}
+            },
+            "cooldowns": {},
+            "guild_blacklist": {},
+            "moderation": {},
+            "xp": {},
+            "staff_recruitment": {},
+            "permissions_tiers": {
+                "system_admins": [],
+                "senior_mods": [],
+                "regular_mods": [],
+                "trial_mods": [],
+                "app_reviewers": [],
+                "tournament_managers": []
+            },
+            "permission_roles": {
+                "system_admins": [],
+                "senior_mods": [],
+                "regular_mods": [],
+                "trial_mods": [],
+                "app_reviewers": [],
+                "tournament_managers": []
+            },
+            "xp_engine": {
+                "global_enabled": True,
+                "level_up_messages": True,
+                "min_gain": 15,
+                "max_gain": 30,
+                "cooldown_seconds": 60,
+                "user_data": {}
+            },
+            "recruitment_system": {
+                "pending_channel": None,
+                "accepted_channel": None,
+                "denied_channel": None,
+                "referral_channel": None,
+                "stats": {"total_apps": 0, "total_accepted": 0, "total_denied": 0}
+            },
+            "ticket_system": {
+                "panels": {},
+                "active_tickets": {},
+                "transcript_history": []
+            },
+            "tournaments": {
+                "active_tournaments": {},
+                "registration_open": False,
+                "allowed_roles": [],
+                "banned_roles": [],
+                "registered_teams": [],
+                "max_team_size": 5,
+                "min_team_size": 1
+            },
+            "security_settings": {
+                "anti_spam_enabled": True,
+                "anti_raid_enabled": True,
+                "max_mentions": 5,
+                "max_messages_per_10s": 5,
+                "join_threshold_per_minute": 10,
+                "spam_mute_duration": 300,
+                "auto_ban_raiders": False,
+                "raid_action": "ban",
+                "raid_lockdown": False,
+                "raid_mode_minutes": 10
+            },
+            "channels": {
+                "transcripts": None,
+                "mod_logs": None,
+                "join_logs": None
+            },
+            "auto_mod": {
+                "delete_invite_links": False,
+                "delete_bad_words": False,
+                "bad_words_list": [],
+                "whitelist_channels": []
             }
-            
-            with open(DATABASE_FILENAME, "w", encoding="utf-8") as f:
-                json.dump(initial_schema, data_file, indent=4)
-                print("[SYSTEM] Database initialized successfully.")
+        }
+
+    @staticmethod
+    def _make_backend(json_filename: str, journal_filename: str, sqlite_filename: str):
+        """Builds the storage backend selected by DATABASE_BACKEND."""
+        if DATABASE_BACKEND == "sqlite":
+            return SQLiteStorageBackend(sqlite_filename)
+        if DATABASE_BACKEND == "journal":
+            return JournalStorageBackend(json_filename, journal_filename)
+        return JSONStorageBackend(json_filename)
+
+    @staticmethod
+    def _global_store() -> PlatinumDataStore:
+        if PlatinumCoreDB._store is None:
+            PlatinumCoreDB._store = PlatinumDataStore(
+                PlatinumCoreDB._make_backend(DATABASE_FILENAME, JOURNAL_FILENAME, SQLITE_FILENAME),
+                lambda: {k: v for k, v in PlatinumCoreDB.default_schema().items() if k not in GUILD_SCOPED_SECTIONS}
+            )
+        return PlatinumCoreDB._store
+
+    @staticmethod
+    def _guild_store(guild_id: int) -> PlatinumDataStore:
+        store = PlatinumCoreDB._guild_stores.get(guild_id)
+        if store is None:
+            os.makedirs(GUILD_DATA_DIRECTORY, exist_ok=True)
+            base = os.path.join(GUILD_DATA_DIRECTORY, str(guild_id))
+            store = PlatinumDataStore(
+                PlatinumCoreDB._make_backend(f"{base}.json", f"{base}.journal", f"{base}.sqlite3"),
+                lambda: PlatinumCoreDB.seed_guild_partition(guild_id)
+            )
+            PlatinumCoreDB._guild_stores[guild_id] = store
+        return store
+
+    @staticmethod
+    def _all_stores() -> List[PlatinumDataStore]:
+        stores = list(PlatinumCoreDB._guild_stores.values())
+        if PlatinumCoreDB._store is not None:
+            stores.append(PlatinumCoreDB._store)
+        return stores
 
     @staticmethod
     def load_full_database() -> dict:
-        """Loads the entire database."""
-        PlatinumCoreDB.initialize_filesystem()
-        try:
-            with open(DATABASE_FILENAME, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"[ERROR] Failed to read database: {e}")
-            return {}
+        """Returns the in-memory global database (branding, panels, bot-wide stats)."""
+        return PlatinumCoreDB._global_store().load()
 
     @staticmethod
     def save_database(data_dict: dict):
-        """Saves the database."""
-        try:
-            with open(DATABASE_FILENAME, "w", encoding="utf-8") as f:
-                json.dump(data_dict, f, indent=4)
-        except Exception as e:
-            print(f"[ERROR] Failed to save database: {e}")
+        """Replaces the in-memory global database and persists the whole document."""
+        store = PlatinumCoreDB._global_store()
+        store.data = data_dict
+        store.mark_dirty(())
+
+    @staticmethod
+    def commit(*path: str):
+        """Persists the subtree at path, e.g. commit("system_stats", "total_tickets").
+        Backends with point updates write only the affected record."""
+        PlatinumCoreDB._global_store().mark_dirty(tuple(path))
+
+    @staticmethod
+    def load_guild(guild_id: int) -> dict:
+        """Returns a guild's partition (XP, tiers, tournaments, security, tickets...), loading it on first use."""
+        return PlatinumCoreDB._guild_store(guild_id).load()
+
+    @staticmethod
+    def commit_guild(guild_id: int, *path: str):
+        """Persists the subtree at path inside a guild's partition."""
+        PlatinumCoreDB._guild_store(guild_id).mark_dirty(tuple(path))
+
+    @staticmethod
+    def seed_guild_partition(guild_id: int) -> dict:
+        """Initial contents of a new guild partition: default sections, or, for the guild the legacy
+        global document belongs to (LEGACY_GUILD_ID or a migration target), a copy of the
+        sections still held there, so existing installs keep their data."""
+        defaults = PlatinumCoreDB.default_schema()
+        if guild_id != LEGACY_GUILD_ID and guild_id not in PlatinumCoreDB._migration_targets:
+            return {key: defaults[key] for key in GUILD_SCOPED_SECTIONS}
+        
+        legacy = PlatinumCoreDB.load_full_database()
+        return {
+            key: copy.deepcopy(legacy[key]) if key in legacy else defaults[key]
+            for key in GUILD_SCOPED_SECTIONS
+        }
+
+    @staticmethod
+    def unclaimed_legacy_sections() -> List[str]:
+        """Guild-scoped sections still in the global document that no partition will be seeded
+        from, because neither LEGACY_GUILD_ID nor a migration target is configured."""
+        if LEGACY_GUILD_ID or PlatinumCoreDB._migration_targets:
+            return []
+        db = PlatinumCoreDB.load_full_database()
+        return [key for key in GUILD_SCOPED_SECTIONS if key in db]
+
+    @staticmethod
+    def warn_unclaimed_legacy_data() -> bool:
+        """Startup check: without a target, every guild starts from defaults and the legacy
+        settings, XP and tickets silently stop applying. Returns whether it warned."""
+        sections = PlatinumCoreDB.unclaimed_legacy_sections()
+        if not sections:
+            return False
+        print("!" * 50)
+        print(f"[WARNING] The global database still holds pre-partition guild data ({', '.join(sections)})")
+        print("[WARNING] No guild will inherit it: every guild starts from the defaults.")
+        print("[WARNING] Set LEGACY_GUILD_ID to the guild it belongs to, or run")
+        print("[WARNING]   python main.py migrate-guilds GUILD_ID")
+        print("!" * 50)
+        return True
+
+    @staticmethod
+    def record_flush(latency_ms: float, coalesced: int):
+        stats = PlatinumCoreDB.flush_stats
+        stats["flushes"] += 1
+        stats["last_latency_ms"] = latency_ms
+        stats["max_latency_ms"] = max(stats["max_latency_ms"], latency_ms)
+        stats["total_latency_ms"] += latency_ms
+        stats["last_coalesced"] = coalesced
+        stats["max_coalesced"] = max(stats["max_coalesced"], coalesced)
+        stats["total_coalesced"] += coalesced
+
+    @staticmethod
+    async def flush_database():
+        """Flushes pending changes of the global database and every loaded guild partition."""
+        for store in PlatinumCoreDB._all_stores():
+            await store.flush()
+
+    @staticmethod
+    async def compact_storage():
+        for store in PlatinumCoreDB._all_stores():
+            await store.compact()
+
+    @staticmethod
+    async def evict_idle_guilds(idle_seconds: float) -> List[int]:
+        """Flushes and unloads guild partitions that have not been touched for idle_seconds.
+        Returns the IDs of the guilds that were unloaded."""
+        cutoff = time.monotonic() - idle_seconds
+        evicted = []
+        for guild_id, store in list(PlatinumCoreDB._guild_stores.items()):
+            if store.last_access > cutoff:
+                continue
+            await store.flush()
+            # Skip if the flush failed or the guild was touched while flushing
+            if store.dirty_paths or store.last_access > cutoff:
+                continue
+            store.backend.close()
+            del PlatinumCoreDB._guild_stores[guild_id]
+            evicted.append(guild_id)
+        return evicted
+
+    @staticmethod
+    def reload_database() -> dict:
+        """Drops every in-memory copy (and any unflushed saves) and re-reads the global database."""
+        for store in PlatinumCoreDB._guild_stores.values():
+            store.backend.close()
+        PlatinumCoreDB._guild_stores.clear()
+        return PlatinumCoreDB._global_store().reload()
+
+    @staticmethod
+    def migrate_json_to_sqlite(json_filename: str, sqlite_filename: str):
+        """One-shot import of an existing data.json into the SQLite backend."""
+        with open(json_filename, "r", encoding="utf-8") as f:
+            data_dict = json.load(f)
+        data_dict.pop(JournalStorageBackend.GENERATION_KEY, None)
+        
+        backend = SQLiteStorageBackend(sqlite_filename)
+        backend.apply(backend.prepare(data_dict, {()}))
+        backend.close()
+        
+        user_count = len(data_dict.get("xp_engine", {}).get("user_data", {}))
+        tournament_count = len(data_dict.get("tournaments", {}).get("active_tournaments", {}))
+        print(f"[SYSTEM] Migrated {json_filename} -> {sqlite_filename} "
+              f"({user_count} XP users, {tournament_count} tournaments)")
+
+    @staticmethod
+    def migrate_legacy_guild_data(guild_ids: List[int]):
+        """Copies the legacy global sections into a partition for each guild that has none yet,
+        then removes them from the global database."""
+        PlatinumCoreDB._migration_targets.update(guild_ids)
+        for guild_id in guild_ids:
+            store = PlatinumCoreDB._guild_store(guild_id)
+            store.load()
+            store.backend.close()
+            del PlatinumCoreDB._guild_stores[guild_id]
+            print(f"[SYSTEM] Guild {guild_id} partition ready: {store.backend.filename}")
+        
+        db = PlatinumCoreDB.load_full_database()
+        for key in GUILD_SCOPED_SECTIONS:
+            db.pop(key, None)
+        
+        store = PlatinumCoreDB._global_store()
+        store.mark_dirty(())
+        if store.dirty_paths:
+            store.flush_now()
+        print(f"[SYSTEM] Removed legacy guild sections from {store.backend.filename}")
 
 # ==================================================================================================
 #  SECTION 3: ANTI-SPAM & ANTI-RAID SYSTEM
 # ==================================================================================================
 
+class SlidingWindowRateTracker:
+    """Sliding-window event counter. Each key keeps at most `capacity` of its latest event times
+    in a sorted list, trimmed to the window only when its oldest event has expired. Once per
+    window, keys with no event in the last window are swept out, so memory follows the active
+    keys rather than everyone ever seen."""
+    
+    def __init__(self, window_seconds: float):
+        self.window = window_seconds
+        self._events: Dict[Any, List[float]] = {}
+        self._next_sweep = 0.0
+    
+    def __len__(self) -> int:
+        return len(self._events)
+    
+    def hit(self, key, capacity: int, now: Optional[float] = None) -> int:
+        """Records an event and returns how many of the key's last `capacity` events fall in the window."""
+        now = time.monotonic() if now is None else now
+        if now >= self._next_sweep:
+            self._sweep(now)
+        
+        events = self._events.get(key)
+        if events is None:
+            self._events[key] = [now]
+            return 1
+        
+        events.append(now)
+        cutoff = now - self.window
+        if events[0] <= cutoff:
+            del events[:bisect.bisect_right(events, cutoff)]
+        if len(events) > capacity:
+            del events[:len(events) - max(capacity, 1)]
+        return len(events)
+    
+    def _sweep(self, now: float):
+        """Drops idle keys: one pass per window keeps the cost amortized O(1) per hit."""
+        cutoff = now - self.window
+        self._events = {key: events for key, events in self._events.items() if events[-1] > cutoff}
+        self._next_sweep = now + self.window
+    
+    def memory_footprint(self) -> int:
+        """Approximate bytes held by the tracker."""
+        total = sys.getsizeof(self._events)
+        for key, events in self._events.items():
+            # 24 bytes per float object in the list
+            total += sys.getsizeof(key) + sys.getsizeof(events) + 24 * len(events)
+        return total
+
+class _DuplicateCluster:
+    """Recent messages sharing one content fingerprint."""
+    
+    __slots__ = ("guild_id", "signatures", "texts", "last_seen", "users", "channels", "flagged", "noted")
+    
+    def __init__(self, guild_id: int, now: float):
+        self.guild_id = guild_id
+        self.signatures = []
+        self.texts = []
+        self.last_seen = now
+        self.users = set()
+        self.channels = set()
+        self.flagged = False
+        self.noted = False
+
+class DuplicateMessageIndex:
+    """Time-windowed index of message fingerprints for spotting the same text pasted across
+    accounts or channels. Identical normalized text is matched through a plain hash lookup;
+    anything else gets a 64-bit SimHash over character 4-grams. Variants within MAX_DISTANCE
+    bits are found through four 16-bit bands, so a lookup only touches four buckets. Each
+    cluster indexes up to MAX_VARIANTS of its members, so slowly mutating spam keeps matching.
+    Clusters expire after the window and the total is capped."""
+    
+    BANDS = 4
+    MAX_DISTANCE = 6
+    MAX_VARIANTS = 8
+    MIN_LENGTH = 16
+    SHINGLE = 4
+    MAX_FEATURES = 128
+    # _SPREAD[i][byte] places bit b of hash byte i in its own 8-bit counter lane (bit 8*i+b)
+    _SPREAD = [[sum(1 << ((8 * i + bit) * 8) for bit in range(8) if byte >> bit & 1) for byte in range(256)]
+               for i in range(8)]
+    
+    def __init__(self, window_seconds: float, capacity: int):
+        self.window = window_seconds
+        self.capacity = capacity
+        self._clusters: "OrderedDict[int, _DuplicateCluster]" = OrderedDict()
+        self._exact: Dict[tuple, int] = {}
+        self._bands: Dict[tuple, set] = {}
+        self._next_id = 0
+    
+    def __len__(self) -> int:
+        return len(self._clusters)
+    
+    @staticmethod
+    def simhash(text: str) -> int:
+        """64-bit SimHash of text over character shingles."""
+        n = DuplicateMessageIndex.SHINGLE
+        features = [text[i:i + n] for i in range(min(len(text) - n + 1, DuplicateMessageIndex.MAX_FEATURES))]
+        
+        # Bit-sliced counting: all 64 per-bit counters live in one big int, so each feature
+        # costs eight table lookups and additions instead of 64 bit tests.
+        spread = DuplicateMessageIndex._SPREAD
+        lanes = 0
+        for feature in features:
+            for i, byte in enumerate(hash(feature).to_bytes(8, "little", signed=True)):
+                lanes += spread[i][byte]
+        
+        half = len(features) // 2
+        result = 0
+        for bit in range(64):
+            if (lanes >> (bit * 8)) & 0xFF > half:
+                result |= 1 << bit
+        return result
+    
+    def observe(self, guild_id: int, user_id: int, channel_id: int, text: str,
+                now: Optional[float] = None) -> Optional[_DuplicateCluster]:
+        """Adds a message and returns its cluster, or None if the text is too short to track."""
+        if len(text) < self.MIN_LENGTH:
+            return None
+        now = time.monotonic() if now is None else now
+        self._expire(now)
+        
+        exact_key = (guild_id, hash(text))
+        cluster_id = self._exact.get(exact_key)
+        if cluster_id is None:
+            fingerprint = DuplicateMessageIndex.simhash(text)
+            cluster_id = self._find(guild_id, fingerprint)
+            if cluster_id is None:
+                cluster_id = self._next_id
+                self._next_id += 1
+                self._clusters[cluster_id] = _DuplicateCluster(guild_id, now)
+            self._add_variant(cluster_id, exact_key, fingerprint)
+        
+        cluster = self._clusters[cluster_id]
+        self._clusters.move_to_end(cluster_id)
+        cluster.last_seen = now
+        # Past the thresholds the exact size no longer matters, so the sets stay small
+        if len(cluster.users) <= 4 * DUPLICATE_ACCOUNT_THRESHOLD:
+            cluster.users.add(user_id)
+        if len(cluster.channels) <= 4 * DUPLICATE_CHANNEL_THRESHOLD:
+            cluster.channels.add(channel_id)
+        return cluster
+    
+    def _band_keys(self, guild_id: int, fingerprint: int) -> list:
+        return [(guild_id, i, (fingerprint >> (i * 16)) & 0xFFFF) for i in range(self.BANDS)]
+    
+    def _find(self, guild_id: int, fingerprint: int) -> Optional[int]:
+        for key in self._band_keys(guild_id, fingerprint):
+            for cluster_id in self._bands.get(key, ()):
+                for signature in self._clusters[cluster_id].signatures:
+                    if bin(signature ^ fingerprint).count("1") <= self.MAX_DISTANCE:
+                        return cluster_id
+        return None
+    
+    def _add_variant(self, cluster_id: int, exact_key: tuple, fingerprint: int):
+        cluster = self._clusters[cluster_id]
+        if len(cluster.texts) >= self.MAX_VARIANTS:
+            return
+        cluster.texts.append(exact_key)
+        self._exact[exact_key] = cluster_id
+        if fingerprint not in cluster.signatures:
+            cluster.signatures.append(fingerprint)
+            for key in self._band_keys(cluster.guild_id, fingerprint):
+                self._bands.setdefault(key, set()).add(cluster_id)
+    
+    def _expire(self, now: float):
+        cutoff = now - self.window
+        while self._clusters:
+            cluster_id, cluster = next(iter(self._clusters.items()))
+            if cluster.last_seen > cutoff and len(self._clusters) < self.capacity:
+                break
+            del self._clusters[cluster_id]
+            for exact_key in cluster.texts:
+                self._exact.pop(exact_key, None)
+            for fingerprint in cluster.signatures:
+                for key in self._band_keys(cluster.guild_id, fingerprint):
+                    bucket = self._bands.get(key)
+                    if bucket is not None:
+                        bucket.discard(cluster_id)
+                        if not bucket:
+                            del self._bands[key]
+
 class SecurityEngine:
     """Handles anti-spam and anti-raid detection."""
     
+    # Messages per (guild, user) over 10s and joins per guild over 60s
+    spam_tracker = SlidingWindowRateTracker(10)
+    raid_tracker = SlidingWindowRateTracker(60)
+    duplicate_index = DuplicateMessageIndex(DUPLICATE_WINDOW_SECONDS, DUPLICATE_INDEX_CAPACITY)
+    
     @staticmethod
     async def check_spam(message: discord.Message) -> bool:
         """Detects message spam."""
-        db = PlatinumCoreDB.load_full_database()
+        db = PlatinumCoreDB.load_guild(message.guild.id)
         if not db["security_settings"]["anti_spam_enabled"]:
             return False
         
-        user_id = message.author.id
-        current_time = time.time()
-        
-        # Track messages
-        spam_tracker[user_id].append(current_time)
-        spam_tracker[user_id] = [t for t in spam_tracker[user_id] if current_time - t < 10]
-        
         max_msgs = db["security_settings"]["max_messages_per_10s"]
+        recent = SecurityEngine.spam_tracker.hit((message.guild.id, message.author.id), max_msgs + 1)
         
-        if len(spam_tracker[user_id]) > max_msgs:
+        if recent > max_msgs:
             # Spam detected
             try:
                 mute_duration = db["security_settings"]["spam_mute_duration"]
@@ -237,109 +1170,1491 @@ class SecurityEngine:
         
         return False
     
+    @staticmethod
+    async def check_duplicates(message: discord.Message) -> bool:
+        """Detects the same text posted by several accounts or across several channels."""
+        db = PlatinumCoreDB.load_guild(message.guild.id)
+        if not db["security_settings"]["anti_spam_enabled"] or message.author.guild_permissions.manage_messages:
+            return False
+        
+        text = " ".join(AutoModEngine.normalize(message.content).split())
+        cluster = SecurityEngine.duplicate_index.observe(message.guild.id, message.author.id, message.channel.id, text)
+        if cluster is None:
+            return False
+        many_accounts = len(cluster.users) >= DUPLICATE_ACCOUNT_THRESHOLD
+        many_channels = len(cluster.channels) >= DUPLICATE_CHANNEL_THRESHOLD
+        if not many_accounts and not many_channels:
+            return False
+        
+        # Greetings and memes get repeated by regulars too, so one signal alone only earns a note
+        if not (many_accounts and many_channels) and not SecurityEngine.is_new_member(message.author):
+            if not cluster.noted:
+                cluster.noted = True
+                await SecurityEngine.log_action(message.guild, "DUPLICATE_SPAM",
+                    f"ℹ️ Same message posted by {len(cluster.users)} account(s) in {len(cluster.channels)} channel(s) "
+                    f"within {int(DUPLICATE_WINDOW_SECONDS)}s, by established members. No action taken.\n> {message.content[:200]}")
+            return False
+        
+        try:
+            await message.delete()
+            await message.author.timeout(datetime.timedelta(seconds=db["security_settings"]["spam_mute_duration"]),
+                                         reason="Auto-moderation: Duplicate message spam")
+        except:
+            pass
+        
+        # One log entry per wave rather than one per copy
+        if not cluster.flagged:
+            cluster.flagged = True
+            await SecurityEngine.log_action(message.guild, "DUPLICATE_SPAM",
+                f"Same message posted by {len(cluster.users)} account(s) in {len(cluster.channels)} channel(s) "
+                f"within {int(DUPLICATE_WINDOW_SECONDS)}s. Copies are being removed.\n> {message.content[:200]}")
+        return True
+    
+    @staticmethod
+    def is_new_member(member: discord.Member) -> bool:
+        """True if the account was created or joined the guild in the last DUPLICATE_NEW_MEMBER_HOURS."""
+        cutoff = discord.utils.utcnow() - datetime.timedelta(hours=DUPLICATE_NEW_MEMBER_HOURS)
+        return member.created_at > cutoff or (member.joined_at is not None and member.joined_at > cutoff)
+    
     @staticmethod
     async def check_raid(member: discord.Member):
         """Detects potential raids."""
-        db = PlatinumCoreDB.load_full_database()
+        db = PlatinumCoreDB.load_guild(member.guild.id)
         if not db["security_settings"]["anti_raid_enabled"]:
             return
         
-        guild_id = member.guild.id
-        current_time = time.time()
+        settings = db["security_settings"]
+        threshold = settings["join_threshold_per_minute"]
+        recent_joins = SecurityEngine.raid_tracker.hit(member.guild.id, max(threshold + 1, RAID_TRACKER_CAPACITY))
         
-        raid_tracker[guild_id].append(current_time)
-        raid_tracker[guild_id] = [t for t in raid_tracker[guild_id] if current_time - t < 60]
+        # Only members in a flagged join cluster are treated as raiders; a plain influx is just reported
+        flagged = JoinPatternScorer.observe(
+            member.guild.id, member.id, member.created_at.timestamp(), member.avatar is None, member.name,
+            JoinPatternScorer.invite_code(member.guild.id)
+        )
+        suspects, first = flagged or (None, False)
         
-        threshold = db["security_settings"]["join_threshold_per_minute"]
+        if RaidResponder.is_active(member.guild.id):
+            if suspects:
+                RaidResponder.add(member.guild.id, suspects, settings.get("raid_mode_minutes", 10))
+            return
         
-        if len(raid_tracker[guild_id]) > threshold:
-            # Raid detected
+        if suspects:
+            # Later joins into the same cluster are not re-announced until the window has passed
+            if first:
+                await SecurityEngine.log_action(member.guild, "RAID_DETECTION",
+                    f"⚠️ **RAID ALERT:** {len(suspects)} joins share an account-age/name/invite pattern "
+                    f"({recent_joins} joins in the last minute)!")
+            if settings["auto_ban_raiders"]:
+                RaidResponder.start(member.guild, suspects, settings)
+        elif recent_joins == threshold + 1:
             await SecurityEngine.log_action(member.guild, "RAID_DETECTION",
-                f"⚠️ **RAID ALERT:** {len(raid_tracker[guild_id])} joins in the last minute!")
+                f"ℹ️ {recent_joins} joins in the last minute, but no suspicious pattern. No action taken.")
+    
+    @staticmethod
+    async def set_send_permission(channel: discord.TextChannel, allowed: Optional[bool]):
+        """Sets @everyone's send_messages overwrite in a channel (None inherits)."""
+        overwrites = channel.overwrites_for(channel.guild.default_role)
+        overwrites.send_messages = allowed
+        await channel.set_permissions(channel.guild.default_role, overwrite=overwrites)
+    
+    @staticmethod
+    async def log_action(guild: discord.Guild, action_type: str, description: str, route: str = "audit"):
+        """Queues a log entry for the guild's audit (or mod/join) log channel."""
+        AuditLogQueue.enqueue(guild, action_type, description, route)
+
+class _PendingLogs:
+    __slots__ = ("guild", "events", "flushing", "failures", "retry_at")
+    
+    def __init__(self, guild: discord.Guild):
+        self.guild = guild
+        self.events = deque()
+        self.flushing = False
+        self.failures = 0
+        self.retry_at = 0.0
+
+class AuditLogQueue:
+    """Buffers log entries per destination channel and sends them in batches: up to 10 embeds
+    per message, with runs of the same action type merged into summary embeds. A channel is
+    flushed every AUDIT_LOG_FLUSH_SECONDS, or as soon as it has a full message's worth.
+    Transient send failures go back to the front of the queue and the channel backs off
+    exponentially; entries for a channel the bot can no longer post in (deleted, 403/404) are
+    dropped as undeliverable, and a channel's backlog is capped at AUDIT_LOG_MAX_BACKLOG."""
+    
+    MAX_EMBEDS = 10
+    MAX_MESSAGE_CHARS = 6000
+    MAX_DESCRIPTION = 4000
+    SUMMARIZE_AFTER = 3  # more events of one type than this in a batch become a summary
+    
+    # (guild_id, channel_id) -> pending entries
+    _pending: Dict[tuple, _PendingLogs] = {}
+    # Early flushes started by enqueue; the loop only keeps weak references to tasks
+    _tasks: set = set()
+    stats = {"queued": 0, "sent": 0, "messages": 0, "failed_sends": 0, "undeliverable": 0, "dropped": 0, "max_backlog": 0}
+    
+    @staticmethod
+    def resolve_channel(db: dict, route: str) -> Optional[int]:
+        """Channel ID for a route: audit, mod (falls back to audit) or join."""
+        channels = db.get("channels", {})
+        if route == "mod":
+            return channels.get("mod_logs") or db.get("audit_log_channel")
+        if route == "join":
+            return channels.get("join_logs")
+        return db.get("audit_log_channel")
+    
+    @staticmethod
+    def enqueue(guild: discord.Guild, action_type: str, description: str, route: str = "audit"):
+        channel_id = AuditLogQueue.resolve_channel(PlatinumCoreDB.load_guild(guild.id), route)
+        if not channel_id:
+            return
+        
+        key = (guild.id, int(channel_id))
+        pending = AuditLogQueue._pending.get(key)
+        if pending is None:
+            pending = AuditLogQueue._pending[key] = _PendingLogs(guild)
+        pending.events.append((action_type, description, datetime.datetime.now(), time.monotonic()))
+        
+        stats = AuditLogQueue.stats
+        stats["queued"] += 1
+        AuditLogQueue._trim(pending)
+        stats["max_backlog"] = max(stats["max_backlog"], len(pending.events))
+        if (len(pending.events) >= AuditLogQueue.MAX_EMBEDS and not pending.flushing
+                and time.monotonic() >= pending.retry_at):
+            task = asyncio.create_task(AuditLogQueue._flush_channel(key))
+            AuditLogQueue._tasks.add(task)
+            task.add_done_callback(AuditLogQueue._tasks.discard)
+    
+    @staticmethod
+    def _trim(pending: _PendingLogs):
+        """Drops the oldest entries past AUDIT_LOG_MAX_BACKLOG (a channel that keeps failing)."""
+        excess = len(pending.events) - AUDIT_LOG_MAX_BACKLOG
+        for _ in range(max(excess, 0)):
+            pending.events.popleft()
+        if excess > 0:
+            AuditLogQueue.stats["dropped"] += excess
+    
+    @staticmethod
+    def backlog() -> tuple:
+        """(entries waiting, age in seconds of the oldest one)."""
+        waiting = sum(len(p.events) for p in AuditLogQueue._pending.values())
+        oldest = min((p.events[0][3] for p in AuditLogQueue._pending.values() if p.events), default=None)
+        return waiting, (time.monotonic() - oldest) if oldest is not None else 0.0
+    
+    @staticmethod
+    def _build_embeds(events: list) -> List[tuple]:
+        """Returns (embed, events it covers) pairs; large same-type runs are merged into summaries."""
+        groups: Dict[str, list] = {}
+        for event in events:
+            groups.setdefault(event[0], []).append(event)
+        
+        embeds = []
+        for action_type, group in groups.items():
+            if len(group) <= AuditLogQueue.SUMMARIZE_AFTER:
+                for event in group:
+                    embeds.append((discord.Embed(
+                        title=f"🛡️ Security Log: {action_type}",
+                        description=event[1][:AuditLogQueue.MAX_DESCRIPTION],
+                        color=COLOR_PLATINUM_WARNING,
+                        timestamp=event[2]
+                    ), [event]))
+                continue
+            
+            # One line per event, split across as many summary embeds as the length needs
+            chunks, lines, covered, size = [], [], [], 0
+            for event in group:
+                line = f"<t:{int(event[2].timestamp())}:T> " + " · ".join(event[1].splitlines())
+                line = line[:AuditLogQueue.MAX_DESCRIPTION]
+                if lines and size + len(line) + 1 > AuditLogQueue.MAX_DESCRIPTION:
+                    chunks.append((lines, covered))
+                    lines, covered, size = [], [], 0
+                lines.append(line)
+                covered.append(event)
+                size += len(line) + 1
+            chunks.append((lines, covered))
             
-            if db["security_settings"]["auto_ban_raiders"]:
+            for lines, covered in chunks:
+                embeds.append((discord.Embed(
+                    title=f"🛡️ Security Log: {action_type} ×{len(lines)}",
+                    description="\n".join(lines),
+                    color=COLOR_PLATINUM_WARNING,
+                    timestamp=covered[-1][2]
+                ), covered))
+        return embeds
+    
+    @staticmethod
+    def _pack(embeds: List[tuple]) -> List[tuple]:
+        """Groups embeds into messages within Discord's 10-embed / 6000-character limits.
+        Returns (embeds, events covered) per message."""
+        messages, current, covered, chars = [], [], [], 0
+        for embed, events in embeds:
+            size = len(embed.title or "") + len(embed.description or "")
+            if current and (len(current) >= AuditLogQueue.MAX_EMBEDS or chars + size > AuditLogQueue.MAX_MESSAGE_CHARS):
+                messages.append((current, covered))
+                current, covered, chars = [], [], 0
+            current.append(embed)
+            covered.extend(events)
+            chars += size
+        if current:
+            messages.append((current, covered))
+        return messages
+    
+    @staticmethod
+    async def _flush_channel(key: tuple, force: bool = False):
+        pending = AuditLogQueue._pending.get(key)
+        if pending is None or pending.flushing or not pending.events:
+            return
+        if not force and time.monotonic() < pending.retry_at:
+            return
+        pending.flushing = True
+        try:
+            channel = pending.guild.get_channel(key[1])
+            if channel is None:
+                # The log channel was deleted; there is nowhere left to deliver these
+                AuditLogQueue.stats["undeliverable"] += len(pending.events)
+                pending.events.clear()
+                return
+            
+            while pending.events:
+                batch = list(pending.events)
+                pending.events.clear()
+                messages = AuditLogQueue._pack(AuditLogQueue._build_embeds(batch))
+                for i, (embeds, covered) in enumerate(messages):
+                    try:
+                        await channel.send(embeds=embeds)
+                    except Exception as e:
+                        unsent = sorted((event for _, rest in messages[i:] for event in rest), key=lambda ev: ev[3])
+                        AuditLogQueue.stats["failed_sends"] += 1
+                        if isinstance(e, (discord.Forbidden, discord.NotFound)):
+                            # No permission in (or no longer a) log channel: retrying cannot help
+                            AuditLogQueue.stats["undeliverable"] += len(unsent) + len(pending.events)
+                            pending.events.clear()
+                            print(f"[LOGS] Cannot post in {key[1]}, dropped {len(unsent)} entries: {e}")
+                            return
+                        
+                        pending.failures += 1
+                        backoff = min(AUDIT_LOG_MAX_BACKOFF, AUDIT_LOG_FLUSH_SECONDS * 2 ** pending.failures)
+                        pending.retry_at = time.monotonic() + backoff
+                        pending.events.extendleft(reversed(unsent))
+                        AuditLogQueue._trim(pending)
+                        print(f"[LOGS] Send to {key[1]} failed, {len(unsent)} entries requeued, retrying in {backoff:.0f}s: {e}")
+                        return
+                    pending.failures = 0
+                    pending.retry_at = 0.0
+                    AuditLogQueue.stats["messages"] += 1
+                    AuditLogQueue.stats["sent"] += len(covered)
+        finally:
+            pending.flushing = False
+            if not pending.events:
+                AuditLogQueue._pending.pop(key, None)
+    
+    @staticmethod
+    async def flush(force: bool = False):
+        """Sends everything queued; channels are flushed concurrently. Channels backing off after a
+        failure are skipped unless force is set (shutdown)."""
+        await asyncio.gather(*(AuditLogQueue._flush_channel(key, force) for key in list(AuditLogQueue._pending)))
+
+class _AutoModRules:
+    """One guild's compiled auto-mod config."""
+    
+    __slots__ = ("config", "bad_words", "whitelist", "delete_invites", "delete_bad_words")
+    
+    def __init__(self, config: dict):
+        self.config = config
+        self.bad_words = AutoModEngine.compile_terms(config.get("bad_words_list", []))
+        self.whitelist = frozenset(int(c) for c in config.get("whitelist_channels", []))
+        self.delete_invites = config.get("delete_invite_links", False)
+        self.delete_bad_words = config.get("delete_bad_words", False)
+
+class AutoModEngine:
+    """Enforces the auto_mod section: bad words, invite links and mention spam. The word list
+    is compiled once per guild into a single trie-shaped regex and reused until the config changes."""
+    
+    # Leetspeak, applied only to words that also contain letters so plain numbers stay numbers
+    LEETSPEAK = str.maketrans({
+        "0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "7": "t", "8": "b", "9": "g",
+        "@": "a", "$": "s",
+    })
+    LEET_TOKEN = re.compile(r"\S*[0-9@$]\S*")
+    # Common Cyrillic/Greek look-alikes, applied after NFKD folding
+    CONFUSABLES = str.maketrans({
+        "а": "a", "в": "b", "е": "e", "к": "k", "м": "m", "н": "h", "о": "o", "р": "p",
+        "с": "c", "т": "t", "у": "y", "х": "x", "і": "i", "ј": "j", "ѕ": "s",
+        "α": "a", "β": "b", "ε": "e", "ι": "i", "κ": "k", "ν": "v", "ο": "o", "ρ": "p",
+        "τ": "t", "υ": "u", "χ": "x",
+    })
+    INVITE_PATTERN = re.compile(r"(?:discord(?:app)?\.com/invite|discord\.gg|dsc\.gg)/[\w-]+", re.IGNORECASE)
+    
+    _rules: Dict[int, _AutoModRules] = {}
+    
+    @staticmethod
+    def _fold_leet(match: re.Match) -> str:
+        token = match.group()
+        if any(ch.isalpha() for ch in token):
+            return token.translate(AutoModEngine.LEETSPEAK)
+        return token
+    
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Folds case, accents, confusable letters and leetspeak (in words with letters, so "b4d"
+        becomes "bad" but "455" stays a number) to plain ASCII-ish text."""
+        text = unicodedata.normalize("NFKD", text.casefold())
+        text = "".join(ch for ch in text if not unicodedata.combining(ch))
+        text = text.translate(AutoModEngine.CONFUSABLES)
+        return AutoModEngine.LEET_TOKEN.sub(AutoModEngine._fold_leet, text)
+    
+    @staticmethod
+    def _trie_pattern(node: dict) -> str:
+        end = "" in node
+        branches = [re.escape(ch) + AutoModEngine._trie_pattern(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if end:
+            body = "(?:" + body + ")?"
+        return body
+    
+    @staticmethod
+    def compile_terms(terms: List[str]) -> Optional[re.Pattern]:
+        """Builds one regex matching any whole term. Terms are merged into a prefix trie, so
+        the engine walks shared prefixes once instead of trying every alternative."""
+        trie: dict = {}
+        for term in terms:
+            term = AutoModEngine.normalize(term).strip()
+            if not term:
+                continue
+            node = trie
+            for ch in term:
+                node = node.setdefault(ch, {})
+            node[""] = {}
+        if not trie:
+            return None
+        return re.compile(r"(?<!\w)" + AutoModEngine._trie_pattern(trie) + r"(?!\w)")
+    
+    @staticmethod
+    def get_rules(guild_id: int) -> _AutoModRules:
+        """Compiled rules for a guild, rebuilt when the auto_mod section was replaced or invalidated."""
+        config = PlatinumCoreDB.load_guild(guild_id)["auto_mod"]
+        rules = AutoModEngine._rules.get(guild_id)
+        if rules is None or rules.config is not config:
+            rules = _AutoModRules(config)
+            AutoModEngine._rules[guild_id] = rules
+        return rules
+    
+    @staticmethod
+    def invalidate(guild_id: Optional[int] = None):
+        """Forgets compiled rules after a config edit (all guilds when guild_id is None)."""
+        if guild_id is None:
+            AutoModEngine._rules.clear()
+        else:
+            AutoModEngine._rules.pop(guild_id, None)
+    
+    @staticmethod
+    def find_violation(rules: _AutoModRules, content: str, mention_count: int, max_mentions: int) -> Optional[str]:
+        """Returns the reason a message breaks the rules, or None."""
+        if max_mentions and mention_count > max_mentions:
+            return f"mass mentions ({mention_count})"
+        if rules.delete_invites and AutoModEngine.INVITE_PATTERN.search(content):
+            return "invite link"
+        if rules.delete_bad_words and rules.bad_words is not None:
+            if rules.bad_words.search(AutoModEngine.normalize(content)):
+                return "blocked word"
+        return None
+    
+    @staticmethod
+    async def check_message(message: discord.Message) -> bool:
+        """Deletes a rule-breaking message. Returns True if it was removed."""
+        if message.author.guild_permissions.manage_messages:
+            return False
+        
+        rules = AutoModEngine.get_rules(message.guild.id)
+        if message.channel.id in rules.whitelist:
+            return False
+        
+        max_mentions = PlatinumCoreDB.load_guild(message.guild.id)["security_settings"].get("max_mentions", 0)
+        mention_count = len(message.raw_mentions) + len(message.raw_role_mentions)
+        reason = AutoModEngine.find_violation(rules, message.content, mention_count, max_mentions)
+        if reason is None:
+            return False
+        
+        try:
+            await message.delete()
+            await message.channel.send(f"⚠️ {message.author.mention}, your message was removed ({reason}).", delete_after=5)
+            await SecurityEngine.log_action(message.guild, "AUTO_MOD",
+                f"Removed message from {message.author} ({message.author.id}) in {message.channel.mention}: {reason}")
+        except:
+            pass
+        return True
+
+class RateLimitedError(Exception):
+    """A moderation call was rejected with 429; retry_after is in seconds."""
+    
+    def __init__(self, retry_after: float):
+        super().__init__(f"rate limited, retry after {retry_after:.2f}s")
+        self.retry_after = retry_after
+
+class _TokenBucket:
+    """Paces calls on one route to `rate` per second, and pauses the route when it gets a 429."""
+    
+    __slots__ = ("rate", "burst", "tokens", "updated", "blocked_until")
+    
+    def __init__(self, rate: float, now: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst or rate
+        self.tokens = self.burst
+        self.updated = now
+        self.blocked_until = 0.0
+    
+    def delay(self, now: float) -> float:
+        """Returns how long until a token is free (0 if one is free now)."""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        # The tolerance keeps float refill error from turning into a string of tiny sleeps
+        wait = 0.0 if self.tokens > 1 - 1e-9 else (1 - self.tokens) / self.rate
+        return max(wait, self.blocked_until - now)
+
+class MassActionExecutor:
+    """Runs many moderation calls with bounded concurrency. Each route (ban, kick, channel edit...)
+    has its own token bucket and all calls share a global one, kept under Discord's 50 req/s.
+    A 429 pauses the whole route for retry_after before the call is retried."""
+    
+    MAX_RETRIES = 3
+    # Discord's global limit per second; any one-second window sees at most burst + rate calls
+    GLOBAL_LIMIT = 50
+    
+    def __init__(self, concurrency: int = MASS_ACTION_CONCURRENCY, route_rate: float = MASS_ACTION_ROUTE_RATE,
+                 global_rate: float = MASS_ACTION_GLOBAL_RATE, sleep=asyncio.sleep, clock=time.monotonic):
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._route_rate = route_rate
+        self._sleep = sleep
+        self._clock = clock
+        self._global = _TokenBucket(global_rate, clock(), max(1.0, self.GLOBAL_LIMIT - global_rate))
+        self._routes: Dict[str, _TokenBucket] = {}
+        self.stats = {"done": 0, "failed": 0, "retried": 0}
+    
+    async def _call(self, route: str, call) -> bool:
+        bucket = self._routes.get(route)
+        if bucket is None:
+            bucket = self._routes[route] = _TokenBucket(self._route_rate, self._clock())
+        
+        async with self._semaphore:
+            for _ in range(self.MAX_RETRIES + 1):
+                # Tokens are only taken once both buckets have one, so a call never holds a
+                # global slot while it waits on its route
+                while True:
+                    now = self._clock()
+                    wait = max(bucket.delay(now), self._global.delay(now))
+                    if wait <= 0:
+                        break
+                    await self._sleep(wait)
+                bucket.tokens -= 1
+                self._global.tokens -= 1
                 try:
-                    await member.ban(reason="Auto-moderation: Raid detected")
-                except:
-                    pass
+                    await call()
+                    self.stats["done"] += 1
+                    return True
+                except RateLimitedError as e:
+                    self.stats["retried"] += 1
+                    bucket.blocked_until = self._clock() + e.retry_after
+                except Exception as e:
+                    print(f"[RAID] {route} failed: {e}")
+                    break
+        self.stats["failed"] += 1
+        return False
+    
+    async def run(self, jobs: List[tuple]) -> List[bool]:
+        """Runs (route, coroutine function) jobs and returns whether each succeeded."""
+        return await asyncio.gather(*(self._call(route, call) for route, call in jobs))
+
+class RaidActionClient:
+    """The moderation calls raid mode makes, on top of discord.py. Swappable for a fake in tests."""
+    
+    BULK_BAN_LIMIT = 200
+    
+    def __init__(self, guild: discord.Guild):
+        self.guild = guild
     
     @staticmethod
-    async def log_action(guild: discord.Guild, action_type: str, description: str):
-        """Logs security actions to audit log."""
-        db = PlatinumCoreDB.load_full_database()
-        audit_channel_id = db.get("audit_log_channel")
+    async def _checked(coro):
+        try:
+            return await coro
+        except discord.RateLimited as e:
+            raise RateLimitedError(e.retry_after)
+        except discord.HTTPException as e:
+            if e.status == 429:
+                raise RateLimitedError(1.0)
+            raise
+    
+    async def ban_many(self, user_ids: List[int], reason: str):
+        users = [discord.Object(id=user_id) for user_id in user_ids]
+        if hasattr(self.guild, "bulk_ban"):
+            await self._checked(self.guild.bulk_ban(users, reason=reason))
+        else:
+            for user in users:
+                await self._checked(self.guild.ban(user, reason=reason))
+    
+    async def kick(self, user_id: int, reason: str):
+        await self._checked(self.guild.kick(discord.Object(id=user_id), reason=reason))
+    
+    async def timeout(self, user_id: int, seconds: int, reason: str):
+        member = self.guild.get_member(user_id)
+        if member is not None:
+            await self._checked(member.timeout(datetime.timedelta(seconds=seconds), reason=reason))
+    
+    async def set_send_permission(self, channel: discord.TextChannel, allowed: Optional[bool]):
+        await self._checked(SecurityEngine.set_send_permission(channel, allowed))
+
+class _RaidState:
+    __slots__ = ("until", "action", "executor", "pending", "seen", "locked", "started", "task")
+    
+    def __init__(self, action: str, until: float):
+        self.action = action
+        self.until = until
+        self.executor = MassActionExecutor()
+        self.pending: List[int] = []
+        self.seen = set()
+        self.locked = []
+        self.started = time.monotonic()
+        self.task = None
+
+class RaidResponder:
+    """Raid mode. Once the join threshold is crossed, everyone who joined in the detection
+    window and everyone joining while the raid lasts is banned, kicked or timed out through a
+    MassActionExecutor. Bans go out in bulk requests. Channels can be locked for the duration.
+    A single summary is logged when raid mode ends."""
+    
+    BATCH_SECONDS = 1.0
+    
+    _raids: Dict[int, _RaidState] = {}
+    client_factory = RaidActionClient
+    
+    @staticmethod
+    def is_active(guild_id: int) -> bool:
+        return guild_id in RaidResponder._raids
+    
+    @staticmethod
+    def start(guild: discord.Guild, member_ids: List[int], settings: dict):
+        """Enters raid mode and queues the members already in the window."""
+        minutes = settings.get("raid_mode_minutes", 10)
+        state = _RaidState(settings.get("raid_action", "ban"), time.monotonic() + minutes * 60)
+        RaidResponder._raids[guild.id] = state
+        RaidResponder.add(guild.id, member_ids, minutes)
+        state.task = asyncio.create_task(RaidResponder._run(guild, state, settings.get("raid_lockdown", False)))
+    
+    @staticmethod
+    def add(guild_id: int, member_ids: List[int], minutes: float = 10):
+        """Queues more raiders and keeps raid mode going for another `minutes`."""
+        state = RaidResponder._raids[guild_id]
+        state.until = max(state.until, time.monotonic() + minutes * 60)
+        for member_id in member_ids:
+            if member_id not in state.seen:
+                state.seen.add(member_id)
+                state.pending.append(member_id)
+    
+    @staticmethod
+    def _jobs(client: RaidActionClient, action: str, member_ids: List[int]) -> List[tuple]:
+        reason = "Auto-moderation: Raid detected"
+        if action == "ban":
+            size = RaidActionClient.BULK_BAN_LIMIT
+            return [("ban", lambda chunk=member_ids[i:i + size]: client.ban_many(chunk, reason))
+                    for i in range(0, len(member_ids), size)]
+        if action == "kick":
+            return [("kick", lambda m=member_id: client.kick(m, reason)) for member_id in member_ids]
+        return [("timeout", lambda m=member_id: client.timeout(m, RAID_TIMEOUT_MINUTES * 60, reason))
+                for member_id in member_ids]
+    
+    @staticmethod
+    async def _run(guild: discord.Guild, state: _RaidState, lockdown: bool):
+        client = RaidResponder.client_factory(guild)
+        actioned = failed = 0
+        try:
+            if lockdown:
+                # Remember each channel's previous overwrite so the unlock restores it exactly
+                channels = [(c, c.overwrites_for(guild.default_role).send_messages) for c in guild.text_channels]
+                channels = [(c, previous) for c, previous in channels if previous is not False]
+                results = await state.executor.run(
+                    [("channel", lambda c=c: client.set_send_permission(c, False)) for c, _ in channels])
+                state.locked = [entry for entry, ok in zip(channels, results) if ok]
+            
+            while state.pending or time.monotonic() < state.until:
+                if not state.pending:
+                    await asyncio.sleep(RaidResponder.BATCH_SECONDS)
+                    continue
+                batch, state.pending = state.pending, []
+                jobs = RaidResponder._jobs(client, state.action, batch)
+                results = await state.executor.run(jobs)
+                per_job = RaidActionClient.BULK_BAN_LIMIT if state.action == "ban" else 1
+                for i, ok in enumerate(results):
+                    count = len(batch[i * per_job:(i + 1) * per_job])
+                    if ok:
+                        actioned += count
+                    else:
+                        failed += count
+            
+            if state.locked:
+                await state.executor.run(
+                    [("channel", lambda c=c, p=previous: client.set_send_permission(c, p)) for c, previous in state.locked])
+        finally:
+            RaidResponder._raids.pop(guild.id, None)
+        
+        stats = state.executor.stats
+        await SecurityEngine.log_action(guild, "RAID_RESPONSE",
+            f"Raid mode ended after {int(time.monotonic() - state.started)}s.\n"
+            f"**Action:** {state.action} — {actioned} member(s) actioned, {failed} failed\n"
+            f"**Channels locked:** {len(state.locked)}\n"
+            f"**API calls:** {stats['done']} ok, {stats['retried']} rate-limited retries, {stats['failed']} failed")
+
+class _JoinRecord:
+    __slots__ = ("member_id", "joined", "keys", "score")
+    
+    def __init__(self, member_id: int, joined: float, keys: tuple, score: float):
+        self.member_id = member_id
+        self.joined = joined
+        self.keys = keys
+        self.score = score
+
+class _JoinWindow:
+    """One guild's recent joins with running per-cluster sizes and score totals."""
+    
+    __slots__ = ("records", "sizes", "scores", "alerted")
+    
+    def __init__(self):
+        self.records = deque()
+        self.sizes: Dict[tuple, int] = defaultdict(int)
+        self.scores: Dict[tuple, float] = defaultdict(float)
+        # Cluster key -> when it was first reported, so each cluster is reported once per window
+        self.alerted: Dict[tuple, float] = {}
+    
+    def add(self, record: _JoinRecord):
+        self.records.append(record)
+        for key in record.keys:
+            self.sizes[key] += 1
+            self.scores[key] += record.score
+    
+    def pop_oldest(self):
+        record = self.records.popleft()
+        for key in record.keys:
+            self.sizes[key] -= 1
+            self.scores[key] -= record.score
+            if not self.sizes[key]:
+                del self.sizes[key]
+                del self.scores[key]
+
+class JoinPatternScorer:
+    """Scores joins by how bot-like they look together. Each join gets a suspicion score from
+    account age and default avatar, and is filed under clusters: account creation time
+    (10-minute buckets, neighbours included), username shape (digit runs collapsed, so
+    raider01/raider02 match) and invite code. Cluster sizes and score totals are kept up to date
+    as joins enter and leave the window, so each join costs O(1). A cluster is flagged only when
+    it is large and its average score is high. An influx of established accounts through one
+    tournament invite is large but scores low, so it stays below the bar."""
+    
+    CREATION_BUCKET_SECONDS = 600
+    MIN_CLUSTER_SIZE = 4
+    CLUSTER_MEAN_SCORE = 2.5
+    INVITE_REFRESH_SECONDS = 10
+    
+    _windows: Dict[int, _JoinWindow] = {}
+    _invite_uses: Dict[int, Dict[str, int]] = {}  # guild_id -> use counts at the last refresh
+    _active_invites: Dict[int, tuple] = {}  # guild_id -> (invite code, when it was seen growing)
+    
+    @staticmethod
+    def name_shape(name: str) -> str:
+        """Username with digit runs collapsed to '#': raider01 -> raider#, 48213 -> #."""
+        return re.sub(r"\d+", "#", name.casefold()).strip("._-")
+    
+    @staticmethod
+    def member_score(account_age_seconds: float, default_avatar: bool) -> float:
+        score = 0.0
+        if account_age_seconds < 86400:
+            score += 3.0
+        elif account_age_seconds < 7 * 86400:
+            score += 1.5
+        if default_avatar:
+            score += 1.0
+        return score
+    
+    @staticmethod
+    def observe(guild_id: int, member_id: int, created_at: float, default_avatar: bool, name: str,
+                invite_code: Optional[str] = None, now: Optional[float] = None) -> Optional[tuple]:
+        """Adds a join. Returns (member IDs, first) for a flagged cluster it belongs to, or None;
+        first is True the first time that cluster is flagged in the window."""
+        now = time.time() if now is None else now
+        window = JoinPatternScorer._windows.get(guild_id)
+        if window is None:
+            window = JoinPatternScorer._windows[guild_id] = _JoinWindow()
+        JoinPatternScorer._expire(window, now)
+        
+        bucket = int(created_at // JoinPatternScorer.CREATION_BUCKET_SECONDS)
+        keys = [("created", bucket)]
+        shape = JoinPatternScorer.name_shape(name)
+        if shape:
+            keys.append(("shape", shape))
+        if invite_code:
+            keys.append(("invite", invite_code))
+        record = _JoinRecord(member_id, now, tuple(keys),
+                             JoinPatternScorer.member_score(now - created_at, default_avatar))
+        window.add(record)
+        if len(window.records) > JOIN_WINDOW_CAPACITY:
+            window.pop_oldest()
+        
+        # Creation buckets are checked with their neighbours so a batch of accounts made
+        # across a bucket boundary still counts as one cluster
+        candidates = [[("created", bucket - 1), ("created", bucket), ("created", bucket + 1)]]
+        candidates += [[key] for key in keys[1:]]
+        for cluster in candidates:
+            size = sum(window.sizes.get(key, 0) for key in cluster)
+            score = sum(window.scores.get(key, 0.0) for key in cluster)
+            if size >= JoinPatternScorer.MIN_CLUSTER_SIZE and score >= size * JoinPatternScorer.CLUSTER_MEAN_SCORE:
+                members = set(cluster)
+                first = not any(key in window.alerted for key in cluster)
+                for key in cluster:
+                    window.alerted.setdefault(key, now)
+                return [r.member_id for r in window.records if members.intersection(r.keys)], first
+        return None
+    
+    @staticmethod
+    def _expire(window: _JoinWindow, now: float):
+        cutoff = now - JOIN_WINDOW_SECONDS
+        while window.records and window.records[0].joined <= cutoff:
+            window.pop_oldest()
+        for key in [key for key, alerted in window.alerted.items() if alerted <= cutoff]:
+            del window.alerted[key]
+    
+    @staticmethod
+    def prune(now: Optional[float] = None):
+        """Drops windows of guilds with no joins in the last window."""
+        now = time.time() if now is None else now
+        for guild_id, window in list(JoinPatternScorer._windows.items()):
+            JoinPatternScorer._expire(window, now)
+            if not window.records:
+                del JoinPatternScorer._windows[guild_id]
+                JoinPatternScorer._invite_uses.pop(guild_id, None)
+                JoinPatternScorer._active_invites.pop(guild_id, None)
+    
+    @staticmethod
+    async def refresh_invites(bot: commands.Bot):
+        """Background invite attribution, run every INVITE_REFRESH_SECONDS for guilds with joins in
+        the current window: diffs each guild's invite use counts against the last refresh and
+        remembers the invite that grew, when exactly one did. The first refresh of a guild only
+        takes the baseline."""
+        async def refresh(guild: discord.Guild):
+            try:
+                current = {invite.code: invite.uses or 0 for invite in await guild.invites()}
+            except discord.HTTPException:
+                return
+            previous = JoinPatternScorer._invite_uses.get(guild.id)
+            JoinPatternScorer._invite_uses[guild.id] = current
+            if previous is None:
+                return
+            grown = [code for code, count in current.items() if count > previous.get(code, 0)]
+            if len(grown) == 1:
+                JoinPatternScorer._active_invites[guild.id] = (grown[0], time.monotonic())
+            elif grown:
+                JoinPatternScorer._active_invites.pop(guild.id, None)  # ambiguous
+        
+        guilds = [bot.get_guild(guild_id) for guild_id in list(JoinPatternScorer._windows)]
+        # Listing invites needs Manage Server; skip guilds where it would only return 403s
+        guilds = [g for g in guilds if g is not None and g.me is not None and g.me.guild_permissions.manage_guild]
+        await asyncio.gather(*(refresh(guild) for guild in guilds))
+    
+    @staticmethod
+    def invite_code(guild_id: int) -> Optional[str]:
+        """The invite the guild's joins are currently attributed to, if the last two refreshes saw
+        it growing. A dict lookup: the join path never calls the API."""
+        active = JoinPatternScorer._active_invites.get(guild_id)
+        if active is None or time.monotonic() - active[1] > 2 * JoinPatternScorer.INVITE_REFRESH_SECONDS:
+            return None
+        return active[0]
+
+# ==================================================================================================
+#  SECTION 3B: PERMISSION TIERS
+# ==================================================================================================
+
+class MissingPermissionTier(app_commands.CheckFailure):
+    """Raised by PermissionService.require; the message is shown to the user."""
+
+class PermissionService:
+    """Resolves permission tiers. Each guild gets a user ID -> tier bitmask index (and one for
+    roles), built once from permissions_tiers/permission_roles and kept in step by grant/revoke,
+    so a check is a dict lookup and a bit test."""
+    
+    TIERS = ("system_admins", "senior_mods", "regular_mods", "trial_mods", "app_reviewers", "tournament_managers")
+    BITS = {tier: 1 << i for i, tier in enumerate(TIERS)}
+    
+    # Who may do what; system admins are in every group
+    ADMIN = BITS["system_admins"]
+    SENIOR_MOD = ADMIN | BITS["senior_mods"]
+    MODERATOR = SENIOR_MOD | BITS["regular_mods"]
+    STAFF = MODERATOR | BITS["trial_mods"]
+    REVIEWER = ADMIN | BITS["app_reviewers"]
+    TOURNAMENT_MANAGER = ADMIN | BITS["tournament_managers"]
+    
+    # guild_id -> (source permissions_tiers dict, {user_id: bits}, {role_id: bits})
+    _indexes: Dict[int, tuple] = {}
+    
+    @staticmethod
+    def _role_config(db: dict) -> dict:
+        roles = db.setdefault("permission_roles", {})
+        for tier in PermissionService.TIERS:
+            roles.setdefault(tier, [])
+        return roles
+    
+    @staticmethod
+    def _index(guild_id: int) -> tuple:
+        db = PlatinumCoreDB.load_guild(guild_id)
+        index = PermissionService._indexes.get(guild_id)
+        # Rebuilt when the section object was replaced (reload, re-seed)
+        if index is None or index[0] is not db["permissions_tiers"]:
+            users: Dict[int, int] = defaultdict(int)
+            roles: Dict[int, int] = defaultdict(int)
+            for tier, bit in PermissionService.BITS.items():
+                for user_id in db["permissions_tiers"].get(tier, []):
+                    users[int(user_id)] |= bit
+                for role_id in PermissionService._role_config(db)[tier]:
+                    roles[int(role_id)] |= bit
+            index = (db["permissions_tiers"], dict(users), dict(roles))
+            PermissionService._indexes[guild_id] = index
+        return index
+    
+    @staticmethod
+    def tiers_of(member: discord.Member) -> int:
+        """Bitmask of every tier the member holds directly or through a role."""
+        _, users, roles = PermissionService._index(member.guild.id)
+        bits = users.get(member.id, 0)
+        if roles:
+            for role in member.roles:
+                bits |= roles.get(role.id, 0)
+        return bits
+    
+    @staticmethod
+    def has(member: discord.Member, mask: int) -> bool:
+        """True if the member is the owner or holds any tier in mask."""
+        return member.id == member.guild.owner_id or bool(PermissionService.tiers_of(member) & mask)
+    
+    @staticmethod
+    def require(mask: int, message: str = NO_PERM_MESSAGE):
+        """app_commands check: the invoker must hold one of the tiers in mask."""
+        def predicate(interaction: discord.Interaction) -> bool:
+            if interaction.guild is None or not PermissionService.has(interaction.user, mask):
+                raise MissingPermissionTier(message)
+            return True
+        return app_commands.check(predicate)
+    
+    @staticmethod
+    def _update(guild_id: int, tier: str, target_id: int, is_role: bool, grant: bool) -> bool:
+        db = PlatinumCoreDB.load_guild(guild_id)
+        _, users, roles = PermissionService._index(guild_id)
+        section = "permission_roles" if is_role else "permissions_tiers"
+        # Older partitions may predate a tier, so it is created on first grant
+        members = PermissionService._role_config(db)[tier] if is_role else db["permissions_tiers"].setdefault(tier, [])
+        
+        if (target_id in members) == grant:
+            return False
+        if grant:
+            members.append(target_id)
+        else:
+            members.remove(target_id)
+        PlatinumCoreDB.commit_guild(guild_id, section, tier)
         
-        if audit_channel_id:
-            channel = guild.get_channel(int(audit_channel_id))
-            if channel:
-                embed = discord.Embed(
-                    title=f"🛡️ Security Log: {action_type}",
-                    description=description,
-                    color=COLOR_PLATINUM_WARNING,
-                    timestamp=datetime.datetime.now()
-                )
-                await channel.send(embed=embed)
+        index = roles if is_role else users
+        bits = (index.get(target_id, 0) | PermissionService.BITS[tier]) if grant else (index.get(target_id, 0) & ~PermissionService.BITS[tier])
+        if bits:
+            index[target_id] = bits
+        else:
+            index.pop(target_id, None)
+        return True
+    
+    @staticmethod
+    def grant(guild_id: int, tier: str, target_id: int, is_role: bool = False) -> bool:
+        """Adds a user (or role) to a tier. Returns False if it already had it."""
+        return PermissionService._update(guild_id, tier, target_id, is_role, True)
+    
+    @staticmethod
+    def revoke(guild_id: int, tier: str, target_id: int, is_role: bool = False) -> bool:
+        """Removes a user (or role) from a tier. Returns False if it did not have it."""
+        return PermissionService._update(guild_id, tier, target_id, is_role, False)
+    
+    @staticmethod
+    def invalidate(guild_id: Optional[int] = None):
+        """Forgets cached indexes (all guilds when guild_id is None)."""
+        if guild_id is None:
+            PermissionService._indexes.clear()
+        else:
+            PermissionService._indexes.pop(guild_id, None)
+
+# ==================================================================================================
+#  SECTION 4: XP ENGINE
+# ==================================================================================================
+
+class RankedIndex:
+    """Sorted multiset with O(log n) rank and position lookups. Keys live in sorted sublists
+    (as in sortedcontainers) with a Fenwick tree over the sublist lengths."""
+    
+    LOAD = 512
+    
+    def __init__(self, keys=()):
+        ordered = sorted(keys)
+        self._lists = [ordered[i:i + self.LOAD] for i in range(0, len(ordered), self.LOAD)]
+        self._maxes = [sub[-1] for sub in self._lists]
+        self._len = len(ordered)
+        self._rebuild_tree()
+    
+    def __len__(self) -> int:
+        return self._len
+    
+    def _rebuild_tree(self):
+        tree = [0] + [len(sub) for sub in self._lists]
+        for i in range(1, len(tree)):
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+    
+    def _tree_add(self, list_index: int, delta: int):
+        i = list_index + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+    
+    def _tree_prefix(self, list_index: int) -> int:
+        """Number of keys in the sublists before list_index."""
+        total, i = 0, list_index
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+    
+    def _locate(self, position: int):
+        """Maps a global position to (sublist index, offset)."""
+        index, bit = 0, 1 << (len(self._tree).bit_length() - 1)
+        while bit:
+            nxt = index + bit
+            if nxt < len(self._tree) and self._tree[nxt] <= position:
+                index = nxt
+                position -= self._tree[nxt]
+            bit >>= 1
+        return index, position
+    
+    def add(self, key):
+        if not self._lists:
+            self._lists.append([key])
+            self._maxes.append(key)
+            self._len = 1
+            self._rebuild_tree()
+            return
+        
+        i = bisect.bisect_left(self._maxes, key)
+        if i == len(self._maxes):
+            i -= 1
+            self._lists[i].append(key)
+            self._maxes[i] = key
+        else:
+            bisect.insort(self._lists[i], key)
+        self._len += 1
+        
+        if len(self._lists[i]) > 2 * self.LOAD:
+            sub = self._lists[i]
+            self._lists[i:i + 1] = [sub[:self.LOAD], sub[self.LOAD:]]
+            self._maxes[i:i + 1] = [sub[self.LOAD - 1], sub[-1]]
+            self._rebuild_tree()
+        else:
+            self._tree_add(i, 1)
+    
+    def remove(self, key):
+        i = bisect.bisect_left(self._maxes, key)
+        if i == len(self._maxes):
+            raise KeyError(key)
+        sub = self._lists[i]
+        j = bisect.bisect_left(sub, key)
+        if j == len(sub) or sub[j] != key:
+            raise KeyError(key)
+        
+        del sub[j]
+        self._len -= 1
+        if sub:
+            self._maxes[i] = sub[-1]
+            self._tree_add(i, -1)
+        else:
+            del self._lists[i]
+            del self._maxes[i]
+            self._rebuild_tree()
+    
+    def rank(self, key) -> int:
+        """Number of keys strictly smaller than key."""
+        i = bisect.bisect_left(self._maxes, key)
+        if i == len(self._maxes):
+            return self._len
+        return self._tree_prefix(i) + bisect.bisect_left(self._lists[i], key)
+    
+    def slice(self, start: int, stop: int) -> list:
+        """Keys at positions [start, stop)."""
+        stop = min(stop, self._len)
+        if start >= stop:
+            return []
+        i, offset = self._locate(start)
+        result = []
+        while len(result) < stop - start:
+            result.extend(self._lists[i][offset:offset + (stop - start - len(result))])
+            i, offset = i + 1, 0
+        return result
+
+class XPRecord:
+    """Compact in-memory XP state for one member."""
+    
+    __slots__ = ("xp", "level", "total_xp", "last_xp_time")
+    
+    def __init__(self, xp: int = 0, level: int = 1, total_xp: int = 0, last_xp_time: float = 0):
+        self.xp = xp
+        self.level = level
+        self.total_xp = total_xp
+        self.last_xp_time = last_xp_time
+    
+    @classmethod
+    def from_entry(cls, entry: dict) -> "XPRecord":
+        return cls(entry.get("xp", 0), entry.get("level", 1), entry.get("total_xp", 0), entry.get("last_xp_time", 0))
+    
+    def to_entry(self) -> dict:
+        return {"xp": self.xp, "level": self.level, "total_xp": self.total_xp, "last_xp_time": self.last_xp_time}
+
+class PlatinumXPEngine:
+    """XP and leveling system."""
+    
+    # Awards are applied to these records in memory; xp_flush_loop copies the dirty ones
+    # into the guild partitions in batches.
+    _records: Dict[int, Dict[int, XPRecord]] = defaultdict(dict)
+    _dirty: Dict[int, set] = defaultdict(set)
+    
+    # Per-guild ranking of members with XP, keyed (-total_xp, user_id); built on first use
+    # and updated on every award
+    _leaderboards: Dict[int, RankedIndex] = {}
+    
+    # Cumulative XP for levels 1..LEVEL_TABLE_SIZE+1, built on first use; levels past the
+    # table fall back to the closed-form inverse
+    LEVEL_TABLE_SIZE = 1000
+    _level_thresholds: List[int] = []
+    
+    @staticmethod
+    def calculate_level_requirement(current_level: int) -> int:
+        return (LEVEL_CURVE_A * (current_level ** 2)) + (LEVEL_CURVE_B * current_level) + LEVEL_CURVE_C
+
+    @staticmethod
+    def cumulative_xp_for_level(level: int) -> int:
+        """Total XP needed to reach `level` from level 1 (closed form of the requirement sum)."""
+        n = level - 1
+        return (LEVEL_CURVE_A * n * (n + 1) * (2 * n + 1)) // 6 + (LEVEL_CURVE_B * n * (n + 1)) // 2 + LEVEL_CURVE_C * n
+
+    @staticmethod
+    def level_from_total_xp(total_xp: int) -> tuple:
+        """Inverse of cumulative_xp_for_level. Returns (level, xp into that level)."""
+        if total_xp <= 0:
+            return 1, 0
+        
+        thresholds = PlatinumXPEngine._level_thresholds
+        if not thresholds:
+            thresholds.extend(PlatinumXPEngine.cumulative_xp_for_level(level)
+                              for level in range(1, PlatinumXPEngine.LEVEL_TABLE_SIZE + 2))
+        level = bisect.bisect_right(thresholds, total_xp)
+        if level <= PlatinumXPEngine.LEVEL_TABLE_SIZE:
+            return level, total_xp - thresholds[level - 1]
+        
+        # The cubic term alone overestimates by at most a couple of levels
+        cumulative = PlatinumXPEngine.cumulative_xp_for_level
+        level = int((3 * total_xp / LEVEL_CURVE_A) ** (1 / 3)) + 2 if LEVEL_CURVE_A > 0 else total_xp + 1
+        while level > 1 and cumulative(level) > total_xp:
+            level -= 1
+        while cumulative(level + 1) <= total_xp:
+            level += 1
+        return level, total_xp - cumulative(level)
+
+    @staticmethod
+    def parse_import(raw: Any) -> Dict[int, int]:
+        """Validates an XP import ({user_id: xp}) as a whole. Raises ValueError naming the first bad entry."""
+        if not isinstance(raw, dict):
+            raise ValueError("expected an object of user_id: xp")
+        
+        parsed = {}
+        for user_id, amount in raw.items():
+            if not str(user_id).isdigit():
+                raise ValueError(f"user ID {user_id!r} is not numeric")
+            if isinstance(amount, bool) or not isinstance(amount, (int, str)) or not str(amount).lstrip("-").isdigit():
+                raise ValueError(f"XP for {user_id} is not a whole number: {amount!r}")
+            parsed[int(user_id)] = parsed.get(int(user_id), 0) + int(amount)
+        return parsed
+
+    @staticmethod
+    def recompute_levels(user_data: dict, additions: Dict[int, int], multiplier: float = 1.0) -> dict:
+        """Builds a new user_data: imported XP added, every total scaled by multiplier and level and
+        in-level XP derived from it. Pure, so it can run in a worker thread; raises before anything
+        is written."""
+        inverse = PlatinumXPEngine.level_from_total_xp
+        totals = {user_id: entry.get("total_xp", 0) for user_id, entry in user_data.items()}
+        for user_id, amount in additions.items():
+            totals[str(user_id)] = totals.get(str(user_id), 0) + amount
+        
+        rebuilt = {}
+        for user_id, total in totals.items():
+            total_xp = int(total * multiplier)
+            level, xp = inverse(total_xp)
+            last_xp_time = user_data[user_id].get("last_xp_time", 0) if user_id in user_data else 0
+            rebuilt[user_id] = {"xp": xp, "level": level, "total_xp": total_xp, "last_xp_time": last_xp_time}
+        return rebuilt
+
+    @staticmethod
+    async def bulk_recompute(guild_id: int, multiplier: float = 1.0, imported: Optional[dict] = None) -> int:
+        """Adds imported totals (user_id -> XP), applies a multiplier and recomputes every level
+        in the guild. The import and multiplier are validated first (ValueError) and the new data is
+        built in a worker thread, then swapped in, so nothing changes unless the whole run succeeds.
+        Returns the number of members rewritten."""
+        if not math.isfinite(multiplier) or multiplier < 0:
+            raise ValueError("multiplier must be a finite, non-negative number")
+        additions = PlatinumXPEngine.parse_import(imported or {})
+        
+        PlatinumXPEngine.flush_pending_xp()
+        xp_engine = PlatinumCoreDB.load_guild(guild_id)["xp_engine"]
+        # Flushes replace entries rather than mutating them, so a shallow copy is a stable snapshot
+        snapshot = dict(xp_engine["user_data"])
+        try:
+            rebuilt = await asyncio.to_thread(PlatinumXPEngine.recompute_levels, snapshot, additions, multiplier)
+        except OverflowError:
+            raise ValueError("multiplier is too large for these XP totals")
+        
+        # XP awarded while the thread ran lives in the in-memory records; carry it over
+        inverse = PlatinumXPEngine.level_from_total_xp
+        for user_id, record in PlatinumXPEngine._records.get(guild_id, {}).items():
+            previous = snapshot.get(str(user_id))
+            earned = record.total_xp - (previous.get("total_xp", 0) if previous else 0)
+            if earned:
+                entry = rebuilt.setdefault(str(user_id), XPRecord().to_entry())
+                entry["total_xp"] += earned
+                entry["level"], entry["xp"] = inverse(entry["total_xp"])
+                entry["last_xp_time"] = record.last_xp_time
+        
+        xp_engine["user_data"] = rebuilt
+        
+        # In-memory records and the leaderboard are rebuilt from the new data on next use
+        PlatinumXPEngine._dirty.pop(guild_id, None)
+        PlatinumXPEngine.drop_guild(guild_id)
+        PlatinumCoreDB.commit_guild(guild_id, "xp_engine", "user_data")
+        return len(rebuilt)
+
+    @staticmethod
+    def get_record(guild_id: int, user_id: int) -> XPRecord:
+        """Returns a member's XP record, loading it from the guild partition on first use."""
+        records = PlatinumXPEngine._records[guild_id]
+        record = records.get(user_id)
+        if record is None:
+            user_data = PlatinumCoreDB.load_guild(guild_id).get("xp_engine", {}).get("user_data", {})
+            entry = user_data.get(str(user_id))
+            record = XPRecord.from_entry(entry) if entry else XPRecord()
+            records[user_id] = record
+        return record
 
-# ==================================================================================================
-#  SECTION 4: XP ENGINE
-# ==================================================================================================
+    @staticmethod
+    def get_leaderboard(guild_id: int) -> RankedIndex:
+        """Returns the guild's XP ranking, building it from the partition on first use."""
+        index = PlatinumXPEngine._leaderboards.get(guild_id)
+        if index is None:
+            user_data = PlatinumCoreDB.load_guild(guild_id).get("xp_engine", {}).get("user_data", {})
+            totals = {int(uid): entry.get("total_xp", 0) for uid, entry in user_data.items()}
+            for user_id, record in PlatinumXPEngine._records[guild_id].items():
+                totals[user_id] = record.total_xp
+            index = RankedIndex((-total, user_id) for user_id, total in totals.items() if total > 0)
+            PlatinumXPEngine._leaderboards[guild_id] = index
+        return index
 
-class PlatinumXPEngine:
-    """XP and leveling system."""
-    
     @staticmethod
-    def calculate_level_requirement(current_level: int) -> int:
-        return (100 * (current_level ** 2)) + (200 * current_level) + 500
+    def apply_xp(guild_id: int, user_id: int, record: XPRecord, amount: int) -> bool:
+        """Adds XP to a record and queues it for the next flush. Returns True on level up."""
+        index = PlatinumXPEngine._leaderboards.get(guild_id)
+        if index is not None:
+            if record.total_xp > 0:
+                index.remove((-record.total_xp, user_id))
+            if record.total_xp + amount > 0:
+                index.add((-(record.total_xp + amount), user_id))
+        
+        record.total_xp += amount
+        PlatinumXPEngine._dirty[guild_id].add(user_id)
+        
+        # Level and in-level XP always follow from total_xp, the same way /xp_recompute derives them
+        previous_level = record.level
+        record.level, record.xp = PlatinumXPEngine.level_from_total_xp(record.total_xp)
+        return record.level > previous_level
 
     @staticmethod
     async def process_message_xp(member: discord.Member):
         if member.bot:
             return
 
-        db = PlatinumCoreDB.load_full_database()
-        xp_config = db.get("xp_engine", {})
+        xp_config = PlatinumCoreDB.load_guild(member.guild.id).get("xp_engine", {})
         
         if not xp_config.get("global_enabled", False):
             return
 
-        user_id_str = str(member.id)
+        record = PlatinumXPEngine.get_record(member.guild.id, member.id)
         current_timestamp = time.time()
         
-        if user_id_str not in xp_config["user_data"]:
-            xp_config["user_data"][user_id_str] = {
-                "xp": 0, "level": 1, "total_xp": 0, "last_xp_time": 0
-            }
-
-        user_entry = xp_config["user_data"][user_id_str]
-        cooldown_period = xp_config.get("cooldown_seconds", 60)
-        time_since_last = current_timestamp - user_entry.get("last_xp_time", 0)
-        
-        if time_since_last < cooldown_period:
+        if current_timestamp - record.last_xp_time < xp_config.get("cooldown_seconds", 60):
             return
 
         min_gain = xp_config.get("min_gain", 15)
         max_gain = xp_config.get("max_gain", 30)
         awarded_xp = random.randint(min_gain, max_gain)
+        record.last_xp_time = current_timestamp
+        
+        if PlatinumXPEngine.apply_xp(member.guild.id, member.id, record, awarded_xp):
+            await PlatinumXPEngine.announce_level_up(member)
+
+    @staticmethod
+    async def announce_level_up(member: discord.Member):
+        xp_config = PlatinumCoreDB.load_guild(member.guild.id).get("xp_engine", {})
+        if xp_config.get("level_up_messages", True):
+            record = PlatinumXPEngine.get_record(member.guild.id, member.id)
+            try:
+                await member.send(f"🎊 **LEVEL UP!** You've reached Level {record.level} in {member.guild.name}!")
+            except:
+                pass
+
+    @staticmethod
+    def flush_pending_xp():
+        """Copies every record awarded since the last flush into its guild partition."""
+        dirty = PlatinumXPEngine._dirty
+        PlatinumXPEngine._dirty = defaultdict(set)
+        
+        for guild_id, user_ids in dirty.items():
+            user_data = PlatinumCoreDB.load_guild(guild_id)["xp_engine"]["user_data"]
+            records = PlatinumXPEngine._records[guild_id]
+            for user_id in user_ids:
+                user_data[str(user_id)] = records[user_id].to_entry()
+                PlatinumCoreDB.commit_guild(guild_id, "xp_engine", "user_data", str(user_id))
+
+    @staticmethod
+    def drop_guild(guild_id: int):
+        """Forgets a guild's records once its partition has been unloaded."""
+        PlatinumXPEngine._records.pop(guild_id, None)
+        PlatinumXPEngine._leaderboards.pop(guild_id, None)
+
+    @staticmethod
+    def reset():
+        """Forgets every record and pending award (after the database is reloaded from disk)."""
+        PlatinumXPEngine._records.clear()
+        PlatinumXPEngine._dirty.clear()
+        PlatinumXPEngine._leaderboards.clear()
+
+class VoiceXPTracker:
+    """Awards xp_system.xp_per_min_vc from in-memory voice sessions in one periodic sweep."""
+    
+    # guild_id -> user_id -> timestamp up to which the member's voice time has been credited
+    _sessions: Dict[int, Dict[int, float]] = defaultdict(dict)
+    
+    @staticmethod
+    def _is_eligible(member: discord.Member, state: discord.VoiceState, humans_in_channel: int) -> bool:
+        """AFK, deafened and lone members earn nothing. humans_in_channel includes the member."""
+        if member.bot or state.channel is None:
+            return False
+        if state.channel == member.guild.afk_channel or state.self_deaf or state.deaf:
+            return False
+        return humans_in_channel >= 2
+    
+    @staticmethod
+    def _credit(member: discord.Member, since: float, now: float, eligible: bool):
+        """Awards XP for the whole minutes since `since`. Returns (new_since, leveled_up)."""
+        if not eligible:
+            return now, False
+        minutes = int((now - since) // 60)
+        if minutes <= 0:
+            return since, False
+        
+        db = PlatinumCoreDB.load_guild(member.guild.id)
+        per_minute = db.get("xp_system", {}).get("xp_per_min_vc", 10)
+        if not db.get("xp_engine", {}).get("global_enabled", False) or per_minute <= 0:
+            return now, False
+        
+        record = PlatinumXPEngine.get_record(member.guild.id, member.id)
+        leveled = PlatinumXPEngine.apply_xp(member.guild.id, member.id, record, minutes * per_minute)
+        return since + minutes * 60, leveled
+    
+    @staticmethod
+    def start_existing_sessions(guilds: List[discord.Guild]):
+        """Picks up members already in voice (e.g. after a restart or reconnect)."""
+        now = time.time()
+        for guild in guilds:
+            sessions = VoiceXPTracker._sessions[guild.id]
+            for channel in guild.voice_channels:
+                for member in channel.members:
+                    if not member.bot:
+                        sessions.setdefault(member.id, now)
+    
+    @staticmethod
+    async def handle_voice_state(member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
+        if member.bot or before.channel == after.channel:
+            return
         
-        user_entry["xp"] += awarded_xp
-        user_entry["total_xp"] += awarded_xp
-        user_entry["last_xp_time"] = current_timestamp
+        sessions = VoiceXPTracker._sessions[member.guild.id]
+        now = time.time()
         
-        current_lv = user_entry["level"]
-        required_for_next = PlatinumXPEngine.calculate_level_requirement(current_lv)
+        # Leaving or moving: credit the time spent in the old channel (member already left it)
+        if before.channel is not None and member.id in sessions:
+            humans = sum(1 for m in before.channel.members if not m.bot) + 1
+            eligible = VoiceXPTracker._is_eligible(member, before, humans)
+            _, leveled = VoiceXPTracker._credit(member, sessions.pop(member.id), now, eligible)
+            if leveled:
+                await PlatinumXPEngine.announce_level_up(member)
         
-        if user_entry["xp"] >= required_for_next:
-            user_entry["level"] += 1
-            user_entry["xp"] = 0
+        if after.channel is not None:
+            sessions[member.id] = now
+    
+    @staticmethod
+    async def sweep(bot: commands.Bot):
+        """Credits every member in voice in one pass, then flushes the awards once."""
+        now = time.time()
+        leveled_up = []
+        
+        for guild_id, sessions in list(VoiceXPTracker._sessions.items()):
+            guild = bot.get_guild(guild_id)
+            if guild is None:
+                del VoiceXPTracker._sessions[guild_id]
+                continue
             
-            if xp_config.get("level_up_messages", True):
-                try:
-                    await member.send(f"🎊 **LEVEL UP!** You've reached Level {user_entry['level']} in {member.guild.name}!")
-                except:
-                    pass
+            humans_by_channel = {}
+            for user_id, since in list(sessions.items()):
+                member = guild.get_member(user_id)
+                if member is None or member.voice is None or member.voice.channel is None:
+                    del sessions[user_id]
+                    continue
+                
+                channel = member.voice.channel
+                if channel.id not in humans_by_channel:
+                    humans_by_channel[channel.id] = sum(1 for m in channel.members if not m.bot)
+                
+                eligible = VoiceXPTracker._is_eligible(member, member.voice, humans_by_channel[channel.id])
+                sessions[user_id], leveled = VoiceXPTracker._credit(member, since, now, eligible)
+                if leveled:
+                    leveled_up.append(member)
+            
+            if not sessions:
+                del VoiceXPTracker._sessions[guild_id]
+        
+        PlatinumXPEngine.flush_pending_xp()
+        
+        for member in leveled_up:
+            await PlatinumXPEngine.announce_level_up(member)
+
+class ReactionXPCoalescer:
+    """Awards xp_system.xp_per_reaction. Reactions are netted per member over REACTION_XP_WINDOW
+    seconds, so a burst costs one update and an add followed by a remove cancels out. A window
+    with a positive net earns one per_reaction award, subject to the message XP cooldown, however
+    many messages were reacted to."""
+    
+    # (guild_id, user_id) -> [window deadline, net reactions]; insertion order is deadline order
+    _pending: Dict[tuple, list] = {}
+    
+    @staticmethod
+    def record(guild_id: int, user_id: int, delta: int):
+        entry = ReactionXPCoalescer._pending.get((guild_id, user_id))
+        if entry is None:
+            ReactionXPCoalescer._pending[(guild_id, user_id)] = [time.monotonic() + REACTION_XP_WINDOW, delta]
+        else:
+            entry[1] += delta
+    
+    @staticmethod
+    async def drain(bot: commands.Bot, force: bool = False):
+        """Applies every window that has closed (or all of them when force is set)."""
+        now = time.monotonic()
+        due = []
+        for key, (deadline, net) in ReactionXPCoalescer._pending.items():
+            if deadline > now and not force:
+                break
+            due.append((key, net))
+        
+        leveled_up = []
+        for (guild_id, user_id), net in due:
+            del ReactionXPCoalescer._pending[(guild_id, user_id)]
+            if net <= 0:
+                continue
+            
+            guild = bot.get_guild(guild_id)
+            member = guild.get_member(user_id) if guild else None
+            if member is None or member.bot:
+                continue
+            
+            db = PlatinumCoreDB.load_guild(guild_id)
+            xp_config = db.get("xp_engine", {})
+            per_reaction = db.get("xp_system", {}).get("xp_per_reaction", 2)
+            if not xp_config.get("global_enabled", False) or per_reaction <= 0:
+                continue
+            
+            # Shares the cooldown with message XP
+            record = PlatinumXPEngine.get_record(guild_id, user_id)
+            current_timestamp = time.time()
+            if current_timestamp - record.last_xp_time < xp_config.get("cooldown_seconds", 60):
+                continue
+            
+            # One award per cooldown, like message XP; reacting to many messages is not a faster path
+            record.last_xp_time = current_timestamp
+            if PlatinumXPEngine.apply_xp(guild_id, user_id, record, per_reaction):
+                leveled_up.append(member)
         
-        db["xp_engine"]["user_data"][user_id_str] = user_entry
-        PlatinumCoreDB.save_database(db)
+        for member in leveled_up:
+            await PlatinumXPEngine.announce_level_up(member)
+
+# ==================================================================================================
+#  SECTION 4B: VIEW TEMPLATES
+# ==================================================================================================
+
+class ViewTemplates:
+    """Per-guild button labels and application questions, built once from the guild's config and
+    reused by every view or modal constructed for that guild. An entry is rebuilt when its config
+    section is replaced (reload) or invalidated."""
+    
+    DEFAULT_QUESTIONS = (
+        {"label": "Why do you want to join our team?", "required": True},
+        {"label": "Previous moderation experience?", "required": True},
+        {"label": "How old are you?", "required": True}
+    )
+    
+    _cache: Dict[tuple, tuple] = {}  # (kind, guild_id) -> (config section it was built from, template)
+    _ticket_defaults: Optional[dict] = None
+    
+    @staticmethod
+    def fingerprint(config: Any) -> str:
+        """Stable hash of a JSON config, used to tell whether a registered view is still current."""
+        return hashlib.sha1(json.dumps(config, sort_keys=True, default=str).encode()).hexdigest()[:16]
+    
+    @staticmethod
+    def _cached(kind: str, guild_id: int, source: Any, build):
+        cached = ViewTemplates._cache.get((kind, guild_id))
+        if cached is not None and cached[0] is source:
+            return cached[1]
+        template = build(source)
+        ViewTemplates._cache[(kind, guild_id)] = (source, template)
+        return template
+    
+    @staticmethod
+    def ticket_actions(guild_id: Optional[int]) -> dict:
+        """Claim/close button texts and messages: the guild's ticket_customization over the defaults."""
+        if ViewTemplates._ticket_defaults is None:
+            ViewTemplates._ticket_defaults = PlatinumCoreDB.default_schema()["ticket_customization"]
+        if not guild_id:
+            return ViewTemplates._ticket_defaults
+        
+        custom = PlatinumCoreDB.load_guild(guild_id).get("ticket_customization")
+        return ViewTemplates._cached("ticket_actions", guild_id, custom,
+                                     lambda source: {**ViewTemplates._ticket_defaults, **(source or {})})
+    
+    @staticmethod
+    def staff_questions(guild_id: int) -> tuple:
+        """Up to 5 application questions (Discord's modal limit)."""
+        custom = PlatinumCoreDB.load_guild(guild_id).get("modal_customization")
+        return ViewTemplates._cached("staff_questions", guild_id, custom,
+                                     lambda source: tuple((source or {}).get("staff_app_questions") or ViewTemplates.DEFAULT_QUESTIONS)[:5])
+    
+    @staticmethod
+    def invalidate(guild_id: Optional[int] = None):
+        if guild_id is None:
+            ViewTemplates._cache.clear()
+        else:
+            for key in [key for key in ViewTemplates._cache if key[1] == guild_id]:
+                del ViewTemplates._cache[key]
 
 # ==================================================================================================
 #  SECTION 5: STAFF APPLICATION SYSTEM
@@ -348,21 +2663,10 @@ class PlatinumXPEngine:
 class StaffApplicationModal(discord.ui.Modal, title="Staff Application"):
     """Dynamic staff application modal."""
     
-    def __init__(self):
+    def __init__(self, guild_id: int):
         super().__init__()
-        db = PlatinumCoreDB.load_full_database()
-        questions = db.get("modal_customization", {}).get("staff_app_questions", [])
-        
-        # Add default questions if none configured
-        if not questions:
-            questions = [
-                {"label": "Why do you want to join our team?", "required": True},
-                {"label": "Previous moderation experience?", "required": True},
-                {"label": "How old are you?", "required": True}
-            ]
-        
-        # Add up to 5 questions (Discord limit)
-        for i, q in enumerate(questions[:5]):
+        
+        for q in ViewTemplates.staff_questions(guild_id):
             text_input = discord.ui.TextInput(
                 label=q["label"],
                 style=discord.TextStyle.paragraph,
@@ -374,7 +2678,7 @@ class StaffApplicationModal(discord.ui.Modal, title="Staff Application"):
     async def on_submit(self, interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True)
         
-        db = PlatinumCoreDB.load_full_database()
+        db = PlatinumCoreDB.load_guild(interaction.guild.id)
         pending_channel_id = db["recruitment_system"].get("pending_channel")
         
         if not pending_channel_id:
@@ -402,8 +2706,9 @@ class StaffApplicationModal(discord.ui.Modal, title="Staff Application"):
         
         # Update stats
         db["recruitment_system"]["stats"]["total_apps"] += 1
-        db["system_stats"]["total_apps"] += 1
-        PlatinumCoreDB.save_database(db)
+        PlatinumCoreDB.load_full_database()["system_stats"]["total_apps"] += 1
+        PlatinumCoreDB.commit_guild(interaction.guild.id, "recruitment_system", "stats", "total_apps")
+        PlatinumCoreDB.commit("system_stats", "total_apps")
         
         await interaction.followup.send("✅ Your application has been submitted! Please wait for a response.", ephemeral=True)
 
@@ -434,7 +2739,7 @@ class RoleSelectionModal(discord.ui.Modal, title="Select Role to Grant"):
     async def on_submit(self, interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True)
         
-        db = PlatinumCoreDB.load_full_database()
+        db = PlatinumCoreDB.load_guild(interaction.guild.id)
         guild = interaction.guild
         applicant = guild.get_member(self.applicant_id)
         
@@ -476,7 +2781,7 @@ class RoleSelectionModal(discord.ui.Modal, title="Select Role to Grant"):
         
         # Update stats
         db["recruitment_system"]["stats"]["total_accepted"] += 1
-        PlatinumCoreDB.save_database(db)
+        PlatinumCoreDB.commit_guild(interaction.guild.id, "recruitment_system", "stats", "total_accepted")
         
         await interaction.followup.send(f"✅ Successfully accepted <@{self.applicant_id}>!")
 
@@ -499,7 +2804,7 @@ class DenyReasonModal(discord.ui.Modal, title="Denial Reason"):
     async def on_submit(self, interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True)
         
-        db = PlatinumCoreDB.load_full_database()
+        db = PlatinumCoreDB.load_guild(interaction.guild.id)
         guild = interaction.guild
         applicant = guild.get_member(self.applicant_id)
         
@@ -532,7 +2837,7 @@ class DenyReasonModal(discord.ui.Modal, title="Denial Reason"):
         
         # Update stats
         db["recruitment_system"]["stats"]["total_denied"] += 1
-        PlatinumCoreDB.save_database(db)
+        PlatinumCoreDB.commit_guild(interaction.guild.id, "recruitment_system", "stats", "total_denied")
         
         await interaction.followup.send(f"✅ Application denied with feedback sent to user.")
 
@@ -545,33 +2850,14 @@ class StaffReviewView(discord.ui.View):
     
     @discord.ui.button(label="ACCEPT", style=discord.ButtonStyle.success, emoji="✅", custom_id="staff_accept_btn")
     async def accept_btn(self, interaction: discord.Interaction, button: discord.ui.Button):
-        db = PlatinumCoreDB.load_full_database()
-        
-        # Check permissions
-        user_id = interaction.user.id
-        is_reviewer = (
-            user_id in db["permissions_tiers"]["app_reviewers"] or
-            user_id in db["permissions_tiers"]["system_admins"] or
-            user_id == interaction.guild.owner_id
-        )
-        
-        if not is_reviewer:
+        if not PermissionService.has(interaction.user, PermissionService.REVIEWER):
             return await interaction.response.send_message("❌ You don't have permission to review applications.", ephemeral=True)
         
         await interaction.response.send_modal(RoleSelectionModal(self.applicant_id, interaction.message))
     
     @discord.ui.button(label="DENY", style=discord.ButtonStyle.danger, emoji="❌", custom_id="staff_deny_btn")
     async def deny_btn(self, interaction: discord.Interaction, button: discord.ui.Button):
-        db = PlatinumCoreDB.load_full_database()
-        
-        user_id = interaction.user.id
-        is_reviewer = (
-            user_id in db["permissions_tiers"]["app_reviewers"] or
-            user_id in db["permissions_tiers"]["system_admins"] or
-            user_id == interaction.guild.owner_id
-        )
-        
-        if not is_reviewer:
+        if not PermissionService.has(interaction.user, PermissionService.REVIEWER):
             return await interaction.response.send_message("❌ You don't have permission to review applications.", ephemeral=True)
         
         await interaction.response.send_modal(DenyReasonModal(self.applicant_id, interaction.message))
@@ -580,14 +2866,596 @@ class StaffReviewView(discord.ui.View):
 #  SECTION 6: TICKET SYSTEM
 # ==================================================================================================
 
+class TranscriptWriter:
+    """Streams a ticket transcript to spooled temp files as history is read. Output stays in
+    memory up to TRANSCRIPT_SPOOL_BYTES and then moves to disk, so memory use does not grow
+    with ticket length. Writes a text transcript, optionally gzipped, and optionally an HTML
+    rendering."""
+    
+    HTML_HEAD = ("<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>{title}</title><style>"
+                 "body{{font-family:sans-serif;background:#2f3136;color:#dcddde}}"
+                 ".m{{margin:6px 0}}.a{{font-weight:bold;color:#fff}}.t{{color:#72767d;font-size:12px}}"
+                 ".e{{border-left:4px solid #5865f2;padding:4px 8px;margin:4px 0;background:#202225}}"
+                 "</style></head><body><h2>{title}</h2><p>{meta}</p>\n")
+    
+    BUFFER_CHARS = 64 * 1024
+    
+    def __init__(self, channel_name: str, closed_by: str, compress: bool = TRANSCRIPT_GZIP,
+                 html: bool = TRANSCRIPT_HTML):
+        self.channel_name = channel_name
+        self.closed_by = closed_by
+        self.message_count = 0
+        # Participants and distinct words, for the transcript archive's index
+        self.participants: Dict[int, str] = {}
+        self.terms = set()
+        self.digest = hashlib.sha256()
+        # Lines are collected in small chunks so the files see a few large writes
+        self._buffer: List[str] = []
+        self._html_buffer: List[str] = []
+        self._buffered = 0
+        self._text_file = tempfile.SpooledTemporaryFile(max_size=TRANSCRIPT_SPOOL_BYTES)
+        self._text = gzip.GzipFile(fileobj=self._text_file, mode="wb") if compress else self._text_file
+        self._html_file = tempfile.SpooledTemporaryFile(max_size=TRANSCRIPT_SPOOL_BYTES) if html else None
+        self.compress = compress
+        
+        self.closed_at = closed_at = datetime.datetime.now()
+        self._write(f"=== TICKET TRANSCRIPT ===\nChannel: {channel_name}\nClosed by: {closed_by}\nDate: {closed_at}\n\n")
+        if self._html_file:
+            self._html_file.write(self.HTML_HEAD.format(
+                title=html_lib.escape(f"Transcript: {channel_name}"),
+                meta=html_lib.escape(f"Closed by {closed_by} on {closed_at:%Y-%m-%d %H:%M:%S}")
+            ).encode("utf-8"))
+    
+    def _write(self, text: str):
+        self._buffer.append(text)
+        self._buffered += len(text)
+        if self._buffered >= self.BUFFER_CHARS:
+            self._drain()
+    
+    def _drain(self):
+        chunk = "".join(self._buffer).encode("utf-8")
+        self.digest.update(chunk)
+        self._text.write(chunk)
+        self._buffer.clear()
+        if self._html_file:
+            self._html_file.write("".join(self._html_buffer).encode("utf-8"))
+            self._html_buffer.clear()
+        self._buffered = 0
+    
+    def add_message(self, msg: discord.Message):
+        """Appends one message: content, edit time, attachments and embeds."""
+        self.message_count += 1
+        self.participants[msg.author.id] = str(msg.author)
+        self.terms.update(TranscriptArchive.tokenize(msg.content))
+        timestamp = msg.created_at.strftime('%Y-%m-%d %H:%M:%S')
+        edited = f" (edited {msg.edited_at:%Y-%m-%d %H:%M:%S})" if msg.edited_at else ""
+        
+        if self._html_file:
+            self._html_buffer.append(self._render_html(msg, timestamp, edited))
+        
+        self._write(f"[{timestamp}] {msg.author}: {msg.content}{edited}\n")
+        for attachment in msg.attachments:
+            self._write(f"    [attachment] {attachment.filename} ({attachment.size} bytes): {attachment.url}\n")
+        for embed in msg.embeds:
+            parts = [p for p in (embed.title, embed.description) if p]
+            parts += [f"{field.name}: {field.value}" for field in embed.fields]
+            self._write("    [embed] " + " | ".join(parts).replace("\n", " ") + "\n")
+            self.terms.update(TranscriptArchive.tokenize(" ".join(parts)))
+    
+    @staticmethod
+    def _render_html(msg: discord.Message, timestamp: str, edited: str) -> str:
+        esc = html_lib.escape
+        out = [f'<div class="m"><span class="a">{esc(str(msg.author))}</span> '
+               f'<span class="t">{timestamp}{esc(edited)}</span><div>{esc(msg.content)}</div>']
+        for attachment in msg.attachments:
+            out.append(f'<div><a href="{esc(attachment.url)}">📎 {esc(attachment.filename)}</a></div>')
+        for embed in msg.embeds:
+            body = "".join(f"<div><b>{esc(str(p))}</b></div>" for p in (embed.title,) if p)
+            body += f"<div>{esc(embed.description)}</div>" if embed.description else ""
+            body += "".join(f"<div><b>{esc(f.name)}</b>: {esc(f.value)}</div>" for f in embed.fields)
+            out.append(f'<div class="e">{body}</div>')
+        out.append("</div>\n")
+        return "".join(out)
+    
+    def finish(self) -> List[discord.File]:
+        """Closes the streams and returns the transcript file(s), rewound for upload."""
+        self._drain()
+        if self.compress:
+            self._text.close()
+        self._text_file.seek(0)
+        name = f"transcript-{self.channel_name}.txt" + (".gz" if self.compress else "")
+        files = [discord.File(self._text_file, filename=name)]
+        if self._html_file:
+            self._html_file.write(b"</body></html>\n")
+            self._html_file.seek(0)
+            files.append(discord.File(self._html_file, filename=f"transcript-{self.channel_name}.html"))
+        return files
+    
+    def copy_text(self, destination, compress: bool):
+        """Copies the finished text transcript into an open binary file, gzipped if asked.
+        Call after finish(); the stream is rewound afterwards for upload."""
+        self._text_file.seek(0)
+        if compress and not self.compress:
+            with gzip.GzipFile(fileobj=destination, mode="wb") as packed:
+                shutil.copyfileobj(self._text_file, packed)
+        elif not compress and self.compress:
+            with gzip.GzipFile(fileobj=self._text_file, mode="rb") as unpacked:
+                shutil.copyfileobj(unpacked, destination)
+        else:
+            shutil.copyfileobj(self._text_file, destination)
+        self._text_file.seek(0)
+    
+    def close(self):
+        self._text_file.close()
+        if self._html_file:
+            self._html_file.close()
+
+class TranscriptArchive:
+    """Per-guild archive of closed-ticket transcripts. Each transcript is gzipped and stored
+    under the SHA-256 of its text, so identical transcripts share a file. catalog.jsonl holds
+    one line per ticket (metadata plus its distinct words) and is replayed into in-memory
+    posting lists on first use. Closing a ticket appends one line, so indexing is incremental.
+    Searches intersect the posting lists of the query terms, smallest first."""
+    
+    TOKEN_PATTERN = re.compile(r"\w{2,40}")
+    MENTION_PATTERN = re.compile(r"<@!?(\d+)>|(\d{15,20})")
+    
+    _archives: Dict[int, "TranscriptArchive"] = {}
+    
+    def __init__(self, guild_id: int):
+        self.directory = os.path.join(TRANSCRIPT_ARCHIVE_DIRECTORY, str(guild_id))
+        self.catalog_path = os.path.join(self.directory, "catalog.jsonl")
+        self.tickets: List[dict] = []  # ticket number n is tickets[n - 1]
+        self.postings: Dict[str, array.array] = {}
+        self.lock = asyncio.Lock()
+        self.loaded = False
+    
+    @staticmethod
+    async def for_guild(guild_id: int) -> "TranscriptArchive":
+        """Returns a guild's archive, replaying its catalog in a worker thread on first use."""
+        archive = TranscriptArchive._archives.get(guild_id)
+        if archive is None:
+            archive = TranscriptArchive._archives[guild_id] = TranscriptArchive(guild_id)
+        if not archive.loaded:
+            async with archive.lock:
+                if not archive.loaded:
+                    await asyncio.to_thread(archive._load)
+                    archive.loaded = True
+        return archive
+    
+    @staticmethod
+    def tokenize(text: str) -> set:
+        return set(TranscriptArchive.TOKEN_PATTERN.findall(text.casefold()))
+    
+    @staticmethod
+    def _entry_keys(entry: dict, terms: List[str]) -> List[str]:
+        """Index keys for a ticket: words, participant IDs and names, closing day and month."""
+        closed = datetime.datetime.fromtimestamp(entry["closed_at"])
+        keys = list(terms)
+        for user_id, name in entry["participants"].items():
+            keys.append(f"u:{user_id}")
+            keys.append(f"n:{name.split('#')[0].casefold()}")
+        keys.append(f"d:{closed:%Y-%m-%d}")
+        keys.append(f"m:{closed:%Y-%m}")
+        return keys
+    
+    def _index(self, entry: dict, terms: List[str]):
+        self.tickets.append(entry)
+        for key in set(self._entry_keys(entry, terms)):
+            postings = self.postings.get(key)
+            if postings is None:
+                postings = self.postings[key] = array.array("I")
+            postings.append(entry["ticket"])
+    
+    def _load(self):
+        try:
+            with open(self.catalog_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # torn final line from a crash mid-append
+                    self._index(record["entry"], record["terms"])
+        except FileNotFoundError:
+            pass
+    
+    def blob_path(self, digest: str) -> str:
+        return os.path.join(self.directory, "objects", digest[:2], f"{digest}.txt.gz")
+    
+    def _write(self, writer: TranscriptWriter, entry: dict, terms: List[str]):
+        """Stores the blob (unless an identical transcript already did) and appends the catalog
+        line. Runs in a worker thread, directory creation included."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.blob_path(entry["digest"])
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.tmp"
+            with open(temp_path, "wb") as f:
+                writer.copy_text(f, compress=True)
+            os.replace(temp_path, path)
+        
+        with open(self.catalog_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"entry": entry, "terms": terms}) + "\n")
+    
+    async def add(self, writer: TranscriptWriter) -> int:
+        """Archives a finished transcript and indexes it. Returns the ticket number."""
+        async with self.lock:
+            entry = {
+                "ticket": len(self.tickets) + 1,
+                "channel": writer.channel_name,
+                "closed_by": writer.closed_by,
+                "closed_at": writer.closed_at.timestamp(),
+                "messages": writer.message_count,
+                "digest": writer.digest.hexdigest(),
+                "participants": {str(k): v for k, v in writer.participants.items()}
+            }
+            terms = sorted(writer.terms)
+            await asyncio.to_thread(self._write, writer, entry, terms)
+            self._index(entry, terms)
+            return entry["ticket"]
+    
+    def parse_query(self, query: str) -> tuple:
+        """Splits a query into index keys and plain words. Supports from:<name|id|mention> and
+        date:YYYY-MM[-DD] filters alongside free text."""
+        keys, words = [], []
+        for token in query.split():
+            lowered = token.casefold()
+            if lowered.startswith("from:") or TranscriptArchive.MENTION_PATTERN.fullmatch(lowered):
+                value = lowered[5:] if lowered.startswith("from:") else lowered
+                mention = TranscriptArchive.MENTION_PATTERN.fullmatch(value)
+                if mention:
+                    keys.append(f"u:{mention.group(1) or mention.group(2)}")
+                else:
+                    keys.append(f"n:{value.split('#')[0]}")
+                    words.append(f"] {value.split('#')[0]}")  # lets the snippet pick that user's line
+            elif lowered.startswith("date:"):
+                value = lowered[5:]
+                keys.append(f"d:{value}" if len(value) == 10 else f"m:{value}")
+            else:
+                found = TranscriptArchive.tokenize(token)
+                keys.extend(found)
+                words.extend(found)
+        return keys, words
+    
+    def search(self, query: str, limit: int = 10) -> tuple:
+        """Returns (total matches, newest matching ticket entries up to limit, query words)."""
+        keys, words = self.parse_query(query)
+        if not keys:
+            return 0, [], words
+        lists = [self.postings.get(key) for key in keys]
+        if any(postings is None for postings in lists):
+            return 0, [], words
+        
+        lists.sort(key=len)
+        matches = set(lists[0])
+        for postings in lists[1:]:
+            matches.intersection_update(postings)
+            if not matches:
+                break
+        newest = sorted(matches, reverse=True)[:limit]
+        return len(matches), [self.tickets[n - 1] for n in newest], words
+    
+    def snippet(self, entry: dict, words: List[str], width: int = 160) -> str:
+        """First transcript line containing a query word (or the first message line)."""
+        try:
+            with gzip.open(self.blob_path(entry["digest"]), "rt", encoding="utf-8") as f:
+                for line in f:
+                    if not line.startswith("["):
+                        continue
+                    lowered = line.casefold()
+                    if not words or any(word in lowered for word in words):
+                        return line.strip()[:width]
+        except (OSError, EOFError):
+            pass
+        return ""
+
+class TicketRegistry:
+    """Open and recently closed tickets, one per (guild, user, panel). Records live in the guild
+    partition (ticket_system.active_tickets and ticket_reopen.reopenable_channels, keyed by
+    "user:panel") so they survive restarts. The channel -> owner index, in-flight creations and
+    pending deletions of closed channels are kept in memory."""
+    
+    _creating: set = set()  # (guild_id, user_id, panel) while its channel is being created
+    _indexes: Dict[int, tuple] = {}  # guild_id -> (active, reopenable, {channel_id: owner key})
+    _expiries: Dict[int, tuple] = {}  # closed channel_id -> (guild_id, delete-at timestamp)
+    
+    @staticmethod
+    def owner_key(user_id: int, panel: str) -> str:
+        return f"{user_id}:{panel}"
+    
+    @staticmethod
+    def _records(guild_id: int) -> tuple:
+        db = PlatinumCoreDB.load_guild(guild_id)
+        reopen = db.setdefault("ticket_reopen", {"enabled": True, "grace_period_minutes": 10})
+        active = db.setdefault("ticket_system", {}).setdefault("active_tickets", {})
+        reopenable = reopen.setdefault("reopenable_channels", {})
+        return reopen, active, reopenable
+    
+    @staticmethod
+    def _channel_index(guild_id: int) -> Dict[int, str]:
+        """Maps ticket channels to their owner key; rebuilt whenever the partition is reloaded."""
+        _, active, reopenable = TicketRegistry._records(guild_id)
+        cached = TicketRegistry._indexes.get(guild_id)
+        if cached and cached[0] is active and cached[1] is reopenable:
+            return cached[2]
+        
+        channels = {int(record["channel"]): key for key, record in active.items()}
+        channels.update({int(record["channel"]): key for key, record in reopenable.items()})
+        TicketRegistry._indexes[guild_id] = (active, reopenable, channels)
+        return channels
+    
+    @staticmethod
+    def invalidate(guild_id: Optional[int] = None):
+        if guild_id is None:
+            TicketRegistry._indexes.clear()
+        else:
+            TicketRegistry._indexes.pop(guild_id, None)
+    
+    @staticmethod
+    def begin(guild_id: int, user_id: int, panel: str) -> bool:
+        """Claims the creation slot for (guild, user, panel). False while one is already in flight."""
+        key = (guild_id, user_id, panel)
+        if key in TicketRegistry._creating:
+            return False
+        TicketRegistry._creating.add(key)
+        return True
+    
+    @staticmethod
+    def end(guild_id: int, user_id: int, panel: str):
+        TicketRegistry._creating.discard((guild_id, user_id, panel))
+    
+    @staticmethod
+    def open_channel(guild: discord.Guild, user_id: int, panel: str) -> Optional[discord.TextChannel]:
+        """The user's open ticket on this panel, dropping the record if its channel is gone."""
+        _, active, _ = TicketRegistry._records(guild.id)
+        key = TicketRegistry.owner_key(user_id, panel)
+        record = active.get(key)
+        if record is None:
+            return None
+        
+        channel = guild.get_channel(int(record["channel"]))
+        if channel is None:
+            TicketRegistry.forget_channel(guild.id, int(record["channel"]))
+        return channel
+    
+    @staticmethod
+    def reopenable_channel(guild: discord.Guild, user_id: int, panel: str) -> Optional[discord.TextChannel]:
+        """The user's closed ticket on this panel if it is still inside the grace period."""
+        reopen, _, reopenable = TicketRegistry._records(guild.id)
+        record = reopenable.get(TicketRegistry.owner_key(user_id, panel))
+        if record is None or not reopen.get("enabled", True):
+            return None
+        
+        channel = guild.get_channel(int(record["channel"]))
+        if channel is None:
+            TicketRegistry.forget_channel(guild.id, int(record["channel"]))
+            return None
+        if time.time() > record["closed_at"] + reopen.get("grace_period_minutes", 10) * 60:
+            return None  # the sweep deletes it shortly
+        return channel
+    
+    @staticmethod
+    def register(guild_id: int, user_id: int, panel: str, channel_id: int):
+        """Records a newly created or reopened ticket as open."""
+        _, active, reopenable = TicketRegistry._records(guild_id)
+        key = TicketRegistry.owner_key(user_id, panel)
+        if reopenable.pop(key, None) is not None:
+            TicketRegistry._expiries.pop(channel_id, None)
+            PlatinumCoreDB.commit_guild(guild_id, "ticket_reopen", "reopenable_channels")
+        
+        active[key] = {"channel": channel_id, "opened_at": time.time()}
+        TicketRegistry._channel_index(guild_id)[channel_id] = key
+        PlatinumCoreDB.commit_guild(guild_id, "ticket_system", "active_tickets")
+    
+    @staticmethod
+    def owner_of(guild_id: int, channel_id: int) -> Optional[int]:
+        key = TicketRegistry._channel_index(guild_id).get(channel_id)
+        return int(key.split(":", 1)[0]) if key else None
+    
+    @staticmethod
+    def close(guild_id: int, channel_id: int) -> Optional[float]:
+        """Marks a ticket closed. Returns when the channel will be deleted if it can still be
+        reopened, or None if it should be deleted now (reopening disabled or untracked channel)."""
+        reopen, active, reopenable = TicketRegistry._records(guild_id)
+        key = TicketRegistry._channel_index(guild_id).get(channel_id)
+        grace = reopen.get("grace_period_minutes", 10) * 60
+        if key is None or key not in active or not reopen.get("enabled", True) or grace <= 0:
+            TicketRegistry.forget_channel(guild_id, channel_id)
+            return None
+        
+        del active[key]
+        closed_at = time.time()
+        reopenable[key] = {"channel": channel_id, "closed_at": closed_at}
+        TicketRegistry._expiries[channel_id] = (guild_id, closed_at + grace)
+        PlatinumCoreDB.commit_guild(guild_id, "ticket_system", "active_tickets")
+        PlatinumCoreDB.commit_guild(guild_id, "ticket_reopen", "reopenable_channels")
+        return closed_at + grace
+    
+    @staticmethod
+    def forget_channel(guild_id: int, channel_id: int):
+        """Drops every record of a ticket channel (deleted, expired or removed by hand)."""
+        TicketRegistry._expiries.pop(channel_id, None)
+        key = TicketRegistry._channel_index(guild_id).pop(channel_id, None)
+        if key is None:
+            return
+        
+        _, active, reopenable = TicketRegistry._records(guild_id)
+        if int(active.get(key, {}).get("channel", 0)) == channel_id:
+            del active[key]
+            PlatinumCoreDB.commit_guild(guild_id, "ticket_system", "active_tickets")
+        if int(reopenable.get(key, {}).get("channel", 0)) == channel_id:
+            del reopenable[key]
+            PlatinumCoreDB.commit_guild(guild_id, "ticket_reopen", "reopenable_channels")
+    
+    @staticmethod
+    def restore(guilds: List[discord.Guild]):
+        """Re-schedules deletion of closed tickets after a restart."""
+        for guild in guilds:
+            reopen, _, reopenable = TicketRegistry._records(guild.id)
+            grace = reopen.get("grace_period_minutes", 10) * 60
+            for record in reopenable.values():
+                TicketRegistry._expiries[int(record["channel"])] = (guild.id, record["closed_at"] + grace)
+    
+    @staticmethod
+    async def sweep(bot: commands.Bot):
+        """Deletes closed ticket channels whose reopen window has passed."""
+        now = time.time()
+        for channel_id, (guild_id, delete_at) in list(TicketRegistry._expiries.items()):
+            if delete_at > now:
+                continue
+            
+            # Only channels still recorded as closed; a reopened ticket is left alone
+            _, _, reopenable = TicketRegistry._records(guild_id)
+            key = TicketRegistry._channel_index(guild_id).get(channel_id)
+            still_closed = key in reopenable and int(reopenable[key]["channel"]) == channel_id
+            TicketRegistry._expiries.pop(channel_id, None)
+            if not still_closed:
+                continue
+            
+            TicketRegistry.forget_channel(guild_id, channel_id)
+            guild = bot.get_guild(guild_id)
+            channel = guild.get_channel(channel_id) if guild else None
+            if channel is None:
+                continue
+            try:
+                await channel.delete(reason="Ticket reopen window expired")
+            except discord.HTTPException as e:
+                print(f"[TICKETS] Failed to delete closed ticket {channel_id}: {e}")
+
+class _TicketJob:
+    __slots__ = ("priority", "seq", "create", "future", "enqueued", "attempts")
+    
+    def __init__(self, priority: int, seq: int, create):
+        self.priority = priority
+        self.seq = seq
+        self.create = create
+        self.future = asyncio.get_running_loop().create_future()
+        self.enqueued = time.monotonic()
+        self.attempts = 0
+    
+    def __lt__(self, other: "_TicketJob") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+class _GuildTicketQueue:
+    __slots__ = ("heap", "workers", "bucket")
+    
+    def __init__(self):
+        self.heap: List[_TicketJob] = []
+        self.workers = 0
+        self.bucket = _TokenBucket(TICKET_CREATE_RATE, time.monotonic())
+
+class TicketCreationQueue:
+    """Per-guild queue for ticket channel creation. Staff tickets go first, everyone else in
+    click order. At most TICKET_CREATE_CONCURRENCY creations per guild run at once, paced to
+    TICKET_CREATE_RATE per second; a 429 pauses the guild's queue and the creation is retried."""
+    
+    STAFF_PRIORITY = 0
+    MEMBER_PRIORITY = 1
+    MAX_RETRIES = 3
+    
+    _queues: Dict[int, _GuildTicketQueue] = {}
+    _seq = 0
+    # Running workers; the loop only keeps weak references to tasks
+    _workers: set = set()
+    
+    # Time from click to channel, for /stats
+    wait_times: deque = deque(maxlen=1000)
+    stats = {"created": 0, "failed": 0, "retried": 0, "max_depth": 0}
+    
+    @staticmethod
+    def submit(guild_id: int, priority: int, create) -> tuple:
+        """Queues create (a coroutine function returning the channel). Returns (future, position):
+        position is its place in line, 0 when a worker starts it right away."""
+        queue = TicketCreationQueue._queues.get(guild_id)
+        if queue is None:
+            queue = TicketCreationQueue._queues[guild_id] = _GuildTicketQueue()
+        
+        TicketCreationQueue._seq += 1
+        job = _TicketJob(priority, TicketCreationQueue._seq, create)
+        
+        # A free worker takes the job directly, so the heap only ever holds jobs that are waiting
+        position = 0
+        if queue.workers < TICKET_CREATE_CONCURRENCY:
+            queue.workers += 1
+            worker = asyncio.create_task(TicketCreationQueue._worker(guild_id, queue, job))
+            TicketCreationQueue._workers.add(worker)
+            worker.add_done_callback(TicketCreationQueue._workers.discard)
+        else:
+            heapq.heappush(queue.heap, job)
+            position = sum(1 for other in queue.heap if other < job) + 1
+        
+        stats = TicketCreationQueue.stats
+        stats["max_depth"] = max(stats["max_depth"], len(queue.heap))
+        return job.future, position
+    
+    @staticmethod
+    async def _worker(guild_id: int, queue: _GuildTicketQueue, job: _TicketJob):
+        try:
+            while job is not None:
+                while True:
+                    wait = queue.bucket.delay(time.monotonic())
+                    if wait <= 0:
+                        break
+                    await asyncio.sleep(wait)
+                queue.bucket.tokens -= 1
+                await TicketCreationQueue._run(queue, job)
+                job = heapq.heappop(queue.heap) if queue.heap else None
+        finally:
+            queue.workers -= 1
+            if not queue.workers and not queue.heap:
+                TicketCreationQueue._queues.pop(guild_id, None)
+    
+    @staticmethod
+    async def _run(queue: _GuildTicketQueue, job: _TicketJob):
+        stats = TicketCreationQueue.stats
+        job.attempts += 1
+        try:
+            channel = await job.create()
+        except (discord.RateLimited, discord.HTTPException) as e:
+            if isinstance(e, discord.HTTPException) and e.status != 429:
+                return TicketCreationQueue._fail(job, e)
+            if job.attempts > TicketCreationQueue.MAX_RETRIES:
+                return TicketCreationQueue._fail(job, e)
+            # Back to the front of the line once the guild's route unblocks
+            stats["retried"] += 1
+            queue.bucket.blocked_until = time.monotonic() + getattr(e, "retry_after", 1.0)
+            heapq.heappush(queue.heap, job)
+            return
+        except Exception as e:
+            return TicketCreationQueue._fail(job, e)
+        
+        stats["created"] += 1
+        TicketCreationQueue.wait_times.append(time.monotonic() - job.enqueued)
+        if not job.future.done():
+            job.future.set_result(channel)
+    
+    @staticmethod
+    def _fail(job: _TicketJob, error: Exception):
+        print(f"[TICKETS] Channel creation failed: {error}")
+        TicketCreationQueue.stats["failed"] += 1
+        if not job.future.done():
+            job.future.set_exception(error)
+    
+    @staticmethod
+    def depth() -> int:
+        return sum(len(queue.heap) for queue in TicketCreationQueue._queues.values())
+    
+    @staticmethod
+    def percentiles() -> tuple:
+        """p50 and p99 click-to-channel time in seconds over recent tickets."""
+        times = sorted(TicketCreationQueue.wait_times)
+        if not times:
+            return 0.0, 0.0
+        return times[len(times) // 2], times[min(len(times) - 1, int(len(times) * 0.99))]
+
 class PlatinumTicketActions(discord.ui.View):
     """Ticket control panel."""
     
-    def __init__(self):
+    def __init__(self, guild_id: Optional[int] = None):
         super().__init__(timeout=None)
         
-        db = PlatinumCoreDB.load_full_database()
-        custom = db.get("ticket_customization", {})
+        # The persistent instance registered at startup has no guild and uses the default labels
+        custom = ViewTemplates.ticket_actions(guild_id)
         
         # Customizable claim button
         self.claim_btn = discord.ui.Button(
@@ -610,20 +3478,9 @@ class PlatinumTicketActions(discord.ui.View):
         self.add_item(self.close_btn)
     
     async def claim_callback(self, interaction: discord.Interaction):
-        db = PlatinumCoreDB.load_full_database()
-        custom = db.get("ticket_customization", {})
-        
-        # Check permissions
-        user_id = interaction.user.id
-        is_staff = (
-            user_id in db["permissions_tiers"]["regular_mods"] or
-            user_id in db["permissions_tiers"]["trial_mods"] or
-            user_id in db["permissions_tiers"]["senior_mods"] or
-            user_id in db["permissions_tiers"]["system_admins"] or
-            user_id == interaction.guild.owner_id
-        )
+        custom = ViewTemplates.ticket_actions(interaction.guild.id)
         
-        if not is_staff:
+        if not PermissionService.has(interaction.user, PermissionService.STAFF):
             return await interaction.response.send_message("❌ You need staff permissions to claim tickets.", ephemeral=True)
         
         self.claim_btn.label = f"Claimed by {interaction.user.name}"
@@ -636,8 +3493,8 @@ class PlatinumTicketActions(discord.ui.View):
         await interaction.response.send_message(claim_msg)
     
     async def close_callback(self, interaction: discord.Interaction):
-        db = PlatinumCoreDB.load_full_database()
-        custom = db.get("ticket_customization", {})
+        db = PlatinumCoreDB.load_guild(interaction.guild.id)
+        custom = ViewTemplates.ticket_actions(interaction.guild.id)
         
         confirm_view = discord.ui.View(timeout=60)
         confirm_btn = discord.ui.Button(label="Confirm Close", style=discord.ButtonStyle.danger, emoji="⚠️")
@@ -646,27 +3503,43 @@ class PlatinumTicketActions(discord.ui.View):
             await itn.response.send_message("📁 Generating transcript and closing...")
             
             # Generate transcript
-            transcript = f"=== TICKET TRANSCRIPT ===\nChannel: {itn.channel.name}\nClosed by: {itn.user}\nDate: {datetime.datetime.now()}\n\n"
-            
-            async for msg in itn.channel.history(limit=None, oldest_first=True):
-                timestamp = msg.created_at.strftime('%Y-%m-%d %H:%M:%S')
-                transcript += f"[{timestamp}] {msg.author}: {msg.content}\n"
+            writer = TranscriptWriter(itn.channel.name, str(itn.user))
+            try:
+                async for msg in itn.channel.history(limit=None, oldest_first=True):
+                    writer.add_message(msg)
+                files = writer.finish()
+                archive = await TranscriptArchive.for_guild(itn.guild.id)
+                ticket_number = await archive.add(writer)
+                
+                # Send to transcript channel
+                transcript_channel_id = db.get("transcript_channel") or db.get("channels", {}).get("transcripts")
+                if transcript_channel_id:
+                    channel = itn.guild.get_channel(int(transcript_channel_id))
+                    if channel:
+                        log_embed = discord.Embed(
+                            title="📋 Ticket Transcript",
+                            description=f"Ticket: {itn.channel.name} (archive #{ticket_number})\n"
+                                        f"Closed by: {itn.user.mention}\nMessages: {writer.message_count}",
+                            color=COLOR_PLATINUM_LOGS,
+                            timestamp=datetime.datetime.now()
+                        )
+                        await channel.send(embed=log_embed, files=files)
+                        
+                        stats = PlatinumCoreDB.load_full_database()["system_stats"]
+                        stats["transcripts_sent"] = stats.get("transcripts_sent", 0) + 1
+                        PlatinumCoreDB.commit("system_stats", "transcripts_sent")
+            finally:
+                writer.close()
             
-            # Send to transcript channel
-            transcript_channel_id = db.get("transcript_channel") or db.get("channels", {}).get("transcripts")
-            if transcript_channel_id:
-                channel = itn.guild.get_channel(int(transcript_channel_id))
-                if channel:
-                    file_data = io.BytesIO(transcript.encode("utf-8"))
-                    discord_file = discord.File(file_data, filename=f"transcript-{itn.channel.name}.txt")
-                    
-                    log_embed = discord.Embed(
-                        title="📋 Ticket Transcript",
-                        description=f"Ticket: {itn.channel.name}\nClosed by: {itn.user.mention}",
-                        color=COLOR_PLATINUM_LOGS,
-                        timestamp=datetime.datetime.now()
-                    )
-                    await channel.send(embed=log_embed, file=discord_file)
+            # Inside the reopen grace period the channel is hidden from its owner instead of deleted
+            owner_id = TicketRegistry.owner_of(itn.guild.id, itn.channel.id)
+            delete_at = TicketRegistry.close(itn.guild.id, itn.channel.id)
+            if delete_at is not None:
+                owner = itn.guild.get_member(owner_id)
+                if owner:
+                    await itn.channel.set_permissions(owner, overwrite=None, reason=f"Ticket closed by {itn.user}")
+                await itn.channel.send(f"🔒 Ticket closed. The owner can reopen it from the panel until <t:{int(delete_at)}:t>.")
+                return
             
             await asyncio.sleep(3)
             await itn.channel.delete(reason=f"Ticket closed by {itn.user}")
@@ -674,7 +3547,7 @@ class PlatinumTicketActions(discord.ui.View):
         confirm_btn.callback = do_close
         confirm_view.add_item(confirm_btn)
         
-        confirmation_text = custom.get("close_confirmation", "⚠️ This will permanently delete the channel. Are you sure?")
+        confirmation_text = custom.get("close_confirmation", "⚠️ This will close the ticket. The owner can reopen it from the panel during the reopen grace period, after which the channel is deleted. Are you sure?")
         await interaction.response.send_message(confirmation_text, view=confirm_view, ephemeral=True)
 
 class PlatinumDynamicButton(discord.ui.Button):
@@ -690,31 +3563,59 @@ class PlatinumDynamicButton(discord.ui.Button):
         self.category_id = category_id
     
     async def callback(self, interaction: discord.Interaction):
-        await interaction.response.defer(ephemeral=True)
+        guild, user, panel = interaction.guild, interaction.user, self.custom_id
+        
+        # Claimed before the first await, so repeated clicks never start a second creation
+        if not TicketRegistry.begin(guild.id, user.id, panel):
+            return await interaction.response.send_message("⏳ Your ticket is already being created.", ephemeral=True)
+        try:
+            await interaction.response.defer(ephemeral=True)
+            await self.open_ticket(interaction, guild, user, panel)
+        finally:
+            TicketRegistry.end(guild.id, user.id, panel)
+    
+    async def open_ticket(self, interaction: discord.Interaction, guild: discord.Guild, user: discord.Member, panel: str):
+        existing = TicketRegistry.open_channel(guild, user.id, panel)
+        if existing:
+            return await interaction.followup.send(f"ℹ️ You already have an open ticket: {existing.mention}")
+        
+        closed = TicketRegistry.reopenable_channel(guild, user.id, panel)
+        if closed:
+            await closed.set_permissions(user, view_channel=True, send_messages=True, attach_files=True, reason="Ticket reopened")
+            TicketRegistry.register(guild.id, user.id, panel, closed.id)
+            await closed.send(f"🔓 Ticket reopened by {user.mention}.")
+            return await interaction.followup.send(f"✅ Ticket reopened: {closed.mention}")
         
-        guild = interaction.guild
         category = guild.get_channel(self.category_id)
         
         if not category:
             return await interaction.followup.send("❌ Category not found.")
         
-        db = PlatinumCoreDB.load_full_database()
-        custom = db.get("ticket_customization", {})
+        custom = ViewTemplates.ticket_actions(guild.id)
         
         overwrites = {
             guild.default_role: discord.PermissionOverwrite(view_channel=False),
-            interaction.user: discord.PermissionOverwrite(view_channel=True, send_messages=True, attach_files=True),
+            user: discord.PermissionOverwrite(view_channel=True, send_messages=True, attach_files=True),
             guild.me: discord.PermissionOverwrite(view_channel=True, send_messages=True, manage_channels=True)
         }
         
-        channel_name = f"{self.label.replace(' ', '-').lower()}-{interaction.user.name}"
-        ticket_channel = await guild.create_text_channel(
+        channel_name = f"{self.label.replace(' ', '-').lower()}-{user.name}"
+        priority = TicketCreationQueue.STAFF_PRIORITY if PermissionService.has(user, PermissionService.STAFF) else TicketCreationQueue.MEMBER_PRIORITY
+        created, position = TicketCreationQueue.submit(guild.id, priority, lambda: guild.create_text_channel(
             name=channel_name,
             category=category,
             overwrites=overwrites
-        )
+        ))
+        if position:
+            await interaction.edit_original_response(content=f"🕒 You're #{position} in the ticket queue. This message will update when your channel is ready.")
+        
+        try:
+            ticket_channel = await created
+        except Exception:
+            return await interaction.edit_original_response(content="❌ Could not create your ticket right now, please try again shortly.")
+        TicketRegistry.register(guild.id, user.id, panel, ticket_channel.id)
         
-        welcome_text = custom.get("welcome_message", "Welcome {user}! A staff member will assist you shortly.").format(user=interaction.user.mention)
+        welcome_text = custom.get("welcome_message", "Welcome {user}! A staff member will assist you shortly.").format(user=user.mention)
         
         welcome_embed = discord.Embed(
             title=f"🎫 {self.label}",
@@ -722,12 +3623,15 @@ class PlatinumDynamicButton(discord.ui.Button):
             color=COLOR_PLATINUM_MAIN
         )
         
-        await ticket_channel.send(embed=welcome_embed, view=PlatinumTicketActions())
-        await interaction.followup.send(f"✅ Ticket created: {ticket_channel.mention}")
+        await ticket_channel.send(embed=welcome_embed, view=PlatinumTicketActions(guild.id))
+        try:
+            await interaction.edit_original_response(content=f"✅ Ticket created: {ticket_channel.mention}")
+        except discord.HTTPException:
+            pass  # the interaction token expired during a long queue; the channel exists regardless
         
         # Update stats
-        db["system_stats"]["total_tickets"] += 1
-        PlatinumCoreDB.save_database(db)
+        PlatinumCoreDB.load_full_database()["system_stats"]["total_tickets"] += 1
+        PlatinumCoreDB.commit("system_stats", "total_tickets")
 
 class PlatinumPanelView(discord.ui.View):
     """Ticket panel view."""
@@ -735,26 +3639,322 @@ class PlatinumPanelView(discord.ui.View):
     def __init__(self, button_list: list):
         super().__init__(timeout=None)
         
-        for btn in button_list:
-            color = btn.get("hex2", "grey").lower()
-            cat_id = btn.get("cat", 0)
-            
-            style = discord.ButtonStyle.secondary
-            if color == "blue": style = discord.ButtonStyle.primary
-            elif color == "green": style = discord.ButtonStyle.success
-            elif color == "red": style = discord.ButtonStyle.danger
-            
-            self.add_item(PlatinumDynamicButton(
-                label=btn.get("label", "Ticket"),
-                emoji=btn.get("emoji", "🎫"),
-                style=style,
-                category_id=int(cat_id)
-            ))
+        for btn in button_list:
+            color = btn.get("hex2", "grey").lower()
+            cat_id = btn.get("cat", 0)
+            
+            style = discord.ButtonStyle.secondary
+            if color == "blue": style = discord.ButtonStyle.primary
+            elif color == "green": style = discord.ButtonStyle.success
+            elif color == "red": style = discord.ButtonStyle.danger
+            
+            self.add_item(PlatinumDynamicButton(
+                label=btn.get("label", "Ticket"),
+                emoji=btn.get("emoji", "🎫"),
+                style=style,
+                category_id=int(cat_id)
+            ))
+
+class PanelRegistry:
+    """Ticket panels by message ID. Records live in the global database as
+    ticket_panels[guild][message] = {"channel_id", "buttons"}, so a reload is a single edit of a
+    known message. Panels saved before channel IDs were recorded are located once and backfilled.
+    Each panel's persistent view is bound to its message and rebuilt only when its buttons change."""
+    
+    _index: Optional[tuple] = None  # (ticket_panels dict it was built from, {message_id: guild key})
+    _views: Dict[int, tuple] = {}  # message_id -> (buttons fingerprint, registered view)
+    
+    @staticmethod
+    def _panels() -> dict:
+        return PlatinumCoreDB.load_full_database().setdefault("ticket_panels", {})
+    
+    @staticmethod
+    def _message_index() -> Dict[int, str]:
+        panels = PanelRegistry._panels()
+        if PanelRegistry._index is None or PanelRegistry._index[0] is not panels:
+            index = {int(message_id): guild_key for guild_key, guild_panels in panels.items() for message_id in guild_panels}
+            PanelRegistry._index = (panels, index)
+        return PanelRegistry._index[1]
+    
+    @staticmethod
+    def invalidate():
+        PanelRegistry._index = None
+    
+    @staticmethod
+    def get(message_id: int) -> Optional[tuple]:
+        """(guild_id, panel record) for a panel message, or None."""
+        guild_key = PanelRegistry._message_index().get(message_id)
+        if guild_key is None:
+            return None
+        return int(guild_key), PanelRegistry._panels()[guild_key][str(message_id)]
+    
+    @staticmethod
+    def guild_panels(guild_id: int) -> Dict[str, dict]:
+        return PanelRegistry._panels().get(str(guild_id), {})
+    
+    @staticmethod
+    def view_for(message_id: int, buttons: list) -> tuple:
+        """The panel's view and whether it was newly built. A view whose buttons changed is stopped,
+        which drops it from the bot's persistent view store."""
+        fingerprint = ViewTemplates.fingerprint(buttons)
+        current = PanelRegistry._views.get(message_id)
+        if current is not None and current[0] == fingerprint:
+            return current[1], False
+        if current is not None:
+            current[1].stop()
+        view = PlatinumPanelView(buttons)
+        PanelRegistry._views[message_id] = (fingerprint, view)
+        return view, True
+    
+    @staticmethod
+    def register_views(bot: commands.Bot) -> int:
+        """Registers a persistent view for every panel that lacks a current one. Safe to call
+        repeatedly: unchanged panels are skipped. Returns how many views were (re)registered."""
+        added = 0
+        live = set()
+        for guild_panels in PanelRegistry._panels().values():
+            for message_id, record in guild_panels.items():
+                live.add(int(message_id))
+                if not record.get("buttons"):
+                    continue
+                view, built = PanelRegistry.view_for(int(message_id), record.get("buttons", []))
+                if built:
+                    bot.add_view(view, message_id=int(message_id))
+                    added += 1
+        
+        for message_id in [message_id for message_id in PanelRegistry._views if message_id not in live]:
+            PanelRegistry._views.pop(message_id)[1].stop()
+        return added
+    
+    @staticmethod
+    def register(guild_id: int, channel_id: int, message_id: int, buttons: list, view: Optional[discord.ui.View] = None):
+        """Records a posted panel; view is the one it was sent with, if any."""
+        panels = PanelRegistry._panels()
+        panels.setdefault(str(guild_id), {})[str(message_id)] = {"channel_id": channel_id, "buttons": buttons}
+        PanelRegistry._message_index()[message_id] = str(guild_id)
+        if view is not None:
+            PanelRegistry._views[message_id] = (ViewTemplates.fingerprint(buttons), view)
+        PlatinumCoreDB.commit("ticket_panels", str(guild_id))
+    
+    @staticmethod
+    def remove(message_id: int) -> bool:
+        """Forgets a panel (its message was deleted). Returns whether it was registered."""
+        guild_key = PanelRegistry._message_index().pop(message_id, None)
+        if guild_key is None:
+            return False
+        
+        current = PanelRegistry._views.pop(message_id, None)
+        if current is not None:
+            current[1].stop()
+        
+        panels = PanelRegistry._panels()
+        panels[guild_key].pop(str(message_id), None)
+        if not panels[guild_key]:
+            del panels[guild_key]
+        PlatinumCoreDB.commit("ticket_panels", guild_key)
+        return True
+    
+    @staticmethod
+    async def _locate(guild: discord.Guild, message_id: int) -> Optional[discord.TextChannel]:
+        """Finds the channel of a legacy panel with no recorded channel. Only needed once per panel."""
+        for channel in guild.text_channels:
+            try:
+                await channel.fetch_message(message_id)
+                return channel
+            except (discord.NotFound, discord.Forbidden):
+                continue
+        return None
+    
+    @staticmethod
+    async def reload(guild: discord.Guild, message_id: int) -> str:
+        """Re-attaches the panel's buttons to its message. Returns "reloaded", or "removed" when the
+        panel, its message or its channel is gone (the panel is garbage-collected). Other API
+        errors propagate."""
+        panel = PanelRegistry.get(message_id)
+        if panel is None:
+            return "removed"  # deleted while this reload was waiting its turn
+        _, record = panel
+        if not record.get("channel_id"):
+            channel = await PanelRegistry._locate(guild, message_id)
+            if channel is None:
+                raise LookupError("message not found in any channel the bot can read")
+            record["channel_id"] = channel.id
+            PlatinumCoreDB.commit("ticket_panels", str(guild.id))
+        
+        channel = guild.get_channel(int(record["channel_id"]))
+        if channel is None:
+            PanelRegistry.remove(message_id)
+            return "removed"
+        
+        try:
+            view, _ = PanelRegistry.view_for(message_id, record.get("buttons", []))
+            await channel.get_partial_message(message_id).edit(view=view)
+        except discord.NotFound:
+            PanelRegistry.remove(message_id)
+            return "removed"
+        return "reloaded"
+    
+    @staticmethod
+    async def reload_all(guild: discord.Guild) -> tuple:
+        """Reloads every panel of a guild, PANEL_RELOAD_CONCURRENCY at a time.
+        Returns (reloaded, removed, [(message_id, error)])."""
+        semaphore = asyncio.Semaphore(PANEL_RELOAD_CONCURRENCY)
+        message_ids = [int(message_id) for message_id in PanelRegistry.guild_panels(guild.id)]
+        
+        async def reload_one(message_id: int):
+            async with semaphore:
+                try:
+                    return message_id, await PanelRegistry.reload(guild, message_id)
+                except Exception as e:
+                    return message_id, e
+        
+        results = await asyncio.gather(*(reload_one(message_id) for message_id in message_ids))
+        reloaded = sum(1 for _, result in results if result == "reloaded")
+        removed = sum(1 for _, result in results if result == "removed")
+        failures = [(message_id, result) for message_id, result in results if isinstance(result, Exception)]
+        return reloaded, removed, failures
 
 # ==================================================================================================
 #  SECTION 7: TOURNAMENT SYSTEM
 # ==================================================================================================
 
+class _TournamentIndex:
+    """Set views of one tournament record for O(1) registration checks."""
+    
+    __slots__ = ("source", "blacklist", "whitelist", "team_names", "leaders")
+    
+    def __init__(self, tournament: dict):
+        self.source = tournament
+        self.blacklist = set(tournament.get("blacklisted_users", []))
+        self.whitelist = set(tournament.get("whitelisted_roles", []))
+        entries = tournament.get("registered_teams", []) + tournament.get("waitlist", [])
+        self.team_names = {TournamentRegistry.team_key(team["name"]) for team in entries}
+        self.leaders = {team["leader"] for team in entries}
+
+class TournamentRegistry:
+    """Team registration for tournaments. Each tournament's check-and-append runs under its own
+    asyncio.Lock, so capacity holds however many submissions arrive at once. Blacklist, role
+    whitelist, team names and leaders are mirrored into sets, rebuilt when the partition reloads.
+    With a waitlist_size, teams past max_teams queue up and are promoted when a team withdraws."""
+    
+    _locks: Dict[tuple, asyncio.Lock] = {}
+    _indexes: Dict[tuple, _TournamentIndex] = {}
+    
+    @staticmethod
+    def team_key(name: str) -> str:
+        return " ".join(name.casefold().split())
+    
+    @staticmethod
+    def _lock(guild_id: int, tournament_id: str) -> asyncio.Lock:
+        lock = TournamentRegistry._locks.get((guild_id, tournament_id))
+        if lock is None:
+            lock = TournamentRegistry._locks[(guild_id, tournament_id)] = asyncio.Lock()
+        return lock
+    
+    @staticmethod
+    def _tournament(guild_id: int, tournament_id: str) -> tuple:
+        """(tournament record, its index), or (None, None) if it does not exist."""
+        tournament = PlatinumCoreDB.load_guild(guild_id)["tournaments"]["active_tournaments"].get(tournament_id)
+        if tournament is None:
+            return None, None
+        
+        index = TournamentRegistry._indexes.get((guild_id, tournament_id))
+        if index is None or index.source is not tournament:
+            index = TournamentRegistry._indexes[(guild_id, tournament_id)] = _TournamentIndex(tournament)
+        return tournament, index
+    
+    @staticmethod
+    def invalidate(guild_id: Optional[int] = None):
+        for key in [key for key in TournamentRegistry._indexes if guild_id is None or key[0] == guild_id]:
+            del TournamentRegistry._indexes[key]
+    
+    @staticmethod
+    async def register(guild_id: int, tournament_id: str, member: discord.Member, team: dict) -> tuple:
+        """Registers team (name, roster, contact) led by member. Returns (status, position), status
+        one of "registered", "waitlisted", "not_found", "closed", "banned", "missing_role",
+        "duplicate_team", "duplicate_leader", "full"; position is the waitlist place."""
+        async with TournamentRegistry._lock(guild_id, tournament_id):
+            tournament, index = TournamentRegistry._tournament(guild_id, tournament_id)
+            if tournament is None:
+                return "not_found", 0
+            if not tournament["registration_open"]:
+                return "closed", 0
+            if member.id in index.blacklist:
+                return "banned", 0
+            if index.whitelist and not any(role.id in index.whitelist for role in member.roles):
+                return "missing_role", 0
+            
+            name_key = TournamentRegistry.team_key(team["name"])
+            if name_key in index.team_names:
+                return "duplicate_team", 0
+            if member.id in index.leaders:
+                return "duplicate_leader", 0
+            
+            entry = dict(team, leader=member.id, registered_at=str(datetime.datetime.now()))
+            max_teams = tournament["max_teams"]
+            if max_teams and len(tournament["registered_teams"]) >= max_teams:
+                waitlist = tournament.setdefault("waitlist", [])
+                if len(waitlist) >= tournament.get("waitlist_size", 0):
+                    return "full", 0
+                waitlist.append(entry)
+                status, position = "waitlisted", len(waitlist)
+            else:
+                tournament["registered_teams"].append(entry)
+                status, position = "registered", 0
+            
+            index.team_names.add(name_key)
+            index.leaders.add(member.id)
+            PlatinumCoreDB.commit_guild(guild_id, "tournaments", "active_tournaments", tournament_id)
+            return status, position
+    
+    @staticmethod
+    async def withdraw(guild_id: int, tournament_id: str, leader_id: int) -> tuple:
+        """Removes the leader's team (registered or waitlisted). Returns (removed team or None,
+        waitlisted team promoted into the freed slot or None)."""
+        async with TournamentRegistry._lock(guild_id, tournament_id):
+            tournament, index = TournamentRegistry._tournament(guild_id, tournament_id)
+            if tournament is None or leader_id not in index.leaders:
+                return None, None
+            
+            promoted = None
+            teams, waitlist = tournament["registered_teams"], tournament.setdefault("waitlist", [])
+            removed = next((team for team in teams if team["leader"] == leader_id), None)
+            if removed is not None:
+                teams.remove(removed)
+                if waitlist and (not tournament["max_teams"] or len(teams) < tournament["max_teams"]):
+                    promoted = waitlist.pop(0)
+                    teams.append(promoted)
+            else:
+                removed = next(team for team in waitlist if team["leader"] == leader_id)
+                waitlist.remove(removed)
+            
+            index.team_names.discard(TournamentRegistry.team_key(removed["name"]))
+            index.leaders.discard(leader_id)
+            PlatinumCoreDB.commit_guild(guild_id, "tournaments", "active_tournaments", tournament_id)
+            return removed, promoted
+    
+    @staticmethod
+    def blacklist(guild_id: int, tournament_id: str, user_id: int) -> bool:
+        """Adds a user to the blacklist. Returns False if already listed."""
+        tournament, index = TournamentRegistry._tournament(guild_id, tournament_id)
+        if user_id in index.blacklist:
+            return False
+        tournament["blacklisted_users"].append(user_id)
+        index.blacklist.add(user_id)
+        PlatinumCoreDB.commit_guild(guild_id, "tournaments", "active_tournaments", tournament_id)
+        return True
+    
+    @staticmethod
+    def whitelist_role(guild_id: int, tournament_id: str, role_id: int) -> bool:
+        """Adds a required role. Returns False if already required."""
+        tournament, index = TournamentRegistry._tournament(guild_id, tournament_id)
+        if role_id in index.whitelist:
+            return False
+        tournament["whitelisted_roles"].append(role_id)
+        index.whitelist.add(role_id)
+        PlatinumCoreDB.commit_guild(guild_id, "tournaments", "active_tournaments", tournament_id)
+        return True
+
 class TournamentCreateModal(discord.ui.Modal, title="Create Tournament"):
     """Modal for creating tournaments."""
     
@@ -762,11 +3962,12 @@ class TournamentCreateModal(discord.ui.Modal, title="Create Tournament"):
     description = discord.ui.TextInput(label="Description", style=discord.TextStyle.paragraph, required=True)
     max_teams = discord.ui.TextInput(label="Max Teams", placeholder="Leave blank for unlimited", required=False)
     team_size = discord.ui.TextInput(label="Team Size", placeholder="e.g., 5", required=True)
+    waitlist_size = discord.ui.TextInput(label="Waitlist Size", placeholder="Teams queued once full (blank for none)", required=False)
     
     async def on_submit(self, interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True)
         
-        db = PlatinumCoreDB.load_full_database()
+        db = PlatinumCoreDB.load_guild(interaction.guild.id)
         
         tournament_id = str(int(time.time()))
         
@@ -777,13 +3978,15 @@ class TournamentCreateModal(discord.ui.Modal, title="Create Tournament"):
             "max_teams": int(self.max_teams.value) if self.max_teams.value else None,
             "team_size": int(self.team_size.value),
             "registered_teams": [],
+            "waitlist": [],
+            "waitlist_size": int(self.waitlist_size.value) if self.waitlist_size.value else 0,
             "blacklisted_users": [],
             "whitelisted_roles": [],
             "registration_open": True,
             "created_at": str(datetime.datetime.now())
         }
         
-        PlatinumCoreDB.save_database(db)
+        PlatinumCoreDB.commit_guild(interaction.guild.id, "tournaments", "active_tournaments", tournament_id)
         
         await interaction.followup.send(
             f"✅ Tournament **{self.name.value}** created!\n"
@@ -803,45 +4006,31 @@ class TournamentRegistrationModal(discord.ui.Modal, title="Register Team"):
         super().__init__()
         self.tournament_id = tournament_id
     
+    RESULT_MESSAGES = {
+        "not_found": "❌ Tournament not found.",
+        "closed": "❌ Registration is closed.",
+        "banned": "❌ You are banned from this tournament.",
+        "missing_role": "❌ You don't have the required role to register.",
+        "duplicate_team": "❌ A team with that name is already registered.",
+        "duplicate_leader": "❌ You have already registered a team for this tournament.",
+        "full": "❌ Tournament is full."
+    }
+    
     async def on_submit(self, interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True)
         
-        db = PlatinumCoreDB.load_full_database()
-        tournament = db["tournaments"]["active_tournaments"].get(self.tournament_id)
-        
-        if not tournament:
-            return await interaction.followup.send("❌ Tournament not found.")
-        
-        if not tournament["registration_open"]:
-            return await interaction.followup.send("❌ Registration is closed.")
-        
-        # Check blacklist
-        if interaction.user.id in tournament["blacklisted_users"]:
-            return await interaction.followup.send("❌ You are banned from this tournament.")
-        
-        # Check whitelist
-        if tournament["whitelisted_roles"]:
-            user_roles = [r.id for r in interaction.user.roles]
-            has_access = any(rid in user_roles for rid in tournament["whitelisted_roles"])
-            if not has_access:
-                return await interaction.followup.send("❌ You don't have the required role to register.")
-        
-        # Check max teams
-        if tournament["max_teams"] and len(tournament["registered_teams"]) >= tournament["max_teams"]:
-            return await interaction.followup.send("❌ Tournament is full.")
-        
         team_data = {
-            "name": self.team_name.value,
+            "name": self.team_name.value.strip(),
             "roster": self.roster.value,
-            "contact": self.contact.value,
-            "leader": interaction.user.id,
-            "registered_at": str(datetime.datetime.now())
+            "contact": self.contact.value
         }
+        status, position = await TournamentRegistry.register(interaction.guild.id, self.tournament_id, interaction.user, team_data)
         
-        tournament["registered_teams"].append(team_data)
-        PlatinumCoreDB.save_database(db)
-        
-        await interaction.followup.send(f"✅ Team **{self.team_name.value}** registered successfully!")
+        if status == "registered":
+            return await interaction.followup.send(f"✅ Team **{team_data['name']}** registered successfully!")
+        if status == "waitlisted":
+            return await interaction.followup.send(f"🕒 The tournament is full. Team **{team_data['name']}** is #{position} on the waitlist.")
+        await interaction.followup.send(self.RESULT_MESSAGES[status])
 
 # ==================================================================================================
 #  SECTION 8: SETUP COMMANDS
@@ -868,12 +4057,12 @@ class SetupCog(commands.Cog):
         if not interaction.user.guild_permissions.administrator:
             return await interaction.response.send_message(NO_PERM_MESSAGE, ephemeral=True)
         
-        db = PlatinumCoreDB.load_full_database()
+        db = PlatinumCoreDB.load_guild(interaction.guild.id)
         db["recruitment_system"]["pending_channel"] = pending.id
         db["recruitment_system"]["accepted_channel"] = accepted.id
         db["recruitment_system"]["denied_channel"] = denied.id
         db["recruitment_system"]["referral_channel"] = referral.id
-        PlatinumCoreDB.save_database(db)
+        PlatinumCoreDB.commit_guild(interaction.guild.id, "recruitment_system")
         
         embed = discord.Embed(title="✅ Recruitment Configured", color=COLOR_PLATINUM_SUCCESS)
         embed.add_field(name="Pending", value=pending.mention)
@@ -896,18 +4085,21 @@ class SetupCog(commands.Cog):
         if not interaction.user.guild_permissions.administrator:
             return await interaction.response.send_message(NO_PERM_MESSAGE, ephemeral=True)
         
-        db = PlatinumCoreDB.load_full_database()
+        db = PlatinumCoreDB.load_guild(interaction.guild.id)
         db["transcript_channel"] = transcripts.id
         db["audit_log_channel"] = audit.id
         db["channels"]["mod_logs"] = moderation.id
-        PlatinumCoreDB.save_database(db)
+        PlatinumCoreDB.commit_guild(interaction.guild.id, "transcript_channel")
+        PlatinumCoreDB.commit_guild(interaction.guild.id, "audit_log_channel")
+        PlatinumCoreDB.commit_guild(interaction.guild.id, "channels")
         
         await interaction.response.send_message("✅ Logging channels configured!")
     
-    @app_commands.command(name="grant_permission", description="Grant permission tier to a user (Owner Only)")
+    @app_commands.command(name="grant_permission", description="Grant permission tier to a user or role (Owner Only)")
     @app_commands.describe(
+        tier="Permission tier to grant",
         user="User to grant permission to",
-        tier="Permission tier to grant"
+        role="Role to grant permission to (all members of the role get the tier)"
     )
     @app_commands.choices(tier=[
         app_commands.Choice(name="System Admin", value="system_admins"),
@@ -917,21 +4109,22 @@ class SetupCog(commands.Cog):
         app_commands.Choice(name="App Reviewer", value="app_reviewers"),
         app_commands.Choice(name="Tournament Manager", value="tournament_managers")
     ])
-    async def grant_permission(self, interaction: discord.Interaction, user: discord.Member, tier: str):
+    async def grant_permission(self, interaction: discord.Interaction, tier: str,
+                               user: discord.Member = None, role: discord.Role = None):
         if interaction.user.id != interaction.guild.owner_id:
             return await interaction.response.send_message("❌ Owner Only command.", ephemeral=True)
         
-        db = PlatinumCoreDB.load_full_database()
+        target = user or role
+        if target is None:
+            return await interaction.response.send_message("❌ Pick a user or a role.", ephemeral=True)
         
-        if user.id not in db["permissions_tiers"][tier]:
-            db["permissions_tiers"][tier].append(user.id)
-            PlatinumCoreDB.save_database(db)
-            await interaction.response.send_message(f"✅ Granted **{tier.replace('_', ' ').title()}** to {user.mention}")
+        if PermissionService.grant(interaction.guild.id, tier, target.id, is_role=user is None):
+            await interaction.response.send_message(f"✅ Granted **{tier.replace('_', ' ').title()}** to {target.mention}")
         else:
-            await interaction.response.send_message(f"ℹ️ {user.mention} already has this permission.", ephemeral=True)
+            await interaction.response.send_message(f"ℹ️ {target.mention} already has this permission.", ephemeral=True)
     
-    @app_commands.command(name="revoke_permission", description="Revoke permission tier from a user (Owner Only)")
-    @app_commands.describe(user="User to revoke from", tier="Permission tier")
+    @app_commands.command(name="revoke_permission", description="Revoke permission tier from a user or role (Owner Only)")
+    @app_commands.describe(tier="Permission tier", user="User to revoke from", role="Role to revoke from")
     @app_commands.choices(tier=[
         app_commands.Choice(name="System Admin", value="system_admins"),
         app_commands.Choice(name="Senior Moderator", value="senior_mods"),
@@ -940,18 +4133,19 @@ class SetupCog(commands.Cog):
         app_commands.Choice(name="App Reviewer", value="app_reviewers"),
         app_commands.Choice(name="Tournament Manager", value="tournament_managers")
     ])
-    async def revoke_permission(self, interaction: discord.Interaction, user: discord.Member, tier: str):
+    async def revoke_permission(self, interaction: discord.Interaction, tier: str,
+                                user: discord.Member = None, role: discord.Role = None):
         if interaction.user.id != interaction.guild.owner_id:
             return await interaction.response.send_message("❌ Owner Only command.", ephemeral=True)
         
-        db = PlatinumCoreDB.load_full_database()
+        target = user or role
+        if target is None:
+            return await interaction.response.send_message("❌ Pick a user or a role.", ephemeral=True)
         
-        if user.id in db["permissions_tiers"][tier]:
-            db["permissions_tiers"][tier].remove(user.id)
-            PlatinumCoreDB.save_database(db)
-            await interaction.response.send_message(f"✅ Revoked **{tier.replace('_', ' ').title()}** from {user.mention}")
+        if PermissionService.revoke(interaction.guild.id, tier, target.id, is_role=user is None):
+            await interaction.response.send_message(f"✅ Revoked **{tier.replace('_', ' ').title()}** from {target.mention}")
         else:
-            await interaction.response.send_message(f"ℹ️ {user.mention} doesn't have this permission.", ephemeral=True)
+            await interaction.response.send_message(f"ℹ️ {target.mention} doesn't have this permission.", ephemeral=True)
 
 # ==================================================================================================
 #  SECTION 9: MODERATION COMMANDS
@@ -965,8 +4159,7 @@ class ModerationCog(commands.Cog):
     
     @app_commands.command(name="whois", description="View detailed user information")
     async def whois(self, interaction: discord.Interaction, user: discord.Member):
-        db = PlatinumCoreDB.load_full_database()
-        xp_data = db["xp_engine"]["user_data"].get(str(user.id), {"level": 1, "xp": 0})
+        xp_data = PlatinumXPEngine.get_record(interaction.guild.id, user.id).to_entry()
         
         embed = discord.Embed(title=f"User Info: {user}", color=COLOR_PLATINUM_INFO)
         embed.set_thumbnail(url=user.display_avatar.url)
@@ -980,43 +4173,22 @@ class ModerationCog(commands.Cog):
     
     @app_commands.command(name="warn", description="Warn a user")
     @app_commands.describe(user="User to warn", reason="Reason for warning")
+    @PermissionService.require(PermissionService.MODERATOR)
     async def warn(self, interaction: discord.Interaction, user: discord.Member, reason: str):
-        db = PlatinumCoreDB.load_full_database()
-        
-        is_mod = (
-            interaction.user.id in db["permissions_tiers"]["regular_mods"] or
-            interaction.user.id in db["permissions_tiers"]["senior_mods"] or
-            interaction.user.id in db["permissions_tiers"]["system_admins"] or
-            interaction.user.id == interaction.guild.owner_id
-        )
-        
-        if not is_mod:
-            return await interaction.response.send_message(NO_PERM_MESSAGE, ephemeral=True)
-        
         try:
             await user.send(f"⚠️ You have been warned in **{interaction.guild.name}**\n**Reason:** {reason}")
         except:
             pass
         
-        await SecurityEngine.log_action(interaction.guild, "WARNING", 
-            f"**User:** {user.mention} ({user.id})\n**Moderator:** {interaction.user.mention}\n**Reason:** {reason}")
+        await SecurityEngine.log_action(interaction.guild, "WARNING",
+            f"**User:** {user.mention} ({user.id})\n**Moderator:** {interaction.user.mention}\n**Reason:** {reason}", route="mod")
         
         await interaction.response.send_message(f"✅ Warned {user.mention} for: {reason}")
     
     @app_commands.command(name="kick", description="Kick a user")
     @app_commands.describe(user="User to kick", reason="Reason")
+    @PermissionService.require(PermissionService.SENIOR_MOD)
     async def kick_user(self, interaction: discord.Interaction, user: discord.Member, reason: str = "No reason provided"):
-        db = PlatinumCoreDB.load_full_database()
-        
-        is_mod = (
-            interaction.user.id in db["permissions_tiers"]["senior_mods"] or
-            interaction.user.id in db["permissions_tiers"]["system_admins"] or
-            interaction.user.id == interaction.guild.owner_id
-        )
-        
-        if not is_mod:
-            return await interaction.response.send_message(NO_PERM_MESSAGE, ephemeral=True)
-        
         try:
             await user.send(f"👢 You have been kicked from **{interaction.guild.name}**\n**Reason:** {reason}")
         except:
@@ -1024,24 +4196,14 @@ class ModerationCog(commands.Cog):
         
         await user.kick(reason=f"{interaction.user}: {reason}")
         await SecurityEngine.log_action(interaction.guild, "KICK",
-            f"**User:** {user.mention} ({user.id})\n**Moderator:** {interaction.user.mention}\n**Reason:** {reason}")
+            f"**User:** {user.mention} ({user.id})\n**Moderator:** {interaction.user.mention}\n**Reason:** {reason}", route="mod")
         
         await interaction.response.send_message(f"✅ Kicked {user.mention}")
     
     @app_commands.command(name="ban", description="Ban a user")
     @app_commands.describe(user="User to ban", reason="Reason", delete_messages="Days of messages to delete (0-7)")
+    @PermissionService.require(PermissionService.SENIOR_MOD)
     async def ban_user(self, interaction: discord.Interaction, user: discord.Member, reason: str = "No reason", delete_messages: int = 0):
-        db = PlatinumCoreDB.load_full_database()
-        
-        is_mod = (
-            interaction.user.id in db["permissions_tiers"]["senior_mods"] or
-            interaction.user.id in db["permissions_tiers"]["system_admins"] or
-            interaction.user.id == interaction.guild.owner_id
-        )
-        
-        if not is_mod:
-            return await interaction.response.send_message(NO_PERM_MESSAGE, ephemeral=True)
-        
         try:
             await user.send(f"🔨 You have been banned from **{interaction.guild.name}**\n**Reason:** {reason}")
         except:
@@ -1049,46 +4211,24 @@ class ModerationCog(commands.Cog):
         
         await user.ban(reason=f"{interaction.user}: {reason}", delete_message_days=min(delete_messages, 7))
         await SecurityEngine.log_action(interaction.guild, "BAN",
-            f"**User:** {user.mention} ({user.id})\n**Moderator:** {interaction.user.mention}\n**Reason:** {reason}")
+            f"**User:** {user.mention} ({user.id})\n**Moderator:** {interaction.user.mention}\n**Reason:** {reason}", route="mod")
         
         await interaction.response.send_message(f"✅ Banned {user.mention}")
     
     @app_commands.command(name="timeout", description="Timeout a user")
     @app_commands.describe(user="User to timeout", duration="Duration in minutes", reason="Reason")
+    @PermissionService.require(PermissionService.MODERATOR)
     async def timeout_user(self, interaction: discord.Interaction, user: discord.Member, duration: int, reason: str = "No reason"):
-        db = PlatinumCoreDB.load_full_database()
-        
-        is_mod = (
-            interaction.user.id in db["permissions_tiers"]["regular_mods"] or
-            interaction.user.id in db["permissions_tiers"]["senior_mods"] or
-            interaction.user.id in db["permissions_tiers"]["system_admins"] or
-            interaction.user.id == interaction.guild.owner_id
-        )
-        
-        if not is_mod:
-            return await interaction.response.send_message(NO_PERM_MESSAGE, ephemeral=True)
-        
         await user.timeout(datetime.timedelta(minutes=duration), reason=f"{interaction.user}: {reason}")
         await SecurityEngine.log_action(interaction.guild, "TIMEOUT",
-            f"**User:** {user.mention} ({user.id})\n**Duration:** {duration} minutes\n**Moderator:** {interaction.user.mention}\n**Reason:** {reason}")
+            f"**User:** {user.mention} ({user.id})\n**Duration:** {duration} minutes\n**Moderator:** {interaction.user.mention}\n**Reason:** {reason}", route="mod")
         
         await interaction.response.send_message(f"✅ Timed out {user.mention} for {duration} minutes")
     
     @app_commands.command(name="purge", description="Delete messages")
     @app_commands.describe(amount="Number of messages to delete (max 100)")
+    @PermissionService.require(PermissionService.MODERATOR)
     async def purge(self, interaction: discord.Interaction, amount: int):
-        db = PlatinumCoreDB.load_full_database()
-        
-        is_mod = (
-            interaction.user.id in db["permissions_tiers"]["regular_mods"] or
-            interaction.user.id in db["permissions_tiers"]["senior_mods"] or
-            interaction.user.id in db["permissions_tiers"]["system_admins"] or
-            interaction.user.id == interaction.guild.owner_id
-        )
-        
-        if not is_mod:
-            return await interaction.response.send_message(NO_PERM_MESSAGE, ephemeral=True)
-        
         amount = min(amount, 100)
         await interaction.response.defer(ephemeral=True)
         deleted = await interaction.channel.purge(limit=amount)
@@ -1096,21 +4236,9 @@ class ModerationCog(commands.Cog):
     
     @app_commands.command(name="lockdown", description="Lock or unlock a channel")
     @app_commands.describe(channel="Channel to lock", lock="True to lock, False to unlock")
+    @PermissionService.require(PermissionService.SENIOR_MOD)
     async def lockdown(self, interaction: discord.Interaction, channel: discord.TextChannel, lock: bool):
-        db = PlatinumCoreDB.load_full_database()
-        
-        is_mod = (
-            interaction.user.id in db["permissions_tiers"]["senior_mods"] or
-            interaction.user.id in db["permissions_tiers"]["system_admins"] or
-            interaction.user.id == interaction.guild.owner_id
-        )
-        
-        if not is_mod:
-            return await interaction.response.send_message(NO_PERM_MESSAGE, ephemeral=True)
-        
-        overwrites = channel.overwrites_for(interaction.guild.default_role)
-        overwrites.send_messages = not lock
-        await channel.set_permissions(interaction.guild.default_role, overwrite=overwrites)
+        await SecurityEngine.set_send_permission(channel, not lock)
         
         status = "🔒 Locked" if lock else "🔓 Unlocked"
         await interaction.response.send_message(f"{status} {channel.mention}")
@@ -1123,13 +4251,159 @@ class ModerationCog(commands.Cog):
         await interaction.response.defer(ephemeral=True)
         
         try:
-            with open(DATABASE_FILENAME, "rb") as f:
-                file = discord.File(f, filename=f"backup_{datetime.date.today()}.json")
-                await interaction.user.send("📦 Database Backup", file=file)
-                await interaction.followup.send("✅ Backup sent to your DMs!")
+            # Dump the in-memory copy so the backup includes unflushed changes on any backend
+            files = []
+            for label, db in (("global", PlatinumCoreDB.load_full_database()),
+                              (f"guild_{interaction.guild.id}", PlatinumCoreDB.load_guild(interaction.guild.id))):
+                file_data = io.BytesIO(json.dumps(db, indent=4).encode("utf-8"))
+                files.append(discord.File(file_data, filename=f"backup_{label}_{datetime.date.today()}.json"))
+            await interaction.user.send("📦 Database Backup", files=files)
+            await interaction.followup.send("✅ Backup sent to your DMs!")
         except Exception as e:
             await interaction.followup.send(f"❌ Backup failed: {e}")
 
+# ==================================================================================================
+#  SECTION 9B: LEVELING COMMANDS
+# ==================================================================================================
+
+class LevelingCog(commands.Cog):
+    """XP leaderboard and rank commands."""
+    
+    def __init__(self, bot):
+        self.bot = bot
+    
+    @app_commands.command(name="leaderboard", description="View the XP leaderboard")
+    @app_commands.describe(page="Page number")
+    async def leaderboard(self, interaction: discord.Interaction, page: int = 1):
+        index = PlatinumXPEngine.get_leaderboard(interaction.guild.id)
+        if not len(index):
+            return await interaction.response.send_message("ℹ️ Nobody has earned XP yet.", ephemeral=True)
+        
+        total_pages = math.ceil(len(index) / LEADERBOARD_PAGE_SIZE)
+        page = min(max(page, 1), total_pages)
+        start = (page - 1) * LEADERBOARD_PAGE_SIZE
+        
+        lines = []
+        for position, (neg_total, user_id) in enumerate(index.slice(start, start + LEADERBOARD_PAGE_SIZE), start=start + 1):
+            record = PlatinumXPEngine.get_record(interaction.guild.id, user_id)
+            lines.append(f"**#{position}** <@{user_id}> — Level {record.level} ({-neg_total:,} XP)")
+        
+        embed = discord.Embed(title="🏆 XP Leaderboard", description="\n".join(lines), color=COLOR_PLATINUM_INFO)
+        embed.set_footer(text=f"Page {page}/{total_pages} • {len(index):,} ranked members")
+        await interaction.response.send_message(embed=embed)
+    
+    @app_commands.command(name="rank", description="View your XP rank")
+    @app_commands.describe(user="User to look up (defaults to you)")
+    async def rank(self, interaction: discord.Interaction, user: Optional[discord.Member] = None):
+        target = user or interaction.user
+        record = PlatinumXPEngine.get_record(interaction.guild.id, target.id)
+        
+        if record.total_xp <= 0:
+            return await interaction.response.send_message(f"ℹ️ {target.mention} hasn't earned any XP yet.", ephemeral=True)
+        
+        index = PlatinumXPEngine.get_leaderboard(interaction.guild.id)
+        position = index.rank((-record.total_xp, target.id)) + 1
+        required = PlatinumXPEngine.calculate_level_requirement(record.level)
+        
+        embed = discord.Embed(title=f"📈 Rank: {target}", color=COLOR_PLATINUM_INFO)
+        embed.set_thumbnail(url=target.display_avatar.url)
+        embed.add_field(name="Rank", value=f"#{position:,} of {len(index):,}")
+        embed.add_field(name="Level", value=record.level)
+        embed.add_field(name="Progress", value=f"{record.xp:,}/{required:,} XP")
+        embed.add_field(name="Total XP", value=f"{record.total_xp:,}")
+        await interaction.response.send_message(embed=embed)
+    
+    @app_commands.command(name="xp_recompute", description="Recompute all levels from total XP (Admin Only)")
+    @app_commands.describe(
+        multiplier="Multiply everyone's total XP by this first (default 1.0)",
+        import_file="JSON file of {user_id: xp} to add before recomputing"
+    )
+    async def xp_recompute(self, interaction: discord.Interaction, multiplier: float = 1.0,
+                           import_file: Optional[discord.Attachment] = None):
+        if not interaction.user.guild_permissions.administrator:
+            return await interaction.response.send_message(NO_PERM_MESSAGE, ephemeral=True)
+        
+        if not math.isfinite(multiplier) or multiplier < 0:
+            return await interaction.response.send_message("❌ Multiplier must be a finite, non-negative number.", ephemeral=True)
+        
+        await interaction.response.defer(ephemeral=True)
+        
+        imported = None
+        if import_file:
+            try:
+                imported = PlatinumXPEngine.parse_import(json.loads(await import_file.read()))
+            except ValueError as e:
+                return await interaction.followup.send(f"❌ Invalid import file: {e}")
+        
+        started = time.perf_counter()
+        try:
+            count = await PlatinumXPEngine.bulk_recompute(interaction.guild.id, multiplier, imported)
+        except ValueError as e:
+            return await interaction.followup.send(f"❌ {e}")
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        
+        await SecurityEngine.log_action(interaction.guild, "XP_RECOMPUTE",
+            f"**Admin:** {interaction.user.mention}\n**Multiplier:** {multiplier}\n"
+            f"**Imported:** {len(imported) if imported else 0} users\n**Members:** {count}")
+        await interaction.followup.send(f"✅ Recomputed levels for {count:,} members in {elapsed_ms:.0f}ms.")
+
+# ==================================================================================================
+#  SECTION 9C: TRANSCRIPT ARCHIVE COMMANDS
+# ==================================================================================================
+
+class TranscriptCog(commands.Cog):
+    """Search and retrieval for archived ticket transcripts."""
+    
+    def __init__(self, bot):
+        self.bot = bot
+    
+    @app_commands.command(name="transcript_search", description="Search closed ticket transcripts (Staff Only)")
+    @app_commands.describe(query="Words to find; filter with from:<user> and date:YYYY-MM or date:YYYY-MM-DD")
+    @PermissionService.require(PermissionService.STAFF)
+    async def transcript_search(self, interaction: discord.Interaction, query: str):
+        # The first search after startup loads the archive index, which can take a moment
+        await interaction.response.defer(ephemeral=True)
+        archive = await TranscriptArchive.for_guild(interaction.guild.id)
+        
+        started = time.perf_counter()
+        total, entries, words = archive.search(query)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        
+        if not entries:
+            return await interaction.followup.send(f"🔍 No archived tickets match `{query}`.", ephemeral=True)
+        
+        snippets = await asyncio.gather(*(asyncio.to_thread(archive.snippet, entry, words) for entry in entries[:5]))
+        
+        embed = discord.Embed(title=f"🔍 Transcript Search: {query}"[:256], color=COLOR_PLATINUM_INFO)
+        for i, entry in enumerate(entries):
+            value = f"Closed <t:{int(entry['closed_at'])}:d> by {entry['closed_by']} • {entry['messages']} messages"
+            if i < len(snippets) and snippets[i]:
+                value += f"\n> {discord.utils.escape_markdown(snippets[i])}"
+            embed.add_field(name=f"#{entry['ticket']} • {entry['channel']}", value=value[:1024], inline=False)
+        embed.set_footer(text=f"{total} match(es) in {len(archive.tickets):,} archived tickets • {elapsed_ms:.1f} ms")
+        
+        await interaction.followup.send(embed=embed, ephemeral=True)
+    
+    @app_commands.command(name="transcript_fetch", description="Download an archived ticket transcript (Staff Only)")
+    @app_commands.describe(ticket="Archive number shown in the search results")
+    @PermissionService.require(PermissionService.STAFF)
+    async def transcript_fetch(self, interaction: discord.Interaction, ticket: int):
+        await interaction.response.defer(ephemeral=True)
+        archive = await TranscriptArchive.for_guild(interaction.guild.id)
+        if not 1 <= ticket <= len(archive.tickets):
+            return await interaction.followup.send("❌ No archived ticket with that number.", ephemeral=True)
+        
+        entry = archive.tickets[ticket - 1]
+        path = archive.blob_path(entry["digest"])
+        if not os.path.exists(path):
+            return await interaction.followup.send("❌ The transcript file is missing from the archive.", ephemeral=True)
+        
+        await interaction.followup.send(
+            f"📋 Transcript #{ticket} • {entry['channel']}",
+            file=discord.File(path, filename=f"transcript-{entry['channel']}.txt.gz"),
+            ephemeral=True
+        )
+
 # ==================================================================================================
 #  SECTION 10: TOURNAMENT COMMANDS
 # ==================================================================================================
@@ -1141,66 +4415,36 @@ class TournamentCog(commands.Cog):
         self.bot = bot
     
     @app_commands.command(name="tournament_create", description="Create a new tournament")
+    @PermissionService.require(PermissionService.TOURNAMENT_MANAGER, "❌ You need Tournament Manager permission.")
     async def create_tournament(self, interaction: discord.Interaction):
-        db = PlatinumCoreDB.load_full_database()
-        
-        is_manager = (
-            interaction.user.id in db["permissions_tiers"]["tournament_managers"] or
-            interaction.user.id in db["permissions_tiers"]["system_admins"] or
-            interaction.user.id == interaction.guild.owner_id
-        )
-        
-        if not is_manager:
-            return await interaction.response.send_message("❌ You need Tournament Manager permission.", ephemeral=True)
-        
         await interaction.response.send_modal(TournamentCreateModal())
     
     @app_commands.command(name="tournament_blacklist", description="Blacklist a user from a tournament")
     @app_commands.describe(tournament_id="Tournament ID", user="User to blacklist")
+    @PermissionService.require(PermissionService.TOURNAMENT_MANAGER)
     async def blacklist_user(self, interaction: discord.Interaction, tournament_id: str, user: discord.Member):
-        db = PlatinumCoreDB.load_full_database()
-        
-        is_manager = (
-            interaction.user.id in db["permissions_tiers"]["tournament_managers"] or
-            interaction.user.id in db["permissions_tiers"]["system_admins"] or
-            interaction.user.id == interaction.guild.owner_id
-        )
-        
-        if not is_manager:
-            return await interaction.response.send_message(NO_PERM_MESSAGE, ephemeral=True)
+        db = PlatinumCoreDB.load_guild(interaction.guild.id)
         
         tournament = db["tournaments"]["active_tournaments"].get(tournament_id)
         if not tournament:
             return await interaction.response.send_message("❌ Tournament not found.", ephemeral=True)
         
-        if user.id not in tournament["blacklisted_users"]:
-            tournament["blacklisted_users"].append(user.id)
-            PlatinumCoreDB.save_database(db)
+        if TournamentRegistry.blacklist(interaction.guild.id, tournament_id, user.id):
             await interaction.response.send_message(f"✅ Blacklisted {user.mention} from tournament.")
         else:
             await interaction.response.send_message(f"ℹ️ User already blacklisted.", ephemeral=True)
     
     @app_commands.command(name="tournament_whitelist_role", description="Add required role to tournament")
     @app_commands.describe(tournament_id="Tournament ID", role="Required role")
+    @PermissionService.require(PermissionService.TOURNAMENT_MANAGER)
     async def whitelist_role(self, interaction: discord.Interaction, tournament_id: str, role: discord.Role):
-        db = PlatinumCoreDB.load_full_database()
-        
-        is_manager = (
-            interaction.user.id in db["permissions_tiers"]["tournament_managers"] or
-            interaction.user.id in db["permissions_tiers"]["system_admins"] or
-            interaction.user.id == interaction.guild.owner_id
-        )
-        
-        if not is_manager:
-            return await interaction.response.send_message(NO_PERM_MESSAGE, ephemeral=True)
+        db = PlatinumCoreDB.load_guild(interaction.guild.id)
         
         tournament = db["tournaments"]["active_tournaments"].get(tournament_id)
         if not tournament:
             return await interaction.response.send_message("❌ Tournament not found.", ephemeral=True)
         
-        if role.id not in tournament["whitelisted_roles"]:
-            tournament["whitelisted_roles"].append(role.id)
-            PlatinumCoreDB.save_database(db)
+        if TournamentRegistry.whitelist_role(interaction.guild.id, tournament_id, role.id):
             await interaction.response.send_message(f"✅ Added {role.mention} as required role.")
         else:
             await interaction.response.send_message("ℹ️ Role already required.", ephemeral=True)
@@ -1208,7 +4452,7 @@ class TournamentCog(commands.Cog):
     @app_commands.command(name="tournament_register", description="Register your team for a tournament")
     @app_commands.describe(tournament_id="Tournament ID to join")
     async def register_team(self, interaction: discord.Interaction, tournament_id: str):
-        db = PlatinumCoreDB.load_full_database()
+        db = PlatinumCoreDB.load_guild(interaction.guild.id)
         
         tournament = db["tournaments"]["active_tournaments"].get(tournament_id)
         if not tournament:
@@ -1216,9 +4460,21 @@ class TournamentCog(commands.Cog):
         
         await interaction.response.send_modal(TournamentRegistrationModal(tournament_id))
     
+    @app_commands.command(name="tournament_withdraw", description="Withdraw your team from a tournament")
+    @app_commands.describe(tournament_id="Tournament ID")
+    async def withdraw_team(self, interaction: discord.Interaction, tournament_id: str):
+        removed, promoted = await TournamentRegistry.withdraw(interaction.guild.id, tournament_id, interaction.user.id)
+        if removed is None:
+            return await interaction.response.send_message("❌ You have no team registered for this tournament.", ephemeral=True)
+        
+        message = f"✅ Team **{removed['name']}** withdrew."
+        if promoted:
+            message += f"\n🎉 <@{promoted['leader']}>, your team **{promoted['name']}** moved up from the waitlist and is now registered!"
+        await interaction.response.send_message(message)
+    
     @app_commands.command(name="tournament_list", description="List all active tournaments")
     async def list_tournaments(self, interaction: discord.Interaction):
-        db = PlatinumCoreDB.load_full_database()
+        db = PlatinumCoreDB.load_guild(interaction.guild.id)
         tournaments = db["tournaments"]["active_tournaments"]
         
         if not tournaments:
@@ -1230,7 +4486,9 @@ class TournamentCog(commands.Cog):
             reg_status = "✅ Open" if t["registration_open"] else "❌ Closed"
             embed.add_field(
                 name=f"{t['name']} (ID: {tid})",
-                value=f"{t['description']}\nTeams: {len(t['registered_teams'])}/{t['max_teams'] or '∞'}\nStatus: {reg_status}",
+                value=f"{t['description']}\nTeams: {len(t['registered_teams'])}/{t['max_teams'] or '∞'}"
+                      + (f" (+{len(t['waitlist'])} waitlisted)" if t.get("waitlist") else "")
+                      + f"\nStatus: {reg_status}",
                 inline=False
             )
         
@@ -1238,24 +4496,16 @@ class TournamentCog(commands.Cog):
     
     @app_commands.command(name="tournament_close", description="Close tournament registration")
     @app_commands.describe(tournament_id="Tournament ID")
+    @PermissionService.require(PermissionService.TOURNAMENT_MANAGER)
     async def close_registration(self, interaction: discord.Interaction, tournament_id: str):
-        db = PlatinumCoreDB.load_full_database()
-        
-        is_manager = (
-            interaction.user.id in db["permissions_tiers"]["tournament_managers"] or
-            interaction.user.id in db["permissions_tiers"]["system_admins"] or
-            interaction.user.id == interaction.guild.owner_id
-        )
-        
-        if not is_manager:
-            return await interaction.response.send_message(NO_PERM_MESSAGE, ephemeral=True)
+        db = PlatinumCoreDB.load_guild(interaction.guild.id)
         
         tournament = db["tournaments"]["active_tournaments"].get(tournament_id)
         if not tournament:
             return await interaction.response.send_message("❌ Tournament not found.", ephemeral=True)
         
         tournament["registration_open"] = False
-        PlatinumCoreDB.save_database(db)
+        PlatinumCoreDB.commit_guild(interaction.guild.id, "tournaments", "active_tournaments", tournament_id)
         await interaction.response.send_message(f"✅ Closed registration for **{tournament['name']}**")
 
 # ==================================================================================================
@@ -1283,7 +4533,7 @@ class CustomizationCog(commands.Cog):
         db = PlatinumCoreDB.load_full_database()
         db["branding"]["status_text"] = text
         db["branding"]["status_type"] = activity_type
-        PlatinumCoreDB.save_database(db)
+        PlatinumCoreDB.commit("branding")
         
         activity_map = {
             "playing": discord.ActivityType.playing,
@@ -1305,7 +4555,7 @@ class CustomizationCog(commands.Cog):
         
         db = PlatinumCoreDB.load_full_database()
         db["branding"]["embed_color"] = hex_color
-        PlatinumCoreDB.save_database(db)
+        PlatinumCoreDB.commit("branding")
         
         await interaction.response.send_message(f"✅ Embed color set to {hex_color}")
 
@@ -1324,17 +4574,21 @@ class SecurityCog(commands.Cog):
         anti_spam="Enable/disable anti-spam",
         anti_raid="Enable/disable anti-raid",
         max_messages="Max messages per 10 seconds",
-        join_threshold="Max joins per minute before raid alert"
+        join_threshold="Max joins per minute before raid alert",
+        raid_response="Action taken against raiders once the threshold is crossed",
+        raid_lockdown="Lock all text channels while raid mode lasts"
     )
     async def security_config(self, interaction: discord.Interaction, 
                              anti_spam: bool = None,
                              anti_raid: bool = None,
                              max_messages: int = None,
-                             join_threshold: int = None):
+                             join_threshold: int = None,
+                             raid_response: Literal["off", "ban", "kick", "timeout"] = None,
+                             raid_lockdown: bool = None):
         if not interaction.user.guild_permissions.administrator:
             return await interaction.response.send_message(NO_PERM_MESSAGE, ephemeral=True)
         
-        db = PlatinumCoreDB.load_full_database()
+        db = PlatinumCoreDB.load_guild(interaction.guild.id)
         
         if anti_spam is not None:
             db["security_settings"]["anti_spam_enabled"] = anti_spam
@@ -1344,8 +4598,14 @@ class SecurityCog(commands.Cog):
             db["security_settings"]["max_messages_per_10s"] = max_messages
         if join_threshold is not None:
             db["security_settings"]["join_threshold_per_minute"] = join_threshold
+        if raid_response is not None:
+            db["security_settings"]["auto_ban_raiders"] = raid_response != "off"
+            if raid_response != "off":
+                db["security_settings"]["raid_action"] = raid_response
+        if raid_lockdown is not None:
+            db["security_settings"]["raid_lockdown"] = raid_lockdown
         
-        PlatinumCoreDB.save_database(db)
+        PlatinumCoreDB.commit_guild(interaction.guild.id, "security_settings")
         
         settings = db["security_settings"]
         embed = discord.Embed(title="🛡️ Security Settings", color=COLOR_PLATINUM_SUCCESS)
@@ -1353,8 +4613,65 @@ class SecurityCog(commands.Cog):
         embed.add_field(name="Anti-Raid", value="✅ Enabled" if settings["anti_raid_enabled"] else "❌ Disabled")
         embed.add_field(name="Max Messages/10s", value=settings["max_messages_per_10s"])
         embed.add_field(name="Join Threshold", value=f"{settings['join_threshold_per_minute']}/min")
+        embed.add_field(name="Raid Response",
+                        value=settings.get("raid_action", "ban").title() if settings["auto_ban_raiders"] else "Alert only")
+        embed.add_field(name="Raid Lockdown", value="✅ Enabled" if settings.get("raid_lockdown") else "❌ Disabled")
         
         await interaction.response.send_message(embed=embed)
+    
+    @app_commands.command(name="automod_config", description="Configure auto-moderation filters (Admin Only)")
+    @app_commands.describe(
+        invite_links="Delete Discord invite links",
+        bad_words="Delete messages containing blocked words",
+        add_words="Comma-separated words to block",
+        remove_words="Comma-separated words to unblock",
+        whitelist_channel="Toggle a channel that auto-mod ignores",
+        max_mentions="Max user/role mentions per message (0 to disable)"
+    )
+    async def automod_config(self, interaction: discord.Interaction,
+                             invite_links: bool = None,
+                             bad_words: bool = None,
+                             add_words: str = None,
+                             remove_words: str = None,
+                             whitelist_channel: discord.TextChannel = None,
+                             max_mentions: int = None):
+        if not interaction.user.guild_permissions.administrator:
+            return await interaction.response.send_message(NO_PERM_MESSAGE, ephemeral=True)
+        
+        db = PlatinumCoreDB.load_guild(interaction.guild.id)
+        config = db["auto_mod"]
+        
+        if invite_links is not None:
+            config["delete_invite_links"] = invite_links
+        if bad_words is not None:
+            config["delete_bad_words"] = bad_words
+        if add_words:
+            words = set(config["bad_words_list"])
+            config["bad_words_list"] += [w.strip() for w in add_words.split(",") if w.strip() and w.strip() not in words]
+        if remove_words:
+            removed = {w.strip() for w in remove_words.split(",")}
+            config["bad_words_list"] = [w for w in config["bad_words_list"] if w not in removed]
+        if whitelist_channel is not None:
+            if whitelist_channel.id in config["whitelist_channels"]:
+                config["whitelist_channels"].remove(whitelist_channel.id)
+            else:
+                config["whitelist_channels"].append(whitelist_channel.id)
+        if max_mentions is not None:
+            db["security_settings"]["max_mentions"] = max_mentions
+            PlatinumCoreDB.commit_guild(interaction.guild.id, "security_settings")
+        
+        PlatinumCoreDB.commit_guild(interaction.guild.id, "auto_mod")
+        AutoModEngine.invalidate(interaction.guild.id)
+        
+        embed = discord.Embed(title="🧹 Auto-Mod Settings", color=COLOR_PLATINUM_SUCCESS)
+        embed.add_field(name="Invite Links", value="✅ Deleted" if config["delete_invite_links"] else "❌ Allowed")
+        embed.add_field(name="Bad Words", value="✅ Deleted" if config["delete_bad_words"] else "❌ Allowed")
+        embed.add_field(name="Blocked Words", value=len(config["bad_words_list"]))
+        embed.add_field(name="Max Mentions", value=db["security_settings"].get("max_mentions", 0) or "Off")
+        embed.add_field(name="Whitelisted Channels",
+                        value=", ".join(f"<#{c}>" for c in config["whitelist_channels"]) or "None", inline=False)
+        
+        await interaction.response.send_message(embed=embed, ephemeral=True)
 
 # ==================================================================================================
 #  SECTION 13: SYSTEM COMMANDS
@@ -1367,17 +4684,34 @@ class SystemCog(commands.Cog):
         self.bot = bot
     
     @app_commands.command(name="sync", description="Sync slash commands (Owner Only)")
-    async def sync(self, interaction: discord.Interaction):
+    @app_commands.describe(this_server="Sync to this server only (instant, for development)")
+    async def sync(self, interaction: discord.Interaction, this_server: bool = False):
         if interaction.user.id != interaction.guild.owner_id:
             return await interaction.response.send_message("❌ Owner Only.", ephemeral=True)
         
         await interaction.response.defer(ephemeral=True)
-        synced = await self.bot.tree.sync()
-        await interaction.followup.send(f"✅ Synced {len(synced)} commands!")
+        synced = await CommandTreeSync.sync(self.bot, interaction.guild if this_server else None, force=True)
+        await interaction.followup.send(f"✅ Synced {synced} commands{' to this server' if this_server else ''}!")
+    
+    @app_commands.command(name="reload_database", description="Re-read data.json from disk (Owner Only)")
+    async def reload_database(self, interaction: discord.Interaction):
+        if interaction.user.id != interaction.guild.owner_id:
+            return await interaction.response.send_message("❌ Owner Only.", ephemeral=True)
+        
+        PlatinumCoreDB.reload_database()
+        PlatinumXPEngine.reset()
+        AutoModEngine.invalidate()
+        PermissionService.invalidate()
+        TicketRegistry.invalidate()
+        PanelRegistry.invalidate()
+        ViewTemplates.invalidate()
+        TournamentRegistry.invalidate()
+        PanelRegistry.register_views(self.bot)
+        await interaction.response.send_message("✅ Database reloaded from disk.", ephemeral=True)
     
     @app_commands.command(name="apply_staff", description="Apply to join the staff team")
     async def apply_staff(self, interaction: discord.Interaction):
-        await interaction.response.send_modal(StaffApplicationModal())
+        await interaction.response.send_modal(StaffApplicationModal(interaction.guild.id))
     
     @app_commands.command(name="stats", description="View bot statistics")
     async def stats(self, interaction: discord.Interaction):
@@ -1392,6 +4726,42 @@ class SystemCog(commands.Cog):
         embed.add_field(name="Last Reboot", value=stats["last_reboot"])
         embed.add_field(name="Servers", value=len(self.bot.guilds))
         
+        trackers = (SecurityEngine.spam_tracker, SecurityEngine.raid_tracker)
+        embed.add_field(
+            name="Rate Trackers",
+            value=f"{sum(len(t) for t in trackers):,} keys / {sum(t.memory_footprint() for t in trackers) / 1024:.1f} KB"
+        )
+        
+        log_stats = AuditLogQueue.stats
+        waiting, oldest = AuditLogQueue.backlog()
+        embed.add_field(
+            name="Log Queue",
+            value=f"{log_stats['sent']:,} entries in {log_stats['messages']:,} messages\n"
+                  f"Backlog: {waiting} ({oldest:.0f}s old, peak {log_stats['max_backlog']})\n"
+                  f"Failed sends: {log_stats['failed_sends']}, dropped: {log_stats['undeliverable'] + log_stats['dropped']}"
+        )
+        
+        ticket_stats = TicketCreationQueue.stats
+        p50, p99 = TicketCreationQueue.percentiles()
+        embed.add_field(
+            name="Ticket Queue",
+            value=f"{ticket_stats['created']:,} created, {ticket_stats['failed']} failed, {ticket_stats['retried']} retried\n"
+                  f"Waiting: {TicketCreationQueue.depth()} (peak {ticket_stats['max_depth']})\n"
+                  f"Time to ticket: p50 {p50:.1f}s / p99 {p99:.1f}s"
+        )
+        
+        flush_stats = PlatinumCoreDB.flush_stats
+        if flush_stats["flushes"]:
+            avg_latency = flush_stats["total_latency_ms"] / flush_stats["flushes"]
+            avg_coalesced = flush_stats["total_coalesced"] / flush_stats["flushes"]
+            embed.add_field(
+                name="DB Flushes",
+                value=f"{flush_stats['flushes']} ({flush_stats['failed_flushes']} failed)\n"
+                      f"Latency: {avg_latency:.1f}ms avg / {flush_stats['max_latency_ms']:.1f}ms max\n"
+                      f"Coalesced: {avg_coalesced:.1f} avg / {flush_stats['max_coalesced']} max saves",
+                inline=False
+            )
+        
         await interaction.response.send_message(embed=embed)
     
     @app_commands.command(name="reload_panel", description="Reload a ticket panel (Admin Only)")
@@ -1400,42 +4770,99 @@ class SystemCog(commands.Cog):
         if not interaction.user.guild_permissions.administrator:
             return await interaction.response.send_message(NO_PERM_MESSAGE, ephemeral=True)
         
-        db = PlatinumCoreDB.load_full_database()
-        
-        found = False
-        panel_data = None
-        
-        for guild_id in db.get("ticket_panels", {}):
-            if message_id in db["ticket_panels"][guild_id]:
-                panel_data = db["ticket_panels"][guild_id][message_id]
-                found = True
-                break
-        
-        if not found:
+        panel = PanelRegistry.get(int(message_id)) if message_id.isdigit() else None
+        if panel is None or panel[0] != interaction.guild.id:
             return await interaction.response.send_message("❌ Panel not found.", ephemeral=True)
         
+        await interaction.response.defer(ephemeral=True)
         try:
-            msg = None
-            for channel in interaction.guild.text_channels:
-                try:
-                    msg = await channel.fetch_message(int(message_id))
-                    if msg:
-                        break
-                except:
-                    continue
-            
-            if not msg:
-                return await interaction.response.send_message("❌ Message not found.", ephemeral=True)
-            
-            await msg.edit(view=PlatinumPanelView(panel_data.get("buttons", [])))
-            await interaction.response.send_message("✅ Panel reloaded!", ephemeral=True)
+            result = await PanelRegistry.reload(interaction.guild, int(message_id))
         except Exception as e:
-            await interaction.response.send_message(f"❌ Failed: {e}", ephemeral=True)
+            return await interaction.followup.send(f"❌ Failed: {e}")
+        
+        if result == "removed":
+            return await interaction.followup.send("🗑️ The panel message no longer exists, so it was removed.")
+        await interaction.followup.send("✅ Panel reloaded!")
+    
+    @app_commands.command(name="reload_panels", description="Reload every ticket panel in this server (Admin Only)")
+    async def reload_panels(self, interaction: discord.Interaction):
+        if not interaction.user.guild_permissions.administrator:
+            return await interaction.response.send_message(NO_PERM_MESSAGE, ephemeral=True)
+        
+        await interaction.response.defer(ephemeral=True)
+        reloaded, removed, failures = await PanelRegistry.reload_all(interaction.guild)
+        
+        lines = [f"✅ Reloaded {reloaded} panel(s)."]
+        if removed:
+            lines.append(f"🗑️ Removed {removed} panel(s) whose message was deleted.")
+        if failures:
+            lines.append(f"❌ {len(failures)} failed:")
+            lines.extend(f"• `{message_id}`: {error}" for message_id, error in failures[:10])
+        await interaction.followup.send("\n".join(lines))
+    
+    @app_commands.command(name="ticket_panel", description="Post a ticket panel with one button (Admin Only)")
+    @app_commands.describe(channel="Channel to post the panel in", category="Category new tickets are created in",
+                           title="Panel title", label="Button label", emoji="Button emoji")
+    async def ticket_panel(self, interaction: discord.Interaction, channel: discord.TextChannel, category: discord.CategoryChannel,
+                           title: str, label: str = "Open Ticket", emoji: str = "🎫",
+                           color: Literal["blue", "green", "red", "grey"] = "blue"):
+        if not interaction.user.guild_permissions.administrator:
+            return await interaction.response.send_message(NO_PERM_MESSAGE, ephemeral=True)
+        
+        buttons = [{"label": label, "emoji": emoji, "hex2": color, "cat": category.id}]
+        embed = discord.Embed(title=title, description="Click the button below to open a ticket.", color=COLOR_PLATINUM_MAIN)
+        view = PlatinumPanelView(buttons)
+        message = await channel.send(embed=embed, view=view)
+        PanelRegistry.register(interaction.guild.id, channel.id, message.id, buttons, view)
+        await interaction.response.send_message(f"✅ Panel posted in {channel.mention}.", ephemeral=True)
 
 # ==================================================================================================
 #  SECTION 14: BOT CLASS & EVENTS
 # ==================================================================================================
 
+class CommandTreeSync:
+    """Syncs the app-command tree only when it changed. The fingerprint of each synced payload
+    is kept in COMMAND_SYNC_STATE_FILE per application and scope ("global" or a guild ID),
+    so a plain restart skips the globally rate-limited sync call."""
+    
+    @staticmethod
+    def fingerprint(tree: app_commands.CommandTree, guild: Optional[discord.abc.Snowflake] = None) -> str:
+        payload = sorted((command.to_dict(tree) for command in tree.get_commands(guild=guild)), key=lambda c: c["name"])
+        return ViewTemplates.fingerprint(payload)
+    
+    @staticmethod
+    def _load_state() -> dict:
+        try:
+            with open(COMMAND_SYNC_STATE_FILE, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    @staticmethod
+    def _save_state(state: dict):
+        temp_path = f"{COMMAND_SYNC_STATE_FILE}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2)
+        os.replace(temp_path, COMMAND_SYNC_STATE_FILE)
+    
+    @staticmethod
+    async def sync(bot: commands.Bot, guild: Optional[discord.abc.Snowflake] = None, force: bool = False) -> Optional[int]:
+        """Syncs the global tree, or one guild's copy of it, if its fingerprint changed since the
+        last sync (or force is set). Returns the number of synced commands, or None if skipped."""
+        if guild is not None:
+            bot.tree.copy_global_to(guild=guild)
+        
+        key = f"{bot.application_id}:{guild.id if guild else 'global'}"
+        fingerprint = CommandTreeSync.fingerprint(bot.tree, guild)
+        state = CommandTreeSync._load_state()
+        if not force and state.get(key) == fingerprint:
+            return None
+        
+        synced = await bot.tree.sync(guild=guild)
+        state[key] = fingerprint
+        CommandTreeSync._save_state(state)
+        return len(synced)
+
 class PlatinumBotEngine(commands.Bot):
     """Main bot class."""
     
@@ -1446,43 +4873,147 @@ class PlatinumBotEngine(commands.Bot):
     async def setup_hook(self):
         print("-" * 50)
         print("[INIT] Starting setup...")
+        timings = {}
+        
+        # Usually already warmed by __main__ before the gateway connect; report that read, not this no-op
+        PlatinumCoreDB.load_full_database()
+        timings["db"] = PlatinumCoreDB._global_store().load_seconds
         
-        # Add persistent views
+        # Add persistent views (once per process; on_ready runs again on every reconnect)
+        started = time.perf_counter()
         self.add_view(StaffReviewView(0))
         self.add_view(PlatinumTicketActions())
+        panel_views = PanelRegistry.register_views(self)
+        timings["views"] = time.perf_counter() - started
+        print(f"[INIT] Registered {panel_views} ticket panel views")
         
         # Load cogs
+        started = time.perf_counter()
         await self.add_cog(SetupCog(self))
         await self.add_cog(ModerationCog(self))
+        await self.add_cog(LevelingCog(self))
+        await self.add_cog(TranscriptCog(self))
         await self.add_cog(TournamentCog(self))
         await self.add_cog(CustomizationCog(self))
         await self.add_cog(SecurityCog(self))
         await self.add_cog(SystemCog(self))
+        timings["cogs"] = time.perf_counter() - started
+        
+        # Start write-behind flushing
+        if DATABASE_WRITE_MODE == "write_behind":
+            self.database_flush_loop.change_interval(seconds=DATABASE_FLUSH_INTERVAL)
+            self.database_flush_loop.start()
+        
+        if DATABASE_BACKEND == "journal":
+            self.journal_compaction_loop.change_interval(seconds=JOURNAL_COMPACT_INTERVAL)
+            self.journal_compaction_loop.start()
+        
+        self.xp_flush_loop.change_interval(seconds=XP_FLUSH_INTERVAL)
+        self.xp_flush_loop.start()
+        self.voice_xp_loop.change_interval(seconds=VOICE_XP_SWEEP_SECONDS)
+        self.voice_xp_loop.start()
+        self.reaction_xp_loop.start()
+        self.guild_eviction_loop.start()
+        self.audit_log_loop.change_interval(seconds=AUDIT_LOG_FLUSH_SECONDS)
+        self.audit_log_loop.start()
+        self.ticket_sweep_loop.start()
+        self.invite_refresh_loop.change_interval(seconds=JoinPatternScorer.INVITE_REFRESH_SECONDS)
+        self.invite_refresh_loop.start()
+        
+        # Auto-sync commands, skipped when the tree is unchanged since the last sync
+        started = time.perf_counter()
+        scopes = [None] + ([discord.Object(id=DEV_GUILD_ID)] if DEV_GUILD_ID else [])
+        for guild in scopes:
+            scope = f"guild {guild.id}" if guild else "global"
+            try:
+                synced = await CommandTreeSync.sync(self, guild)
+                if synced is None:
+                    print(f"[INIT] Commands unchanged, skipped {scope} sync")
+                else:
+                    print(f"[INIT] Synced {synced} {scope} commands")
+            except Exception as e:
+                print(f"[ERROR] Sync failed ({scope}): {e}")
+        timings["sync"] = time.perf_counter() - started
         
-        # Auto-sync commands
-        try:
-            print("[INIT] Auto-syncing commands...")
-            synced = await self.tree.sync()
-            print(f"[INIT] Synced {len(synced)} commands")
-        except Exception as e:
-            print(f"[ERROR] Sync failed: {e}")
-        
+        print("[INIT] Startup timings: " + ", ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in timings.items()))
         print("[INIT] Setup complete!")
         print("-" * 50)
+    
+    @tasks.loop(seconds=5)
+    async def database_flush_loop(self):
+        await PlatinumCoreDB.flush_database()
+    
+    @tasks.loop(seconds=300)
+    async def journal_compaction_loop(self):
+        await PlatinumCoreDB.compact_storage()
+    
+    @tasks.loop(seconds=10)
+    async def xp_flush_loop(self):
+        PlatinumXPEngine.flush_pending_xp()
+    
+    @tasks.loop(seconds=60)
+    async def voice_xp_loop(self):
+        await VoiceXPTracker.sweep(self)
+    
+    @tasks.loop(seconds=1)
+    async def reaction_xp_loop(self):
+        await ReactionXPCoalescer.drain(self)
+    
+    @tasks.loop(seconds=3)
+    async def audit_log_loop(self):
+        await AuditLogQueue.flush()
+    
+    @tasks.loop(minutes=1)
+    async def ticket_sweep_loop(self):
+        await TicketRegistry.sweep(self)
+    
+    @tasks.loop(seconds=10)
+    async def invite_refresh_loop(self):
+        await JoinPatternScorer.refresh_invites(self)
+    
+    @tasks.loop(minutes=1)
+    async def guild_eviction_loop(self):
+        PlatinumXPEngine.flush_pending_xp()
+        for guild_id in await PlatinumCoreDB.evict_idle_guilds(GUILD_IDLE_EVICT_SECONDS):
+            PlatinumXPEngine.drop_guild(guild_id)
+            AutoModEngine.invalidate(guild_id)
+            PermissionService.invalidate(guild_id)
+            TicketRegistry.invalidate(guild_id)
+            ViewTemplates.invalidate(guild_id)
+            TournamentRegistry.invalidate(guild_id)
+        JoinPatternScorer.prune()
+    
+    async def close(self):
+        """Flushes pending logs, XP and database writes before disconnecting."""
+        for loop in (self.database_flush_loop, self.journal_compaction_loop, self.xp_flush_loop,
+                     self.voice_xp_loop, self.reaction_xp_loop, self.guild_eviction_loop, self.audit_log_loop,
+                     self.ticket_sweep_loop, self.invite_refresh_loop):
+            if loop.is_running():
+                loop.cancel()
+        await AuditLogQueue.flush(force=True)
+        await ReactionXPCoalescer.drain(self, force=True)
+        PlatinumXPEngine.flush_pending_xp()
+        await PlatinumCoreDB.flush_database()
+        await super().close()
 
 bot = PlatinumBotEngine()
 
+@bot.tree.error
+async def on_app_command_error(interaction: discord.Interaction, error: app_commands.AppCommandError):
+    """Answers failed permission checks; other errors go to the default handler."""
+    if isinstance(error, MissingPermissionTier):
+        if not interaction.response.is_done():
+            await interaction.response.send_message(str(error), ephemeral=True)
+        return
+    await app_commands.CommandTree.on_error(bot.tree, interaction, error)
+
 @bot.event
 async def on_ready():
     """Bot ready event."""
     db = PlatinumCoreDB.load_full_database()
     
-    # Reload ticket panels
-    if "ticket_panels" in db:
-        for guild_id in db["ticket_panels"]:
-            for msg_id, data in db["ticket_panels"][guild_id].items():
-                if "buttons" in data:
-                    bot.add_view(PlatinumPanelView(data["buttons"]))
+    VoiceXPTracker.start_existing_sessions(bot.guilds)
+    TicketRegistry.restore(bot.guilds)
     
     # Set status
     branding = db.get("branding", {})
@@ -1515,15 +5046,48 @@ async def on_message(message: discord.Message):
     if message.guild:
         if await SecurityEngine.check_spam(message):
             return
+        if await SecurityEngine.check_duplicates(message):
+            return
+        if await AutoModEngine.check_message(message):
+            return
         
         # Process XP
         await PlatinumXPEngine.process_message_xp(message.author)
     
     await bot.process_commands(message)
 
+@bot.event
+async def on_voice_state_update(member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
+    """Voice XP session tracking."""
+    await VoiceXPTracker.handle_voice_state(member, before, after)
+
+@bot.event
+async def on_raw_reaction_add(payload: discord.RawReactionActionEvent):
+    """Reaction XP (coalesced)."""
+    if payload.guild_id and not (payload.member and payload.member.bot):
+        ReactionXPCoalescer.record(payload.guild_id, payload.user_id, 1)
+
+@bot.event
+async def on_raw_reaction_remove(payload: discord.RawReactionActionEvent):
+    """Reaction XP (coalesced)."""
+    if payload.guild_id:
+        ReactionXPCoalescer.record(payload.guild_id, payload.user_id, -1)
+
+@bot.event
+async def on_raw_message_delete(payload: discord.RawMessageDeleteEvent):
+    """Forgets ticket panels whose message was deleted."""
+    PanelRegistry.remove(payload.message_id)
+
+@bot.event
+async def on_guild_channel_delete(channel: discord.abc.GuildChannel):
+    """Forgets tickets whose channel was deleted by hand."""
+    TicketRegistry.forget_channel(channel.guild.id, channel.id)
+
 @bot.event
 async def on_member_join(member: discord.Member):
     """Member join event."""
+    await SecurityEngine.log_action(member.guild, "MEMBER_JOIN",
+        f"{member.mention} ({member.id}), account created <t:{int(member.created_at.timestamp())}:R>", route="join")
     await SecurityEngine.check_raid(member)
 
 # ==================================================================================================
@@ -1531,7 +5095,41 @@ async def on_member_join(member: discord.Member):
 # ==================================================================================================
 
 if __name__ == "__main__":
-    PlatinumCoreDB.initialize_filesystem()
+    # Offline maintenance:
+    #   python main.py migrate-sqlite [data.json] [data.sqlite3]  (also converts guild partitions)
+    #   python main.py migrate-guilds GUILD_ID [GUILD_ID ...]      (split legacy global data per guild)
+    #   python main.py recompute-xp GUILD_ID [MULTIPLIER] [IMPORT.json]
+    if len(sys.argv) > 1 and sys.argv[1] == "migrate-sqlite":
+        source = sys.argv[2] if len(sys.argv) > 2 else DATABASE_FILENAME
+        target = sys.argv[3] if len(sys.argv) > 3 else SQLITE_FILENAME
+        PlatinumCoreDB.migrate_json_to_sqlite(source, target)
+        
+        if os.path.isdir(GUILD_DATA_DIRECTORY):
+            for filename in sorted(os.listdir(GUILD_DATA_DIRECTORY)):
+                if filename.endswith(".json"):
+                    base = os.path.join(GUILD_DATA_DIRECTORY, filename[:-len(".json")])
+                    PlatinumCoreDB.migrate_json_to_sqlite(f"{base}.json", f"{base}.sqlite3")
+        sys.exit(0)
+    
+    if len(sys.argv) > 1 and sys.argv[1] == "recompute-xp":
+        guild_id = int(sys.argv[2])
+        multiplier = float(sys.argv[3]) if len(sys.argv) > 3 else 1.0
+        imported = None
+        if len(sys.argv) > 4:
+            with open(sys.argv[4], "r", encoding="utf-8") as f:
+                imported = json.load(f)
+        count = asyncio.run(PlatinumXPEngine.bulk_recompute(guild_id, multiplier, imported))
+        PlatinumCoreDB._guild_store(guild_id).flush_now()
+        print(f"[SYSTEM] Recomputed levels for {count} members of guild {guild_id}")
+        sys.exit(0)
+    
+    if len(sys.argv) > 1 and sys.argv[1] == "migrate-guilds":
+        PlatinumCoreDB.migrate_legacy_guild_data([int(guild_id) for guild_id in sys.argv[2:]])
+        sys.exit(0)
+    
+    # Warm the in-memory database before connecting to the gateway
+    PlatinumCoreDB.load_full_database()
+    PlatinumCoreDB.warn_unclaimed_legacy_data()
     
     try:
         bot.run(BOT_TOKEN_HOLDER)
@@ -0,0 +1,49 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+
+
+def pytest_addoption(parser):
+    parser.addoption("--benchmark", action="store_true", help="also run the tests marked benchmark")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: timing run, skipped unless --benchmark is given")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--benchmark"):
+        return
+    skip = pytest.mark.skip(reason="benchmark; run with --benchmark")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    """Lists what each test recorded with record_property, so benchmark numbers show up without print."""
+    if not config.getoption("--benchmark"):
+        return
+    reports = [r for r in terminalreporter.stats.get("passed", []) if r.when == "call" and r.user_properties]
+    if reports:
+        terminalreporter.section("benchmarks")
+        for report in reports:
+            terminalreporter.write_line(f"{report.nodeid}: " + ", ".join(f"{k}={v}" for k, v in report.user_properties))
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(tmp_path, monkeypatch):
+    """Every test gets an empty working directory and no process-resident data."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(main.PlatinumCoreDB, "_store", None)
+    monkeypatch.setattr(main.PlatinumCoreDB, "_guild_stores", {})
+    main.PlatinumXPEngine.reset()
+    main.PlatinumXPEngine._leaderboards.clear()
+    yield
+    main.PlatinumXPEngine.reset()
+    main.PlatinumXPEngine._leaderboards.clear()
@@ -0,0 +1,116 @@
+import asyncio
+import types
+
+import discord
+import pytest
+
+import main
+
+Queue = main.AuditLogQueue
+GUILD, CHANNEL = 1, 50
+
+
+def http_error(cls, status):
+    return cls(types.SimpleNamespace(status=status, reason="error"), "error")
+
+
+class FakeChannel:
+    def __init__(self, error=None):
+        self.error = error
+        self.sent = []
+
+    async def send(self, embeds):
+        if self.error is not None:
+            raise self.error
+        self.sent.append(embeds)
+
+
+class FakeGuild:
+    id = GUILD
+
+    def __init__(self, channel):
+        self.channel = channel
+
+    def get_channel(self, channel_id):
+        return self.channel if channel_id == CHANNEL else None
+
+
+@pytest.fixture(autouse=True)
+def log_channel(monkeypatch):
+    monkeypatch.setattr(Queue, "_pending", {})
+    monkeypatch.setattr(Queue, "stats", {key: 0 for key in Queue.stats})
+    main.PlatinumCoreDB.load_guild(GUILD)["audit_log_channel"] = CHANNEL
+
+
+def enqueue(guild, count):
+    for i in range(count):
+        Queue.enqueue(guild, "TEST", f"entry {i}")
+
+
+def test_forbidden_drops_entries_as_undeliverable():
+    async def run():
+        guild = FakeGuild(FakeChannel(http_error(discord.Forbidden, 403)))
+        enqueue(guild, 25)
+        await Queue.flush()
+        await asyncio.sleep(0)
+        return guild
+
+    asyncio.run(run())
+    assert Queue.backlog()[0] == 0
+    assert Queue.stats["undeliverable"] == 25
+
+
+def test_transient_failure_backs_off_instead_of_retrying_on_every_enqueue():
+    async def run():
+        channel = FakeChannel(http_error(discord.HTTPException, 500))
+        guild = FakeGuild(channel)
+        enqueue(guild, 10)
+        await asyncio.sleep(0)  # auto-flush triggered by the 10th entry fails once
+        enqueue(guild, 40)
+        await asyncio.sleep(0)
+        await Queue.flush()
+        return channel
+
+    asyncio.run(run())
+    assert Queue.stats["failed_sends"] == 1
+    assert Queue.backlog()[0] == 50
+
+    # Once the channel recovers, a forced flush delivers everything that was kept
+    async def recover():
+        guild = next(iter(Queue._pending.values())).guild
+        guild.channel.error = None
+        await Queue.flush(force=True)
+        return guild.channel
+
+    channel = asyncio.run(recover())
+    assert Queue.stats["sent"] == 50 and channel.sent
+
+
+def test_backlog_is_capped(monkeypatch):
+    monkeypatch.setattr(main, "AUDIT_LOG_MAX_BACKLOG", 100)
+
+    async def run():
+        guild = FakeGuild(FakeChannel(http_error(discord.HTTPException, 503)))
+        enqueue(guild, 10)
+        await asyncio.sleep(0)
+        enqueue(guild, 500)
+
+    asyncio.run(run())
+    assert Queue.backlog()[0] == 100
+    assert Queue.stats["dropped"] == 410
+
+
+def test_early_flush_task_is_held_until_it_finishes(monkeypatch):
+    monkeypatch.setattr(Queue, "_tasks", set())
+
+    async def run():
+        channel = FakeChannel()
+        enqueue(FakeGuild(channel), 10)
+        held = set(Queue._tasks)
+        await asyncio.gather(*held)
+        return channel, held
+
+    channel, held = asyncio.run(run())
+    assert len(held) == 1
+    assert Queue._tasks == set()
+    assert len(channel.sent) == 1
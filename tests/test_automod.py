@@ -0,0 +1,58 @@
+import random
+import string
+import time
+
+import pytest
+
+import main
+
+AutoMod = main.AutoModEngine
+
+
+def rules_for(words):
+    return main._AutoModRules({"bad_words_list": words, "delete_bad_words": True, "delete_invite_links": True})
+
+
+def violation(rules, text):
+    return AutoMod.find_violation(rules, text, 0, 0)
+
+
+@pytest.mark.parametrize("text", ["room 455", "#455 issue", "call 555-7355", "order 5518", "it costs $455"])
+def test_plain_numbers_are_not_folded_into_words(text):
+    assert violation(rules_for(["ass", "shit", "sass"]), text) is None
+
+
+@pytest.mark.parametrize("text", ["b4d", "B@D", "bаd", "bád", "what a b4d!"])
+def test_obfuscated_words_still_match(text):
+    assert violation(rules_for(["bad"]), text) == "blocked word"
+
+
+def test_whole_words_only():
+    rules = rules_for(["ass"])
+    assert violation(rules, "a classic assignment") is None
+    assert violation(rules, "what an ass") == "blocked word"
+
+
+def test_invite_links():
+    assert violation(rules_for([]), "join discord.gg/abc123") == "invite link"
+
+
+@pytest.mark.benchmark
+def test_10k_term_throughput(record_property):
+    """One 10k-term list, compiled once, against a stream of ordinary chat messages."""
+    rng = random.Random(12)
+    terms = {"".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10))) for _ in range(10000)}
+    vocabulary = ["hello", "room", "455", "gg", "tournament", "starts", "at", "8pm", "team", "ready", "lol"]
+    messages = [" ".join(rng.choices(vocabulary, k=rng.randint(3, 20))) for _ in range(20000)]
+
+    started = time.perf_counter()
+    rules = rules_for(sorted(terms))
+    compile_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    hits = sum(1 for text in messages if violation(rules, text))
+    elapsed = time.perf_counter() - started
+    record_property("compile_ms", round(compile_seconds * 1000))
+    record_property("msgs_per_second", round(len(messages) / elapsed))
+
+    assert hits == 0
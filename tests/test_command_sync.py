@@ -0,0 +1,83 @@
+import asyncio
+from types import SimpleNamespace
+
+import main
+
+Sync = main.CommandTreeSync
+
+
+class FakeCommand:
+    def __init__(self, name, description):
+        self.name = name
+        self.description = description
+
+    def to_dict(self, tree):
+        return {"name": self.name, "description": self.description, "options": []}
+
+
+class FakeTree:
+    def __init__(self, commands):
+        self.commands = commands
+        self.guild_commands = {}
+        self.synced = []
+
+    def copy_global_to(self, guild):
+        self.guild_commands[guild.id] = list(self.commands)
+
+    def get_commands(self, guild=None):
+        return self.guild_commands.get(guild.id, []) if guild else self.commands
+
+    async def sync(self, guild=None):
+        self.synced.append(guild.id if guild else "global")
+        return self.get_commands(guild)
+
+
+def boot(commands, application_id=1):
+    """A freshly started bot with this command set."""
+    return SimpleNamespace(application_id=application_id, tree=FakeTree(commands))
+
+
+def commands(help_text="Show help"):
+    return [FakeCommand("rank", "Show your rank"), FakeCommand("help", help_text)]
+
+
+def test_unchanged_tree_is_not_synced_again_after_a_restart():
+    first = boot(commands())
+    assert asyncio.run(Sync.sync(first)) == 2
+    assert asyncio.run(Sync.sync(first)) is None
+
+    restarted = boot(list(reversed(commands())))
+    assert asyncio.run(Sync.sync(restarted)) is None
+    assert first.tree.synced == ["global"] and restarted.tree.synced == []
+
+
+def test_changed_tree_is_synced():
+    asyncio.run(Sync.sync(boot(commands())))
+    changed = boot(commands("Show every command"))
+    assert asyncio.run(Sync.sync(changed)) == 2
+    assert changed.tree.synced == ["global"]
+
+    added = boot(commands("Show every command") + [FakeCommand("ping", "Latency")])
+    assert asyncio.run(Sync.sync(added)) == 3
+
+
+def test_force_and_each_scope_sync_independently():
+    bot = boot(commands())
+    guild = SimpleNamespace(id=77)
+    assert asyncio.run(Sync.sync(bot)) == 2
+    assert asyncio.run(Sync.sync(bot, guild)) == 2
+    assert asyncio.run(Sync.sync(bot, guild)) is None
+    assert asyncio.run(Sync.sync(bot, force=True)) == 2
+    # Another application sharing the state file has its own fingerprints
+    other = boot(commands(), application_id=2)
+    assert asyncio.run(Sync.sync(other)) == 2
+    assert bot.tree.synced == ["global", 77, "global"]
+
+
+def test_unreadable_state_file_means_a_sync():
+    asyncio.run(Sync.sync(boot(commands())))
+    with open(main.COMMAND_SYNC_STATE_FILE, "w", encoding="utf-8") as f:
+        f.write("{not json")
+    bot = boot(commands())
+    assert asyncio.run(Sync.sync(bot)) == 2
+    assert asyncio.run(Sync.sync(bot)) is None
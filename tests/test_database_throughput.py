@@ -0,0 +1,73 @@
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import main
+
+GUILD = 1
+USERS = 5000
+LEGACY_MESSAGES = 100
+CACHED_MESSAGES = 30000
+
+
+def seeded_partition():
+    data = main.PlatinumCoreDB.seed_guild_partition(GUILD)
+    data["xp_engine"].update(global_enabled=True, cooldown_seconds=0, min_gain=20, max_gain=20)
+    data["xp_engine"]["user_data"] = {
+        str(user_id): {"xp": 0, "level": 1, "total_xp": 0, "last_xp_time": 0} for user_id in range(USERS)
+    }
+    return data
+
+
+def legacy_message(filename, user_id):
+    """The per-message path before the cache: a full parse for the spam check, another for XP,
+    then a full indented rewrite."""
+    with open(filename, "r", encoding="utf-8") as f:
+        json.load(f)["security_settings"]["anti_spam_enabled"]
+    with open(filename, "r", encoding="utf-8") as f:
+        db = json.load(f)
+    entry = db["xp_engine"]["user_data"][str(user_id)]
+    entry["total_xp"] += 20
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump(db, f, indent=4)
+
+
+@pytest.mark.benchmark
+def test_message_throughput_before_and_after_cache(record_property):
+    with open("legacy.json", "w", encoding="utf-8") as f:
+        json.dump(seeded_partition(), f)
+    started = time.perf_counter()
+    for i in range(LEGACY_MESSAGES):
+        legacy_message("legacy.json", i % USERS)
+    before = LEGACY_MESSAGES / (time.perf_counter() - started)
+
+    main.PlatinumCoreDB._guild_store(GUILD).data = seeded_partition()
+    main.PlatinumCoreDB.commit_guild(GUILD)
+    guild = SimpleNamespace(id=GUILD, name="Bench")
+    members = [SimpleNamespace(id=user_id, bot=False, guild=guild) for user_id in range(USERS)]
+
+    async def cached():
+        await main.PlatinumCoreDB.flush_database()
+        started = time.perf_counter()
+        for i in range(CACHED_MESSAGES):
+            member = members[i % USERS]
+            main.PlatinumCoreDB.load_guild(GUILD)["security_settings"]["anti_spam_enabled"]
+            await main.PlatinumXPEngine.process_message_xp(member)
+        # The batched XP flush and the disk write are part of the cost
+        main.PlatinumXPEngine.flush_pending_xp()
+        await main.PlatinumCoreDB.flush_database()
+        return CACHED_MESSAGES / (time.perf_counter() - started)
+
+    after = asyncio.run(cached())
+    record_property("msgs_per_second_before", round(before))
+    record_property("msgs_per_second_after", round(after))
+    record_property("speedup", round(after / before))
+
+    with open("legacy.json", "r", encoding="utf-8") as f:
+        assert json.load(f)["xp_engine"]["user_data"]["0"]["total_xp"] == 20
+    main.PlatinumCoreDB._guild_stores.clear()
+    totals = main.PlatinumCoreDB.load_guild(GUILD)["xp_engine"]["user_data"]
+    assert totals["0"]["total_xp"] == 20 * (CACHED_MESSAGES // USERS)
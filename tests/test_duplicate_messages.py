@@ -0,0 +1,75 @@
+import asyncio
+import datetime
+from types import SimpleNamespace
+
+import discord
+import pytest
+
+import main
+
+GUILD = 1
+
+
+class FakeAuthor:
+    def __init__(self, user_id, age_days):
+        self.id = user_id
+        self.guild_permissions = SimpleNamespace(manage_messages=False)
+        self.created_at = discord.utils.utcnow() - datetime.timedelta(days=age_days)
+        self.joined_at = self.created_at
+        self.timed_out = False
+
+    async def timeout(self, duration, reason=None):
+        self.timed_out = True
+
+
+class FakeMessage:
+    def __init__(self, author, channel_id, content):
+        self.guild = SimpleNamespace(id=GUILD)
+        self.author = author
+        self.channel = SimpleNamespace(id=channel_id)
+        self.content = content
+        self.deleted = False
+
+    async def delete(self):
+        self.deleted = True
+
+
+@pytest.fixture
+def logged(monkeypatch):
+    monkeypatch.setattr(main.SecurityEngine, "duplicate_index",
+                        main.DuplicateMessageIndex(main.DUPLICATE_WINDOW_SECONDS, main.DUPLICATE_INDEX_CAPACITY))
+    entries = []
+
+    async def log_action(guild, action_type, description, route="audit"):
+        entries.append(description)
+
+    monkeypatch.setattr(main.SecurityEngine, "log_action", log_action)
+    return entries
+
+
+def post(messages):
+    async def run():
+        return [await main.SecurityEngine.check_duplicates(message) for message in messages]
+    return asyncio.run(run())
+
+
+def test_regulars_greeting_in_one_channel_is_only_logged(logged):
+    messages = [FakeMessage(FakeAuthor(user_id, 400), 10, "good morning everyone") for user_id in range(1, 9)]
+    assert post(messages) == [False] * 8
+    assert not any(message.deleted or message.author.timed_out for message in messages)
+    assert len(logged) == 1 and "No action taken" in logged[0]
+
+
+def test_same_text_across_accounts_and_channels_is_actioned(logged):
+    text = "free nitro at totally-legit dot example"
+    messages = [FakeMessage(FakeAuthor(user_id, 400), 10 + user_id, text) for user_id in range(1, 6)]
+    assert post(messages) == [False, False, False, True, True]
+    assert messages[-1].deleted and messages[-1].author.timed_out
+    assert len(logged) == 1 and "Copies are being removed" in logged[0]
+
+
+def test_new_members_are_actioned_on_one_signal(logged):
+    text = "join my server for free stuff now"
+    messages = [FakeMessage(FakeAuthor(user_id, 400 if user_id < 4 else 0.1), 10, text) for user_id in range(1, 6)]
+    assert post(messages) == [False, False, False, True, True]
+    assert messages[3].deleted and messages[3].author.timed_out
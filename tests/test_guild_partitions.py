@@ -0,0 +1,49 @@
+import main
+
+DB = main.PlatinumCoreDB
+
+
+def write_legacy_sections():
+    legacy = DB.load_full_database()
+    legacy["permissions_tiers"] = dict(DB.default_schema()["permissions_tiers"], system_admins=[111])
+    legacy["xp_engine"] = dict(DB.default_schema()["xp_engine"], user_data={"111": {"total_xp": 900}})
+    DB.commit()
+
+
+def test_new_guild_does_not_inherit_legacy_sections():
+    write_legacy_sections()
+    partition = DB.load_guild(2)
+    assert partition["permissions_tiers"]["system_admins"] == []
+    assert partition["xp_engine"]["user_data"] == {}
+
+
+def test_legacy_guild_is_seeded_from_global_document(monkeypatch):
+    monkeypatch.setattr(main, "LEGACY_GUILD_ID", 1)
+    write_legacy_sections()
+    assert DB.load_guild(1)["permissions_tiers"]["system_admins"] == [111]
+    assert DB.load_guild(2)["permissions_tiers"]["system_admins"] == []
+
+
+def test_migration_target_is_seeded(monkeypatch):
+    monkeypatch.setattr(DB, "_migration_targets", set())
+    write_legacy_sections()
+    DB.migrate_legacy_guild_data([5])
+    assert DB.load_guild(5)["xp_engine"]["user_data"] == {"111": {"total_xp": 900}}
+    assert "xp_engine" not in DB.load_full_database()
+
+
+def test_startup_warns_when_legacy_data_has_no_target(monkeypatch, capsys):
+    monkeypatch.setattr(DB, "_migration_targets", set())
+    assert not DB.warn_unclaimed_legacy_data()
+
+    write_legacy_sections()
+    assert DB.unclaimed_legacy_sections() == ["permissions_tiers", "xp_engine"]
+    assert DB.warn_unclaimed_legacy_data()
+    out = capsys.readouterr().out
+    assert "permissions_tiers, xp_engine" in out and "LEGACY_GUILD_ID" in out
+
+    monkeypatch.setattr(main, "LEGACY_GUILD_ID", 1)
+    assert not DB.warn_unclaimed_legacy_data()
+    monkeypatch.setattr(main, "LEGACY_GUILD_ID", None)
+    monkeypatch.setattr(DB, "_migration_targets", {5})
+    assert DB.unclaimed_legacy_sections() == []
@@ -0,0 +1,149 @@
+import asyncio
+import datetime
+import time
+from types import SimpleNamespace
+
+import discord
+import pytest
+
+import main
+
+Scorer = main.JoinPatternScorer
+GUILD = 1
+
+
+@pytest.fixture(autouse=True)
+def fresh_windows(monkeypatch):
+    monkeypatch.setattr(Scorer, "_windows", {})
+    monkeypatch.setattr(Scorer, "_invite_uses", {})
+    monkeypatch.setattr(Scorer, "_active_invites", {})
+    monkeypatch.setattr(main.SecurityEngine, "raid_tracker", main.SlidingWindowRateTracker(60))
+    monkeypatch.setattr(main.RaidResponder, "_raids", {})
+
+
+@pytest.mark.parametrize("name, shape", [
+    ("raider01", "raider#"),
+    ("Raider_77", "raider_#"),
+    ("48213907", "#"),
+    ("_1234_", "#"),
+    ("___", ""),
+])
+def test_name_shape_keeps_a_placeholder_for_digits(name, shape):
+    assert Scorer.name_shape(name) == shape
+
+
+def test_all_digit_names_cluster_but_empty_shapes_do_not():
+    now = 1_000_000.0
+    # Established accounts, so only the name shape could tie them together
+    for i in range(6):
+        assert Scorer.observe(GUILD, i, now - 365 * 86400 - i * 7200, True, "_-_", now=now) is None
+    created = now - 3600
+    results = [Scorer.observe(GUILD, 100 + i, created - i * 7200, True, str(31337 + i), now=now) for i in range(6)]
+    assert results[:3] == [None] * 3
+    assert results[3] == ([100, 101, 102, 103], True)
+    assert ("shape", "") not in Scorer._windows[GUILD].sizes
+
+
+def test_cluster_is_reported_once_per_window():
+    now = 1_000_000.0
+    created = now - 600
+
+    def join(member_id, at):
+        return Scorer.observe(GUILD, member_id, created, True, f"raider{member_id}", now=at)
+
+    flags = [join(i, now + i) for i in range(10)]
+    assert [flag[1] for flag in flags if flag] == [True] + [False] * 6
+    # Once the first report has aged out of the window, a cluster still growing is reported again
+    later = now + main.JOIN_WINDOW_SECONDS + 5
+    assert [join(20 + i, later + i)[1] for i in range(4)] == [True, False, False, False]
+
+
+class FakeGuild:
+    id = GUILD
+    name = "Test"
+
+    def __init__(self, manage_guild=True):
+        self.uses = {}
+        self.listed = 0
+        self.me = SimpleNamespace(guild_permissions=SimpleNamespace(manage_guild=manage_guild))
+
+    async def invites(self):
+        self.listed += 1
+        return [SimpleNamespace(code=code, uses=uses) for code, uses in self.uses.items()]
+
+
+class FakeBot:
+    def __init__(self, *guilds):
+        self.guilds = {guild.id: guild for guild in guilds}
+
+    def get_guild(self, guild_id):
+        return self.guilds.get(guild_id)
+
+
+class FakeMember:
+    def __init__(self, guild, member_id):
+        self.guild = guild
+        self.id = member_id
+        self.name = f"raider{member_id}"
+        self.avatar = None
+        self.created_at = discord.utils.utcnow() - datetime.timedelta(minutes=5)
+
+
+def test_check_raid_alerts_once_without_auto_ban(monkeypatch):
+    alerts = []
+
+    async def log_action(guild, action_type, description, route="audit"):
+        alerts.append((action_type, description))
+
+    monkeypatch.setattr(main.SecurityEngine, "log_action", log_action)
+    guild = FakeGuild()
+
+    async def raid():
+        for member_id in range(30):
+            await main.SecurityEngine.check_raid(FakeMember(guild, member_id))
+
+    asyncio.run(raid())
+    raid_alerts = [description for action_type, description in alerts if "RAID ALERT" in description]
+    assert len(raid_alerts) == 1
+    assert not main.RaidResponder.is_active(GUILD)
+    # Attribution comes from the background refresh; joins never list invites
+    assert guild.listed == 0
+
+
+def test_background_refresh_attributes_joins_to_the_one_growing_invite():
+    guild = FakeGuild()
+    bot = FakeBot(guild)
+    guild.uses = {"summer": 10, "partner": 4}
+
+    # Only guilds with joins in the window are polled
+    asyncio.run(Scorer.refresh_invites(bot))
+    assert guild.listed == 0
+
+    Scorer.observe(GUILD, 1, 0.0, False, "someone")
+    asyncio.run(Scorer.refresh_invites(bot))
+    assert Scorer.invite_code(GUILD) is None  # baseline only
+
+    guild.uses["summer"] += 6
+    asyncio.run(Scorer.refresh_invites(bot))
+    assert Scorer.invite_code(GUILD) == "summer"
+
+    # A quiet refresh keeps the attribution; two invites growing at once is ambiguous
+    asyncio.run(Scorer.refresh_invites(bot))
+    assert Scorer.invite_code(GUILD) == "summer"
+    guild.uses["summer"] += 1
+    guild.uses["partner"] += 1
+    asyncio.run(Scorer.refresh_invites(bot))
+    assert Scorer.invite_code(GUILD) is None
+
+    guild.uses["new"] = 3
+    asyncio.run(Scorer.refresh_invites(bot))
+    assert Scorer.invite_code(GUILD) == "new"
+    Scorer._active_invites[GUILD] = ("new", time.monotonic() - 2 * Scorer.INVITE_REFRESH_SECONDS - 1)
+    assert Scorer.invite_code(GUILD) is None
+
+
+def test_refresh_skips_guilds_without_manage_server():
+    guild = FakeGuild(manage_guild=False)
+    Scorer.observe(GUILD, 1, 0.0, False, "someone")
+    asyncio.run(Scorer.refresh_invites(FakeBot(guild)))
+    assert guild.listed == 0 and Scorer._invite_uses == {}
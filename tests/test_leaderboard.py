@@ -0,0 +1,119 @@
+import bisect
+import random
+import time
+
+import pytest
+
+import main
+
+XP = main.PlatinumXPEngine
+GUILD = 1
+
+
+def test_ranked_index_matches_a_sorted_list():
+    rng = random.Random(7)
+    index = main.RankedIndex()
+    reference = []
+    # Small sublists so splits and emptied sublists happen often
+    index.LOAD = 4
+    for step in range(5000):
+        if reference and rng.random() < 0.4:
+            key = rng.choice(reference)
+            index.remove(key)
+            reference.remove(key)
+        else:
+            key = (-rng.randint(0, 500), rng.randint(0, 50))
+            index.add(key)
+            bisect.insort(reference, key)
+
+        assert len(index) == len(reference)
+        if step % 50 == 0:
+            probe = (-rng.randint(0, 500), rng.randint(0, 50))
+            assert index.rank(probe) == bisect.bisect_left(reference, probe)
+            start = rng.randint(0, len(reference))
+            assert index.slice(start, start + 10) == reference[start:start + 10]
+    assert index.slice(0, len(reference)) == reference
+
+
+def test_removing_a_missing_key_raises():
+    index = main.RankedIndex([(-5, 1), (-3, 2)])
+    with pytest.raises(KeyError):
+        index.remove((-4, 9))
+
+
+def seed(totals):
+    data = main.PlatinumCoreDB.load_guild(GUILD)["xp_engine"]["user_data"]
+    for user_id, total in totals.items():
+        level, xp = XP.level_from_total_xp(total)
+        data[str(user_id)] = {"xp": xp, "level": level, "total_xp": total, "last_xp_time": 0}
+
+
+def expected_order(totals):
+    return sorted((-total, user_id) for user_id, total in totals.items() if total > 0)
+
+
+def test_leaderboard_rank_and_pages_follow_awards():
+    rng = random.Random(3)
+    totals = {user_id: rng.randint(0, 5000) for user_id in range(1, 301)}
+    seed(totals)
+    index = XP.get_leaderboard(GUILD)
+    assert index.slice(0, len(index)) == expected_order(totals)
+
+    # Awards move members up the board without a rebuild
+    for _ in range(500):
+        user_id = rng.randint(1, 320)
+        amount = rng.randint(1, 400)
+        XP.apply_xp(GUILD, user_id, XP.get_record(GUILD, user_id), amount)
+        totals[user_id] = totals.get(user_id, 0) + amount
+
+    order = expected_order(totals)
+    assert XP.get_leaderboard(GUILD) is index
+    assert index.slice(0, len(index)) == order
+    page = main.LEADERBOARD_PAGE_SIZE
+    assert index.slice(page, 2 * page) == order[page:2 * page]
+    for user_id in rng.sample(sorted(totals), 20):
+        if totals[user_id]:
+            assert index.rank((-totals[user_id], user_id)) == order.index((-totals[user_id], user_id))
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("users", [10_000, 100_000, 1_000_000])
+def test_leaderboard_scaling(users, record_property):
+    rng = random.Random(users)
+    keys = [(-rng.randint(1, 10_000_000), user_id) for user_id in range(users)]
+
+    started = time.perf_counter()
+    index = main.RankedIndex(keys)
+    record_property("build_ms", round((time.perf_counter() - started) * 1000))
+
+    updates = 10_000
+    started = time.perf_counter()
+    for _ in range(updates):
+        user_id = rng.randrange(users)
+        old = keys[user_id]
+        new = (old[0] - rng.randint(15, 30), user_id)
+        index.remove(old)
+        index.add(new)
+        keys[user_id] = new
+    record_property("update_us", round((time.perf_counter() - started) * 1e6 / updates, 2))
+
+    queries = 10_000
+    probes = [keys[rng.randrange(users)] for _ in range(queries)]
+    started = time.perf_counter()
+    for key in probes:
+        index.rank(key)
+    record_property("rank_us", round((time.perf_counter() - started) * 1e6 / queries, 2))
+
+    started = time.perf_counter()
+    for _ in range(queries):
+        start = rng.randrange(users)
+        index.slice(start, start + main.LEADERBOARD_PAGE_SIZE)
+    record_property("page_us", round((time.perf_counter() - started) * 1e6 / queries, 2))
+
+    # What every /leaderboard call would cost without the index
+    started = time.perf_counter()
+    ordered = sorted(keys)
+    record_property("full_sort_ms", round((time.perf_counter() - started) * 1000))
+
+    assert index.slice(0, 100) == ordered[:100]
+    assert index.rank(ordered[users // 2]) == users // 2
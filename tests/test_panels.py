@@ -0,0 +1,213 @@
+import asyncio
+from types import SimpleNamespace
+
+import discord
+import pytest
+
+import main
+
+Panels = main.PanelRegistry
+GUILD = 1
+BUTTONS = [{"label": "Support", "emoji": "🎫", "hex2": "blue", "cat": 0}]
+
+
+@pytest.fixture(autouse=True)
+def fresh_panels(monkeypatch):
+    monkeypatch.setattr(Panels, "_index", None)
+    monkeypatch.setattr(Panels, "_views", {})
+
+
+def http_error(kind, status):
+    return kind(SimpleNamespace(status=status, reason=kind.__name__), "error")
+
+
+class FakeMessage:
+    def __init__(self, channel, message_id):
+        self.channel = channel
+        self.id = message_id
+
+    async def edit(self, view=None):
+        if self.id not in self.channel.messages:
+            raise http_error(discord.NotFound, 404)
+        if self.channel.forbidden:
+            raise http_error(discord.Forbidden, 403)
+        self.channel.edits.append((self.id, view))
+        if self.channel.on_edit:
+            self.channel.on_edit(self.id)
+
+
+class FakeChannel:
+    def __init__(self, channel_id, message_ids=(), forbidden=False):
+        self.id = channel_id
+        self.messages = set(message_ids)
+        self.forbidden = forbidden
+        self.edits = []
+        self.on_edit = None
+
+    def get_partial_message(self, message_id):
+        return FakeMessage(self, message_id)
+
+    async def fetch_message(self, message_id):
+        if message_id not in self.messages:
+            raise http_error(discord.NotFound, 404)
+        return FakeMessage(self, message_id)
+
+
+class FakeGuild:
+    id = GUILD
+
+    def __init__(self, *channels):
+        self.channels = {channel.id: channel for channel in channels}
+
+    @property
+    def text_channels(self):
+        return list(self.channels.values())
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+
+def panel(channel_id, message_id):
+    main.PlatinumCoreDB.load_full_database().setdefault("ticket_panels", {}).setdefault(str(GUILD), {})[
+        str(message_id)] = {"channel_id": channel_id, "buttons": BUTTONS}
+
+
+def recorded():
+    return set(Panels.guild_panels(GUILD))
+
+
+def test_reload_edits_the_message_and_reuses_an_unchanged_view():
+    channel = FakeChannel(10, [100])
+    guild = FakeGuild(channel)
+    panel(10, 100)
+
+    async def run():
+        return [await Panels.reload(guild, 100), await Panels.reload(guild, 100)]
+
+    assert asyncio.run(run()) == ["reloaded", "reloaded"]
+    assert [message_id for message_id, _ in channel.edits] == [100, 100]
+    assert channel.edits[0][1] is channel.edits[1][1]
+
+
+def test_reload_removes_panels_whose_channel_or_message_is_gone():
+    guild = FakeGuild(FakeChannel(10, [100]))
+    panel(10, 101)  # message deleted
+    panel(11, 102)  # channel deleted
+
+    async def run():
+        return [await Panels.reload(guild, 101), await Panels.reload(guild, 102)]
+
+    assert asyncio.run(run()) == ["removed", "removed"]
+    assert recorded() == set()
+    assert Panels.get(101) is None and Panels._views == {}
+
+
+def test_reload_of_an_unknown_panel_reports_it_removed():
+    assert asyncio.run(Panels.reload(FakeGuild(), 999)) == "removed"
+
+
+def test_legacy_panel_is_located_once_and_backfilled():
+    channel = FakeChannel(12, [100])
+    guild = FakeGuild(FakeChannel(10), channel)
+    main.PlatinumCoreDB.load_full_database().setdefault("ticket_panels", {})[str(GUILD)] = {
+        "100": {"buttons": BUTTONS}, "101": {"buttons": BUTTONS}}
+
+    assert asyncio.run(Panels.reload(guild, 100)) == "reloaded"
+    assert Panels.get(100)[1]["channel_id"] == 12
+    with pytest.raises(LookupError):
+        asyncio.run(Panels.reload(guild, 101))
+
+
+def test_reload_all_counts_and_survives_panels_removed_mid_run(monkeypatch):
+    monkeypatch.setattr(main, "PANEL_RELOAD_CONCURRENCY", 1)
+    live = FakeChannel(10, [100, 101])
+    guild = FakeGuild(live, FakeChannel(11, [200], forbidden=True))
+    panel(10, 100)
+    panel(10, 101)
+    panel(10, 102)  # message deleted
+    panel(11, 200)  # no permission to edit
+    panel(10, 103)  # deleted by an admin while the reload is still running
+    live.on_edit = lambda message_id: Panels.remove(103)
+
+    reloaded, removed, failures = asyncio.run(Panels.reload_all(guild))
+    assert (reloaded, removed) == (2, 2)
+    assert [(message_id, type(error)) for message_id, error in failures] == [(200, discord.Forbidden)]
+    assert recorded() == {"100", "101", "200"}
+
+
+class FakeBot:
+    def __init__(self):
+        self.views = []
+
+    def add_view(self, view, message_id=None):
+        self.views.append((message_id, view))
+
+
+def custom_ids(view):
+    return sorted(item.custom_id for item in view.children)
+
+
+def test_register_views_is_idempotent_and_follows_button_changes():
+    panel(10, 100)
+    panel(10, 101)
+    bot = FakeBot()
+
+    async def run():
+        first = Panels.register_views(bot)
+        again = Panels.register_views(bot)
+        old = Panels._views[101][1]
+
+        main.PlatinumCoreDB.load_full_database()["ticket_panels"][str(GUILD)]["101"]["buttons"] = [
+            {"label": "Appeals", "emoji": "⚖️", "hex2": "red", "cat": 0}]
+        changed = Panels.register_views(bot)
+        assert old.is_finished()
+
+        Panels.remove(100)
+        return first, again, changed, Panels.register_views(bot)
+
+    assert asyncio.run(run()) == (2, 0, 1, 0)
+    assert [message_id for message_id, _ in bot.views] == [100, 101, 101]
+    assert set(Panels._views) == {101}
+    assert bot.views[0][1].is_finished()
+
+
+def test_views_keep_their_custom_ids_across_restarts(monkeypatch):
+    panel(10, 100)
+    main.PlatinumCoreDB.load_guild(GUILD)["ticket_customization"].update(
+        claim_button_text="Take it", close_button_text="Done")
+
+    def boot():
+        """What a fresh process registers: every cache starts empty."""
+        monkeypatch.setattr(Panels, "_views", {})
+        monkeypatch.setattr(main.ViewTemplates, "_cache", {})
+        monkeypatch.setattr(main.ViewTemplates, "_ticket_defaults", None)
+        bot = FakeBot()
+        bot.add_view(main.StaffReviewView(0))
+        bot.add_view(main.PlatinumTicketActions())
+        Panels.register_views(bot)
+        return [(message_id, custom_ids(view)) for message_id, view in bot.views]
+
+    async def run():
+        first = boot()
+        assert first == boot()
+        # Views sent with messages at runtime use the same IDs as the persistent ones
+        assert custom_ids(main.PlatinumTicketActions(GUILD)) == first[1][1]
+        assert custom_ids(main.StaffReviewView(12345)) == first[0][1]
+        assert custom_ids(main.PlatinumPanelView(BUTTONS)) == first[2][1]
+        return first
+
+    assert asyncio.run(run()) == [
+        (None, ["staff_accept_btn", "staff_deny_btn"]),
+        (None, ["ticket_claim_persistent", "ticket_close_persistent"]),
+        (100, ["ticket_btn_support"]),
+    ]
+
+
+def test_templates_are_reused_until_the_section_is_replaced():
+    db = main.PlatinumCoreDB.load_guild(GUILD)
+    actions = main.ViewTemplates.ticket_actions(GUILD)
+    assert main.ViewTemplates.ticket_actions(GUILD) is actions
+    assert actions["claim_button_text"] == db["ticket_customization"]["claim_button_text"]
+
+    db["ticket_customization"] = {**db["ticket_customization"], "claim_button_text": "Take it"}
+    assert main.ViewTemplates.ticket_actions(GUILD)["claim_button_text"] == "Take it"
@@ -0,0 +1,103 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import main
+
+Perms = main.PermissionService
+GUILD = 1
+OWNER = 99
+
+
+@pytest.fixture(autouse=True)
+def fresh_indexes(monkeypatch):
+    monkeypatch.setattr(Perms, "_indexes", {})
+
+
+def member(user_id, role_ids=()):
+    guild = SimpleNamespace(id=GUILD, owner_id=OWNER)
+    return SimpleNamespace(id=user_id, guild=guild, roles=[SimpleNamespace(id=r) for r in role_ids])
+
+
+def stored(section, tier):
+    return main.PlatinumCoreDB.load_guild(GUILD)[section][tier]
+
+
+def test_grant_and_revoke_a_user():
+    assert not Perms.has(member(5), Perms.MODERATOR)
+    assert Perms.grant(GUILD, "regular_mods", 5)
+    assert not Perms.grant(GUILD, "regular_mods", 5)
+    assert stored("permissions_tiers", "regular_mods") == [5]
+    assert Perms.has(member(5), Perms.MODERATOR)
+    assert Perms.has(member(5), Perms.STAFF)
+    assert not Perms.has(member(5), Perms.SENIOR_MOD)
+
+    assert Perms.revoke(GUILD, "regular_mods", 5)
+    assert not Perms.revoke(GUILD, "regular_mods", 5)
+    assert stored("permissions_tiers", "regular_mods") == []
+    assert Perms.tiers_of(member(5)) == 0
+
+
+def test_role_tiers_apply_to_everyone_holding_the_role():
+    assert Perms.grant(GUILD, "app_reviewers", 700, is_role=True)
+    assert stored("permission_roles", "app_reviewers") == [700]
+    assert Perms.has(member(5, [700]), Perms.REVIEWER)
+    assert not Perms.has(member(6, [701]), Perms.REVIEWER)
+
+    # A direct grant and a role grant combine, and revoking one leaves the other
+    Perms.grant(GUILD, "senior_mods", 5)
+    assert Perms.tiers_of(member(5, [700])) == Perms.BITS["app_reviewers"] | Perms.BITS["senior_mods"]
+    assert Perms.revoke(GUILD, "app_reviewers", 700, is_role=True)
+    assert Perms.tiers_of(member(5, [700])) == Perms.BITS["senior_mods"]
+
+
+def test_owner_passes_every_check():
+    assert Perms.has(member(OWNER), Perms.ADMIN)
+
+
+def test_grant_creates_a_tier_missing_from_older_data():
+    tiers = main.PlatinumCoreDB.load_guild(GUILD)["permissions_tiers"]
+    del tiers["tournament_managers"]
+    Perms.invalidate(GUILD)
+    assert not Perms.has(member(5), Perms.TOURNAMENT_MANAGER)
+
+    assert not Perms.revoke(GUILD, "tournament_managers", 5)
+    assert Perms.grant(GUILD, "tournament_managers", 5)
+    assert stored("permissions_tiers", "tournament_managers") == [5]
+    assert Perms.has(member(5), Perms.TOURNAMENT_MANAGER)
+
+
+class FakeResponse:
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, content, ephemeral=False):
+        self.sent.append(content)
+
+
+def interaction(user_id=OWNER):
+    return SimpleNamespace(guild=SimpleNamespace(id=GUILD, owner_id=OWNER), user=SimpleNamespace(id=user_id),
+                           response=FakeResponse())
+
+
+def test_grant_permission_command_takes_a_user_or_a_role():
+    cog = main.SetupCog(bot=None)
+    user = SimpleNamespace(id=5, mention="<@5>")
+    role = SimpleNamespace(id=700, mention="<@&700>")
+
+    async def run(command, **kwargs):
+        itn = interaction(kwargs.pop("invoker", OWNER))
+        await command.callback(cog, itn, "trial_mods", **kwargs)
+        return itn.response.sent[0]
+
+    assert asyncio.run(run(main.SetupCog.grant_permission, user=user)).startswith("✅")
+    assert asyncio.run(run(main.SetupCog.grant_permission, role=role)).startswith("✅")
+    assert asyncio.run(run(main.SetupCog.grant_permission, user=user)).startswith("ℹ️")
+    assert asyncio.run(run(main.SetupCog.grant_permission)).startswith("❌")
+    assert asyncio.run(run(main.SetupCog.grant_permission, user=role, invoker=5)).startswith("❌")
+    assert stored("permissions_tiers", "trial_mods") == [5]
+    assert stored("permission_roles", "trial_mods") == [700]
+
+    assert asyncio.run(run(main.SetupCog.revoke_permission, role=role)).startswith("✅")
+    assert stored("permission_roles", "trial_mods") == []
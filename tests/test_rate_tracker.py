@@ -0,0 +1,115 @@
+import random
+import sys
+import time
+from collections import defaultdict
+
+import pytest
+
+import main
+
+Tracker = main.SlidingWindowRateTracker
+FLOOD_USERS = 50_000
+FLOOD_MESSAGES = 500_000
+MAX_MSGS = 5
+
+
+def test_counts_only_events_inside_the_window():
+    tracker = Tracker(10)
+    assert [tracker.hit("a", 100, now=t) for t in (0, 1, 2)] == [1, 2, 3]
+    assert tracker.hit("b", 100, now=3) == 1
+    # Events at 0 and 1 have aged out; an event exactly `window` old is outside it
+    assert tracker.hit("a", 100, now=11) == 2
+
+
+def test_capacity_bounds_what_a_key_keeps():
+    tracker = Tracker(10)
+    counts = [tracker.hit("a", 4, now=i * 0.01) for i in range(50)]
+    assert counts == [1, 2, 3] + [4] * 47
+    assert len(tracker._events["a"]) == 4
+
+
+def test_raising_capacity_keeps_recent_events():
+    tracker = Tracker(10)
+    for i in range(3):
+        tracker.hit("a", 3, now=i)
+    assert tracker.hit("a", 10, now=3) == 4
+
+
+def test_idle_keys_are_swept_after_a_window():
+    tracker = Tracker(10)
+    for key in range(100):
+        tracker.hit(key, 5, now=1)
+    tracker.hit("active", 5, now=8)
+    assert len(tracker) == 101
+    tracker.hit("active", 5, now=12)
+    assert len(tracker) == 1
+
+
+def test_matches_a_full_event_log():
+    rng = random.Random(11)
+    tracker = Tracker(10)
+    log = defaultdict(list)
+    now = 0.0
+    for _ in range(5000):
+        now += rng.random()
+        key = rng.randrange(20)
+        log[key].append(now)
+        expected = sum(1 for t in log[key][-MAX_MSGS:] if t > now - 10)
+        assert tracker.hit(key, MAX_MSGS, now=now) == expected
+
+
+def legacy_hit(tracker, key, now, window):
+    """The pre-tracker check_spam path: rebuild the key's list on every message."""
+    tracker[key] = [t for t in tracker[key] if now - t < window]
+    tracker[key].append(now)
+    return len(tracker[key])
+
+
+def legacy_footprint(tracker):
+    total = sys.getsizeof(tracker)
+    for key, events in tracker.items():
+        total += sys.getsizeof(key) + sys.getsizeof(events) + 24 * len(events)
+    return total
+
+
+@pytest.mark.benchmark
+def test_50k_user_flood(record_property):
+    # A flood spread over 50k members, then one quiet window in which only a few keep talking
+    rng = random.Random(5)
+    keys = [(1, user_id) for user_id in range(FLOOD_USERS)]
+    order = keys * (FLOOD_MESSAGES // FLOOD_USERS)
+    rng.shuffle(order)
+    flood = [(key, i * 0.0001) for i, key in enumerate(order)]
+    quiet_start = flood[-1][1] + 11
+    quiet = [(keys[i % 100], quiet_start + i * 0.01) for i in range(1000)]
+
+    legacy = defaultdict(list)
+    started = time.perf_counter()
+    for key, now in flood:
+        legacy_hit(legacy, key, now, 10)
+    legacy_rate = FLOOD_MESSAGES / (time.perf_counter() - started)
+    legacy_flood_bytes = legacy_footprint(legacy)
+    for key, now in quiet:
+        legacy_hit(legacy, key, now, 10)
+
+    tracker = Tracker(10)
+    started = time.perf_counter()
+    for key, now in flood:
+        tracker.hit(key, MAX_MSGS + 1, now=now)
+    tracker_rate = FLOOD_MESSAGES / (time.perf_counter() - started)
+    tracker_flood_bytes = tracker.memory_footprint()
+    for key, now in quiet:
+        tracker.hit(key, MAX_MSGS + 1, now=now)
+
+    record_property("legacy_msgs_per_second", round(legacy_rate))
+    record_property("tracker_msgs_per_second", round(tracker_rate))
+    record_property("legacy_flood_kib", legacy_flood_bytes // 1024)
+    record_property("tracker_flood_kib", tracker_flood_bytes // 1024)
+    record_property("legacy_keys_after_quiet", len(legacy))
+    record_property("tracker_keys_after_quiet", len(tracker))
+    record_property("legacy_quiet_kib", legacy_footprint(legacy) // 1024)
+    record_property("tracker_quiet_kib", tracker.memory_footprint() // 1024)
+
+    # The old dict never forgets a member; the tracker keeps only the ones still talking
+    assert len(legacy) == FLOOD_USERS
+    assert len(tracker) == 100
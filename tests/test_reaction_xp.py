@@ -0,0 +1,97 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import main
+
+XP = main.PlatinumXPEngine
+GUILD = 1
+
+
+class FakeGuild:
+    def __init__(self, member_ids):
+        self.id = GUILD
+        self.name = "Test"
+        self.members = {user_id: SimpleNamespace(id=user_id, bot=False, guild=self) for user_id in member_ids}
+
+    def get_member(self, user_id):
+        return self.members.get(user_id)
+
+
+class FakeBot:
+    def __init__(self, guild):
+        self.guild = guild
+
+    def get_guild(self, guild_id):
+        return self.guild if guild_id == self.guild.id else None
+
+
+def reaction(user_id, message_id=42):
+    return SimpleNamespace(guild_id=GUILD, user_id=user_id, message_id=message_id, member=None)
+
+
+def test_10k_reactions_on_one_message_coalesce(monkeypatch):
+    monkeypatch.setattr(main.ReactionXPCoalescer, "_pending", {})
+    db = main.PlatinumCoreDB.load_guild(GUILD)
+    db["xp_engine"]["global_enabled"] = True
+    per_reaction = db["xp_system"]["xp_per_reaction"]
+
+    # A giveaway: 9,000 members react once, 1,000 of them change their mind and unreact
+    adders = range(1, 9001)
+    removers = range(1, 1001)
+    bot = FakeBot(FakeGuild(adders))
+
+    async def burst():
+        for user_id in adders:
+            await main.on_raw_reaction_add(reaction(user_id))
+        for user_id in removers:
+            await main.on_raw_reaction_remove(reaction(user_id))
+
+        # Every window is still open, so nothing has been applied yet
+        await main.ReactionXPCoalescer.drain(bot)
+        assert len(main.ReactionXPCoalescer._pending) == 9000
+        assert not XP._dirty[GUILD]
+
+        await main.ReactionXPCoalescer.drain(bot, force=True)
+
+    asyncio.run(burst())
+
+    assert main.ReactionXPCoalescer._pending == {}
+    # One update per member who kept their reaction, none for those who removed it
+    assert XP._dirty[GUILD] == set(range(1001, 9001))
+    assert all(XP._records[GUILD][user_id].total_xp == per_reaction for user_id in range(1001, 9001))
+    assert all(user_id not in XP._records[GUILD] for user_id in removers)
+
+
+def test_reactions_share_the_message_cooldown(monkeypatch):
+    monkeypatch.setattr(main.ReactionXPCoalescer, "_pending", {})
+    main.PlatinumCoreDB.load_guild(GUILD)["xp_engine"]["global_enabled"] = True
+    bot = FakeBot(FakeGuild([5]))
+    XP.get_record(GUILD, 5).last_xp_time = time.time()
+
+    for _ in range(3):
+        main.ReactionXPCoalescer.record(GUILD, 5, 1)
+    asyncio.run(main.ReactionXPCoalescer.drain(bot, force=True))
+
+    assert XP.get_record(GUILD, 5).total_xp == 0
+    assert main.ReactionXPCoalescer._pending == {}
+
+
+def test_reacting_to_many_messages_earns_one_award(monkeypatch):
+    monkeypatch.setattr(main.ReactionXPCoalescer, "_pending", {})
+    db = main.PlatinumCoreDB.load_guild(GUILD)
+    db["xp_engine"]["global_enabled"] = True
+    per_reaction = db["xp_system"]["xp_per_reaction"]
+    bot = FakeBot(FakeGuild([5]))
+
+    async def farm():
+        for message_id in range(200):
+            await main.on_raw_reaction_add(reaction(5, message_id))
+        await main.ReactionXPCoalescer.drain(bot, force=True)
+        # A second window inside the cooldown earns nothing more
+        for message_id in range(200, 400):
+            await main.on_raw_reaction_add(reaction(5, message_id))
+        await main.ReactionXPCoalescer.drain(bot, force=True)
+
+    asyncio.run(farm())
+    assert XP.get_record(GUILD, 5).total_xp == per_reaction
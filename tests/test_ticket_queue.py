@@ -0,0 +1,109 @@
+import asyncio
+import time
+from collections import deque
+
+import discord
+import pytest
+
+import main
+
+Queue = main.TicketCreationQueue
+GUILD = 1
+
+
+@pytest.fixture(autouse=True)
+def fresh_queue(monkeypatch):
+    monkeypatch.setattr(Queue, "_queues", {})
+    monkeypatch.setattr(Queue, "wait_times", deque(maxlen=1000))
+    monkeypatch.setattr(Queue, "stats", {key: 0 for key in Queue.stats})
+    monkeypatch.setattr(main, "TICKET_CREATE_CONCURRENCY", 3)
+    monkeypatch.setattr(main, "TICKET_CREATE_RATE", 500.0)
+
+
+def creator(order, name, latency=0.005, fail_first=None):
+    """A fake create_text_channel: takes `latency` seconds and returns the ticket's name."""
+    async def create():
+        if fail_first is not None and name not in order["failed"]:
+            order["failed"].add(name)
+            raise fail_first
+        await asyncio.sleep(latency)
+        order["created"].append(name)
+        return name
+    return create
+
+
+def burst_of(order, clicks):
+    async def burst():
+        submitted = [Queue.submit(GUILD, Queue.MEMBER_PRIORITY, creator(order, i)) for i in range(clicks)]
+        peak = Queue.depth()
+        results = await asyncio.gather(*(future for future, _ in submitted))
+        return submitted, peak, results
+    return burst()
+
+
+def test_500_click_burst_keeps_click_order():
+    order = {"created": [], "failed": set()}
+    submitted, peak, results = asyncio.run(burst_of(order, 500))
+
+    assert results == list(range(500))
+    # Click order is kept, and each user was told their place in line
+    assert order["created"][:3] == [0, 1, 2] and order["created"] == sorted(order["created"])
+    assert [position for _, position in submitted] == [0, 0, 0] + list(range(1, 498))
+    assert peak == 497
+    assert Queue.stats == {"created": 500, "failed": 0, "retried": 0, "max_depth": 497}
+    assert Queue._queues == {}
+    assert len(Queue.wait_times) == 500
+
+
+def test_workers_are_held_until_they_finish(monkeypatch):
+    monkeypatch.setattr(Queue, "_workers", set())
+    order = {"created": [], "failed": set()}
+
+    async def burst():
+        futures = [Queue.submit(GUILD, Queue.MEMBER_PRIORITY, creator(order, i))[0] for i in range(10)]
+        held = set(Queue._workers)
+        await asyncio.gather(*futures)
+        await asyncio.gather(*held)
+        return held
+
+    assert len(asyncio.run(burst())) == 3
+    assert Queue._workers == set()
+
+
+@pytest.mark.benchmark
+def test_500_click_burst_latency(record_property):
+    order = {"created": [], "failed": set()}
+    started = time.perf_counter()
+    asyncio.run(burst_of(order, 500))
+    p50, p99 = Queue.percentiles()
+    # 3 workers over 5ms calls is ~1.7ms a ticket; the last click waits for everyone ahead of it
+    record_property("burst_s", round(time.perf_counter() - started, 2))
+    record_property("p50_ms", round(p50 * 1000))
+    record_property("p99_ms", round(p99 * 1000))
+
+
+def test_staff_tickets_jump_the_queue():
+    order = {"created": [], "failed": set()}
+
+    async def burst():
+        futures = [Queue.submit(GUILD, Queue.MEMBER_PRIORITY, creator(order, f"member-{i}"))[0] for i in range(50)]
+        staff, position = Queue.submit(GUILD, Queue.STAFF_PRIORITY, creator(order, "staff"))
+        await asyncio.gather(staff, *futures)
+        return position
+
+    position = asyncio.run(burst())
+    assert position == 1
+    assert order["created"].index("staff") <= 3
+
+
+def test_rate_limited_creation_is_retried():
+    order = {"created": [], "failed": set()}
+    limited = discord.RateLimited(0.05)
+
+    async def burst():
+        futures = [Queue.submit(GUILD, Queue.MEMBER_PRIORITY, creator(order, i, fail_first=limited if i == 4 else None))[0]
+                   for i in range(10)]
+        return await asyncio.gather(*futures)
+
+    assert sorted(asyncio.run(burst())) == list(range(10))
+    assert Queue.stats["retried"] == 1 and Queue.stats["failed"] == 0
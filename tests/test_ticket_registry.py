@@ -0,0 +1,134 @@
+import asyncio
+
+import pytest
+
+import main
+
+Registry = main.TicketRegistry
+GUILD = 1
+PANEL = "support"
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry(monkeypatch):
+    monkeypatch.setattr(Registry, "_creating", set())
+    monkeypatch.setattr(Registry, "_indexes", {})
+    monkeypatch.setattr(Registry, "_expiries", {})
+
+
+class FakeChannel:
+    def __init__(self, channel_id):
+        self.id = channel_id
+        self.deleted = False
+
+    async def delete(self, reason=None):
+        self.deleted = True
+
+
+class FakeGuild:
+    id = GUILD
+
+    def __init__(self, *channel_ids):
+        self.channels = {channel_id: FakeChannel(channel_id) for channel_id in channel_ids}
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+
+class FakeBot:
+    def __init__(self, guild):
+        self.guild = guild
+
+    def get_guild(self, guild_id):
+        return self.guild if guild_id == GUILD else None
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(main.time, "time", lambda: now[0])
+    return now
+
+
+def grace_seconds():
+    return main.PlatinumCoreDB.load_guild(GUILD)["ticket_reopen"]["grace_period_minutes"] * 60
+
+
+def test_one_creation_in_flight_and_one_open_ticket_per_panel():
+    guild = FakeGuild(500)
+    assert Registry.begin(GUILD, 7, PANEL)
+    assert not Registry.begin(GUILD, 7, PANEL)
+    # Other panels and other members are independent
+    assert Registry.begin(GUILD, 7, "appeals")
+    assert Registry.begin(GUILD, 8, PANEL)
+
+    Registry.register(GUILD, 7, PANEL, 500)
+    Registry.end(GUILD, 7, PANEL)
+    assert Registry.begin(GUILD, 7, PANEL)
+    assert Registry.open_channel(guild, 7, PANEL) is guild.channels[500]
+    assert Registry.open_channel(guild, 7, "appeals") is None
+    assert Registry.owner_of(GUILD, 500) == 7
+
+
+def test_open_record_is_dropped_when_its_channel_is_gone():
+    Registry.register(GUILD, 7, PANEL, 500)
+    assert Registry.open_channel(FakeGuild(), 7, PANEL) is None
+    assert Registry.owner_of(GUILD, 500) is None
+    assert main.PlatinumCoreDB.load_guild(GUILD)["ticket_system"]["active_tickets"] == {}
+
+
+def test_close_keeps_the_ticket_reopenable_until_the_grace_period_ends(clock):
+    guild = FakeGuild(500)
+    Registry.register(GUILD, 7, PANEL, 500)
+    assert Registry.close(GUILD, 500) == clock[0] + grace_seconds()
+    assert Registry.open_channel(guild, 7, PANEL) is None
+    assert Registry.owner_of(GUILD, 500) == 7
+
+    clock[0] += grace_seconds() - 1
+    assert Registry.reopenable_channel(guild, 7, PANEL) is guild.channels[500]
+    clock[0] += 2
+    assert Registry.reopenable_channel(guild, 7, PANEL) is None
+
+    asyncio.run(Registry.sweep(FakeBot(guild)))
+    assert guild.channels[500].deleted
+    assert Registry.owner_of(GUILD, 500) is None
+    assert main.PlatinumCoreDB.load_guild(GUILD)["ticket_reopen"]["reopenable_channels"] == {}
+
+
+def test_reopening_inside_the_grace_period_cancels_the_deletion(clock):
+    guild = FakeGuild(500)
+    Registry.register(GUILD, 7, PANEL, 500)
+    Registry.close(GUILD, 500)
+    clock[0] += 60
+    channel = Registry.reopenable_channel(guild, 7, PANEL)
+    Registry.register(GUILD, 7, PANEL, channel.id)
+
+    clock[0] += grace_seconds()
+    asyncio.run(Registry.sweep(FakeBot(guild)))
+    assert not guild.channels[500].deleted
+    assert Registry.open_channel(guild, 7, PANEL) is channel
+    assert Registry.reopenable_channel(guild, 7, PANEL) is None
+
+
+def test_close_deletes_at_once_when_reopening_is_disabled():
+    main.PlatinumCoreDB.load_guild(GUILD)["ticket_reopen"] = {"enabled": False, "grace_period_minutes": 10}
+    Registry.register(GUILD, 7, PANEL, 500)
+    assert Registry.close(GUILD, 500) is None
+    assert Registry.owner_of(GUILD, 500) is None
+    # Untracked channels are deleted at once too
+    assert Registry.close(GUILD, 501) is None
+
+
+def test_restore_reschedules_deletions_after_a_restart(clock, monkeypatch):
+    guild = FakeGuild(500)
+    Registry.register(GUILD, 7, PANEL, 500)
+    Registry.close(GUILD, 500)
+    # A restart: the in-memory schedule and index are gone, the partition is not
+    monkeypatch.setattr(Registry, "_expiries", {})
+    Registry.invalidate()
+
+    Registry.restore([guild])
+    assert Registry._expiries == {500: (GUILD, clock[0] + grace_seconds())}
+    clock[0] += grace_seconds() + 1
+    asyncio.run(Registry.sweep(FakeBot(guild)))
+    assert guild.channels[500].deleted
@@ -0,0 +1,75 @@
+import asyncio
+import random
+from types import SimpleNamespace
+
+import pytest
+
+import main
+
+Registry = main.TournamentRegistry
+GUILD, TOURNAMENT = 1, "t1"
+
+
+@pytest.fixture(autouse=True)
+def tournament(monkeypatch):
+    monkeypatch.setattr(Registry, "_locks", {})
+    monkeypatch.setattr(Registry, "_indexes", {})
+    record = {
+        "name": "Cup", "max_teams": 64, "team_size": 5,
+        "registered_teams": [], "waitlist": [], "waitlist_size": 16,
+        "blacklisted_users": [13, 666], "whitelisted_roles": [], "registration_open": True,
+    }
+    main.PlatinumCoreDB.load_guild(GUILD)["tournaments"]["active_tournaments"][TOURNAMENT] = record
+    return record
+
+
+def member(user_id):
+    return SimpleNamespace(id=user_id, roles=[])
+
+
+def test_1000_concurrent_submissions(tournament):
+    rng = random.Random(25)
+    # 1,000 submissions: 900 distinct leaders, some resubmitting, some clashing team names
+    submissions = [(user_id, f"Team {user_id}") for user_id in range(1, 901)]
+    submissions += [(rng.randint(1, 900), f"Other {i}") for i in range(50)]
+    submissions += [(1000 + i, f"  team {rng.randint(1, 900)} ") for i in range(50)]
+    rng.shuffle(submissions)
+
+    async def submit(user_id, name):
+        await asyncio.sleep(rng.random() / 1000)
+        return await Registry.register(GUILD, TOURNAMENT, member(user_id), {"name": name, "roster": [], "contact": ""})
+
+    async def storm():
+        return await asyncio.gather(*(submit(user_id, name) for user_id, name in submissions))
+
+    results = asyncio.run(storm())
+    statuses = [status for status, _ in results]
+
+    assert statuses.count("registered") == 64
+    assert statuses.count("waitlisted") == 16
+    teams, waitlist = tournament["registered_teams"], tournament["waitlist"]
+    assert len(teams) == 64 and len(waitlist) == 16
+    assert sorted(position for status, position in results if status == "waitlisted") == list(range(1, 17))
+    # No leader, team name or blacklisted user got in twice or at all, respectively
+    entries = teams + waitlist
+    assert len({team["leader"] for team in entries}) == 80
+    assert len({Registry.team_key(team["name"]) for team in entries}) == 80
+    assert not {13, 666} & {team["leader"] for team in entries}
+    assert statuses.count("banned") == sum(1 for user_id, _ in submissions if user_id in (13, 666))
+    assert set(statuses) <= {"registered", "waitlisted", "full", "banned", "duplicate_team", "duplicate_leader"}
+
+
+def test_concurrent_withdrawals_promote_in_order(tournament):
+    tournament["max_teams"], tournament["waitlist_size"] = 4, 4
+
+    async def storm():
+        await asyncio.gather(*(Registry.register(GUILD, TOURNAMENT, member(user_id), {"name": f"T{user_id}"})
+                               for user_id in range(1, 9)))
+        return await asyncio.gather(*(Registry.withdraw(GUILD, TOURNAMENT, user_id) for user_id in (1, 2, 3, 99)))
+
+    results = asyncio.run(storm())
+
+    assert [promoted["leader"] for _, promoted in results[:3]] == [5, 6, 7]
+    assert results[3] == (None, None)
+    assert [team["leader"] for team in tournament["registered_teams"]] == [4, 5, 6, 7]
+    assert [team["leader"] for team in tournament["waitlist"]] == [8]
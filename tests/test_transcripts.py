@@ -0,0 +1,200 @@
+import asyncio
+import datetime
+import gzip
+import threading
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+import pytest
+
+import main
+
+HISTORY_MESSAGES = 50_000
+WORDS = ("printer", "floor", "jammed", "again", "restart", "driver", "ticket", "queue", "paper", "tray",
+         "error", "code", "office", "network", "thanks", "still", "broken", "update", "works", "now")
+
+
+class FakeAuthor:
+    def __init__(self, user_id):
+        self.id = user_id
+
+    def __str__(self):
+        return f"member{self.id}"
+
+
+def history(count, start=datetime.datetime(2024, 5, 1, 12, 0, 0)):
+    authors = [FakeAuthor(user_id) for user_id in range(1, 6)]
+    return [
+        SimpleNamespace(
+            author=authors[i % len(authors)],
+            content=" ".join(WORDS[(i * 7 + k) % len(WORDS)] for k in range(i % 9 + 3)),
+            created_at=start + datetime.timedelta(seconds=i),
+            edited_at=None,
+            attachments=[],
+            embeds=[],
+        )
+        for i in range(count)
+    ]
+
+
+def legacy_transcript(channel_name, closed_by, closed_at, messages):
+    """The transcript do_close built in memory before the writer streamed it."""
+    transcript = f"=== TICKET TRANSCRIPT ===\nChannel: {channel_name}\nClosed by: {closed_by}\nDate: {closed_at}\n\n"
+    for msg in messages:
+        timestamp = msg.created_at.strftime('%Y-%m-%d %H:%M:%S')
+        transcript += f"[{timestamp}] {msg.author}: {msg.content}\n"
+    return transcript
+
+
+def write(messages, compress=False, html=False):
+    writer = main.TranscriptWriter("ticket-0042", "staff#0001", compress=compress, html=html)
+    for msg in messages:
+        writer.add_message(msg)
+    return writer, writer.finish()
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_streamed_text_matches_the_old_transcript(compress):
+    # Enough messages to spill the spooled file to disk and drain the buffer many times
+    messages = history(20_000)
+    writer, files = write(messages, compress=compress)
+    data = files[0].fp.read()
+    if compress:
+        data = gzip.decompress(data)
+        assert files[0].filename == "transcript-ticket-0042.txt.gz"
+    else:
+        assert files[0].filename == "transcript-ticket-0042.txt"
+
+    assert data.decode("utf-8") == legacy_transcript("ticket-0042", "staff#0001", writer.closed_at, messages)
+    assert writer.message_count == len(messages)
+    writer.close()
+
+
+def test_attachments_embeds_and_edits_follow_the_message_line():
+    msg = history(1)[0]
+    msg.edited_at = msg.created_at + datetime.timedelta(minutes=2)
+    msg.attachments = [SimpleNamespace(filename="log.txt", size=120, url="https://cdn.example/log.txt")]
+    msg.embeds = [SimpleNamespace(title="Error", description="line one\nline two",
+                                  fields=[SimpleNamespace(name="code", value="E42")])]
+    writer, files = write([msg], html=True)
+    lines = files[0].fp.read().decode("utf-8").splitlines()[-3:]
+    assert lines == [
+        f"[2024-05-01 12:00:00] member1: {msg.content} (edited 2024-05-01 12:02:00)",
+        "    [attachment] log.txt (120 bytes): https://cdn.example/log.txt",
+        "    [embed] Error | line one line two | code: E42",
+    ]
+    html = files[1].fp.read().decode("utf-8")
+    assert html.endswith("</body></html>\n") and "📎 log.txt" in html
+    writer.close()
+
+
+@pytest.fixture
+def archive(monkeypatch):
+    monkeypatch.setattr(main.TranscriptArchive, "_archives", {})
+    return asyncio.run(main.TranscriptArchive.for_guild(1))
+
+
+def closed_ticket(channel_name, lines):
+    """A finished writer for a ticket whose messages are (author id, content) pairs."""
+    messages = history(len(lines))
+    for msg, (author_id, content) in zip(messages, lines):
+        msg.author, msg.content = FakeAuthor(author_id), content
+    writer = main.TranscriptWriter(channel_name, "staff#0001", compress=False, html=False)
+    for msg in messages:
+        writer.add_message(msg)
+    writer.finish()
+    return writer
+
+
+def archive_all(archive, *writers):
+    async def run():
+        return [await archive.add(writer) for writer in writers]
+    return asyncio.run(run())
+
+
+def test_archive_search_by_words_author_and_date(archive):
+    numbers = archive_all(
+        archive,
+        closed_ticket("ticket-1", [(1, "my printer is jammed"), (2, "try turning it off")]),
+        closed_ticket("ticket-2", [(3, "printer driver will not install")]),
+        closed_ticket("ticket-3", [(1, "refund for my order please")]),
+    )
+    assert numbers == [1, 2, 3]
+
+    total, entries, _ = archive.search("printer")
+    assert total == 2 and [e["channel"] for e in entries] == ["ticket-2", "ticket-1"]
+    assert archive.search("printer jammed")[0] == 1
+    assert archive.search("PRINTER from:member1")[1][0]["channel"] == "ticket-1"
+    assert [e["ticket"] for e in archive.search("<@1>")[1]] == [3, 1]
+    assert archive.search("printer", limit=1)[:2] == (2, [archive.tickets[1]])
+    assert archive.search("scanner") == (0, [], ["scanner"])
+
+    today = datetime.datetime.now()
+    assert archive.search(f"date:{today:%Y-%m-%d}")[0] == 3
+    assert archive.search(f"printer date:{today:%Y-%m}")[0] == 2
+    assert archive.search("printer date:1999-01")[0] == 0
+
+    _, entries, words = archive.search("driver")
+    assert archive.snippet(entries[0], words) == "[2024-05-01 12:00:00] member3: printer driver will not install"
+
+
+def test_archive_is_rebuilt_from_the_catalog(archive, monkeypatch):
+    archive_all(archive, closed_ticket("ticket-1", [(1, "printer jammed")]),
+                closed_ticket("ticket-2", [(2, "printer fixed")]))
+    # A crash mid-append leaves a torn last line, which the replay skips
+    with open(archive.catalog_path, "a", encoding="utf-8") as f:
+        f.write('{"entry": {"ticket": 3, ')
+
+    monkeypatch.setattr(main.TranscriptArchive, "_archives", {})
+    reloaded = asyncio.run(main.TranscriptArchive.for_guild(1))
+    assert reloaded is not archive
+    assert reloaded.tickets == archive.tickets
+    assert reloaded.search("printer")[:2] == archive.search("printer")[:2]
+
+    with gzip.open(reloaded.blob_path(reloaded.tickets[0]["digest"]), "rt", encoding="utf-8") as f:
+        assert f.read().endswith("member1: printer jammed\n")
+
+
+def test_archive_touches_the_disk_only_in_the_worker(archive, monkeypatch):
+    threads = []
+    makedirs = main.os.makedirs
+
+    def recording_makedirs(*args, **kwargs):
+        threads.append(threading.get_ident())
+        return makedirs(*args, **kwargs)
+
+    monkeypatch.setattr(main.os, "makedirs", recording_makedirs)
+    archive_all(archive, closed_ticket("ticket-1", [(1, "hello")]))
+    assert threads and threading.get_ident() not in threads
+
+
+@pytest.mark.benchmark
+def test_50k_message_history(record_property):
+    messages = history(HISTORY_MESSAGES)
+    closed_at = datetime.datetime.now()
+
+    started = time.perf_counter()
+    legacy = legacy_transcript("ticket-0042", "staff#0001", closed_at, messages).encode("utf-8")
+    record_property("legacy_ms", round((time.perf_counter() - started) * 1000))
+    record_property("output_kib", len(legacy) // 1024)
+    del legacy
+
+    for label, compress, html in (("text", False, False), ("gzip", True, False), ("html", False, True)):
+        started = time.perf_counter()
+        writer, files = write(messages, compress=compress, html=html)
+        record_property(f"{label}_ms", round((time.perf_counter() - started) * 1000))
+        writer.close()
+
+    # Memory is measured in a separate pass, since tracing slows everything down
+    tracemalloc.start()
+    legacy = legacy_transcript("ticket-0042", "staff#0001", closed_at, messages).encode("utf-8")
+    record_property("legacy_peak_kib", tracemalloc.get_traced_memory()[1] // 1024)
+    del legacy
+    for label, compress, html in (("text", False, False), ("gzip", True, False), ("html", False, True)):
+        tracemalloc.reset_peak()
+        writer, files = write(messages, compress=compress, html=html)
+        record_property(f"{label}_peak_kib", tracemalloc.get_traced_memory()[1] // 1024)
+        writer.close()
+        del writer, files
+    tracemalloc.stop()
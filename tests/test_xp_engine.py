@@ -0,0 +1,84 @@
+import asyncio
+import random
+from types import SimpleNamespace
+
+import main
+
+XP = main.PlatinumXPEngine
+GUILD = 1
+
+
+class FakeMember:
+    def __init__(self, guild, user_id):
+        self.guild = guild
+        self.id = user_id
+        self.bot = False
+        self.dms = []
+
+    async def send(self, content):
+        self.dms.append(content)
+
+
+def enable_xp(gain, cooldown):
+    config = main.PlatinumCoreDB.load_guild(GUILD)["xp_engine"]
+    config.update(global_enabled=True, min_gain=gain, max_gain=gain, cooldown_seconds=cooldown)
+
+
+def test_replayed_messages_match_expected_totals(monkeypatch):
+    gain, cooldown = 20, 60
+    enable_xp(gain, cooldown)
+    now = [1_000_000.0]
+    monkeypatch.setattr(main.time, "time", lambda: now[0])
+
+    guild = SimpleNamespace(id=GUILD, name="Test")
+    members = [FakeMember(guild, user_id) for user_id in range(1, 51)]
+    rng = random.Random(6)
+    expected = {member.id: 0 for member in members}
+    last_award = {member.id: 0.0 for member in members}
+
+    async def replay():
+        for _ in range(5000):
+            now[0] += rng.uniform(0, 5)
+            member = rng.choice(members)
+            if now[0] - last_award[member.id] >= cooldown:
+                expected[member.id] += gain
+                last_award[member.id] = now[0]
+            await XP.process_message_xp(member)
+
+    asyncio.run(replay())
+
+    for member in members:
+        record = XP.get_record(GUILD, member.id)
+        assert record.total_xp == expected[member.id]
+        assert (record.level, record.xp) == XP.level_from_total_xp(record.total_xp)
+        assert len(member.dms) == record.level - 1
+
+    # Nothing reaches the partition until the flush, then everything does
+    user_data = main.PlatinumCoreDB.load_guild(GUILD)["xp_engine"]["user_data"]
+    assert user_data == {}
+    XP.flush_pending_xp()
+    assert {int(uid): entry["total_xp"] for uid, entry in user_data.items()} == \
+        {uid: total for uid, total in expected.items() if total}
+
+    # And the totals survive a write to disk and a cold reload
+    asyncio.run(main.PlatinumCoreDB.flush_database())
+    monkeypatch.setattr(main.PlatinumCoreDB, "_guild_stores", {})
+    XP.reset()
+    for member in members:
+        assert XP.get_record(GUILD, member.id).total_xp == expected[member.id]
+
+
+def test_cooldown_blocks_repeat_awards(monkeypatch):
+    enable_xp(25, 60)
+    now = [5_000.0]
+    monkeypatch.setattr(main.time, "time", lambda: now[0])
+    member = FakeMember(SimpleNamespace(id=GUILD, name="Test"), 9)
+
+    async def send_at(*offsets):
+        for offset in offsets:
+            now[0] = 5_000.0 + offset
+            await XP.process_message_xp(member)
+
+    asyncio.run(send_at(0, 10, 59, 60, 119, 120))
+    assert XP.get_record(GUILD, 9).total_xp == 75
+    assert XP._dirty[GUILD] == {9}
@@ -0,0 +1,146 @@
+import asyncio
+import math
+import random
+import time
+
+import pytest
+
+import main
+
+XP = main.PlatinumXPEngine
+GUILD = 1
+
+
+def user_data():
+    return main.PlatinumCoreDB.load_guild(GUILD)["xp_engine"]["user_data"]
+
+
+def seed(totals):
+    data = user_data()
+    for user_id, total in totals.items():
+        level, xp = XP.level_from_total_xp(total)
+        data[str(user_id)] = {"xp": xp, "level": level, "total_xp": total, "last_xp_time": 0}
+
+
+@pytest.mark.parametrize("raw", [
+    {"1": 10, "2": "abc"},
+    {"foo": 5},
+    {"1": 1.5},
+    {"1": True},
+    [1, 2],
+])
+def test_invalid_import_changes_nothing(raw):
+    seed({1: 500})
+    before = {k: dict(v) for k, v in user_data().items()}
+    with pytest.raises(ValueError):
+        asyncio.run(XP.bulk_recompute(GUILD, 1.0, raw))
+    assert user_data() == before
+
+
+@pytest.mark.parametrize("multiplier", [math.inf, math.nan, -1.0])
+def test_invalid_multiplier_changes_nothing(multiplier):
+    seed({1: 500, 2: 20000})
+    before = {k: dict(v) for k, v in user_data().items()}
+    with pytest.raises(ValueError):
+        asyncio.run(XP.bulk_recompute(GUILD, multiplier))
+    assert user_data() == before
+
+
+def test_import_and_multiplier_recompute_levels():
+    seed({1: 500})
+    count = asyncio.run(XP.bulk_recompute(GUILD, 2.0, {"1": "100", "2": 5000}))
+    assert count == 2
+    data = user_data()
+    assert data["1"]["total_xp"] == 1200
+    assert data["2"]["total_xp"] == 10000
+    for entry in data.values():
+        assert (entry["level"], entry["xp"]) == XP.level_from_total_xp(entry["total_xp"])
+
+
+def test_incremental_awards_match_closed_form():
+    record = XP.get_record(GUILD, 7)
+    for _ in range(400):
+        XP.apply_xp(GUILD, 7, record, 137)
+    assert record.total_xp == 400 * 137
+    assert (record.level, record.xp) == XP.level_from_total_xp(record.total_xp)
+
+
+def test_large_award_crosses_several_levels_and_keeps_overflow():
+    record = XP.get_record(GUILD, 7)
+    total = XP.cumulative_xp_for_level(5) + 42
+    assert XP.apply_xp(GUILD, 7, record, total)
+    assert (record.level, record.xp) == (5, 42)
+
+
+def test_recompute_after_awards_leaves_levels_unchanged():
+    record = XP.get_record(GUILD, 7)
+    for _ in range(250):
+        XP.apply_xp(GUILD, 7, record, 95)
+    level = record.level
+    asyncio.run(XP.bulk_recompute(GUILD))
+    assert user_data()["7"]["level"] == level
+
+
+@pytest.mark.parametrize("level", [1, 2, 57, XP.LEVEL_TABLE_SIZE, XP.LEVEL_TABLE_SIZE + 1, XP.LEVEL_TABLE_SIZE + 50])
+def test_inverse_is_exact_at_level_boundaries(level):
+    # Both sides of the precomputed table's edge
+    start = XP.cumulative_xp_for_level(level)
+    assert XP.level_from_total_xp(start) == (level, 0)
+    if level > 1:
+        previous = XP.cumulative_xp_for_level(level - 1)
+        assert XP.level_from_total_xp(start - 1) == (level - 1, start - 1 - previous)
+
+
+def test_award_realigns_a_stored_level_that_disagrees_with_total_xp():
+    # Data written before levels were derived from total_xp can lag behind it
+    total = XP.cumulative_xp_for_level(6) + 10
+    user_data()["7"] = {"xp": 10, "level": 2, "total_xp": total, "last_xp_time": 0}
+    record = XP.get_record(GUILD, 7)
+    assert XP.apply_xp(GUILD, 7, record, 1)
+    assert (record.level, record.xp) == (6, 11)
+
+
+def legacy_level(total_xp):
+    """Walks the requirement curve one level at a time, as the per-message loop used to."""
+    level, xp = 1, total_xp
+    while xp >= XP.calculate_level_requirement(level):
+        xp -= XP.calculate_level_requirement(level)
+        level += 1
+    return level, xp
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("population", ["typical", "veteran"])
+@pytest.mark.parametrize("users", [100_000, 1_000_000])
+def test_bulk_recompute_scaling(users, population, record_property):
+    rng = random.Random(users)
+    if population == "typical":
+        # Most members barely past level 1, a long tail of regulars
+        totals = [int(rng.paretovariate(1.2) * 500) for _ in range(users)]
+    else:
+        totals = [XP.cumulative_xp_for_level(rng.randint(20, 200)) + rng.randint(0, 999) for _ in range(users)]
+    data = user_data()
+    for user_id, total in enumerate(totals):
+        data[str(user_id)] = {"xp": 0, "level": 1, "total_xp": total, "last_xp_time": 0}
+
+    # The per-member level calculation: table lookup / closed form against the level-by-level walk
+    started = time.perf_counter()
+    derived = [XP.level_from_total_xp(total) for total in totals]
+    record_property("inverse_s", round(time.perf_counter() - started, 2))
+    started = time.perf_counter()
+    walked = [legacy_level(total) for total in totals]
+    record_property("level_walk_s", round(time.perf_counter() - started, 2))
+    assert derived == walked
+
+    # Building the new user_data, which is what the worker thread runs
+    started = time.perf_counter()
+    XP.recompute_levels(dict(data), {}, 1.0)
+    record_property("rebuild_s", round(time.perf_counter() - started, 2))
+
+    # End to end: validation, worker thread, swap and commit
+    started = time.perf_counter()
+    assert asyncio.run(XP.bulk_recompute(GUILD)) == users
+    record_property("bulk_recompute_s", round(time.perf_counter() - started, 2))
+
+    rebuilt = user_data()
+    assert all((rebuilt[str(user_id)]["level"], rebuilt[str(user_id)]["xp"]) == walked[user_id] for user_id in range(users))